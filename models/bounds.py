@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+def GetMaxTimesOn(lifetime, maxConsecutive):
+	"""Get the maximum number of time intervals in which a sensor can be on (or cover a point), if it cannot be on for too long
+
+	Parameters:
+
+	lifetime -- lifetime of the WSN
+
+	maxConsecutive -- maximum number of consecutive time intervals (array, 0 means no limit)
+
+	Returns: array of the maximum numbers of time intervals
+	"""
+
+	return np.where(maxConsecutive > 0, lifetime - lifetime // (maxConsecutive + 1), lifetime)
+
+def GetCoverageUpperBound(maxTimesCovered, maxConsecutive, limit_covering, upperbound):
+	"""Get an upper bound on the lifetime by the coverage constraint of each point separately
+
+	A point can be covered by k sensors in T time intervals only if its potential coverers can cover it in k*T time intervals altogether.
+
+	Parameters:
+
+	maxTimesCovered -- for each point, array of the number of time intervals in which its potential coverers can cover it at most, due to their resources
+
+	maxConsecutive -- for each point, array of the number of consecutive time intervals in which its potential coverers can cover it at most (0 means no limit)
+
+	limit_covering -- number of sensors that must cover a point in a time interval
+
+	upperbound -- upper bound known already
+
+	Returns: upper bound on the lifetime (0 if a point has less than k potential coverers)
+	"""
+
+	lifetimes = np.arange(1, upperbound + 1)
+
+	for (timesCovered, consecutive) in zip(maxTimesCovered, maxConsecutive):
+		if len(timesCovered) < limit_covering:
+			return 0
+
+		# satisfiability is monotone in the lifetime, so the first lifetime that violates the condition bounds the lifetime
+		timesOn = GetMaxTimesOn(lifetimes[:, None], np.asarray(consecutive)[None, :])
+		violated = np.flatnonzero(np.minimum(timesOn, np.asarray(timesCovered)[None, :]).sum(axis = 1) < limit_covering * lifetimes)
+		if len(violated) > 0:
+			upperbound = int(lifetimes[violated[0]]) - 1
+			lifetimes = lifetimes[:upperbound]
+
+	return upperbound
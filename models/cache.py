@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+from solvers.card_enc_type import Relations
+from solvers.solver import Solver, Constraint
+
+# version of the format of the cache files, part of the cache keys
+CACHE_FORMAT = 3
+
+# codes of the recorded solver calls
+VARS = 0
+CLAUSE = 1
+CONSTRAINT = 2
+EXTERNAL_VARS = 3
+WINDOWS = 4
+
+class EncodingRecorder(Solver):
+	def __init__(self, solver):
+		"""Solver that passes the calls through to another solver, and records them
+
+		Parameters:
+
+		solver -- solver to encode the constraints for
+		"""
+
+		self.solver = solver
+		self.ops = []
+		self.lits = []
+		self.weights = []
+
+	def record(self, code, lits, weights = None, relation = 0, bound = 0, boolLit = None, condLit = None):
+		self.lits.extend(lits)
+		self.weights.extend(weights if weights is not None else [0] * len(lits))
+		self.ops.append((code, len(self.lits), relation, bound, boolLit or 0, condLit or 0, weights is not None))
+
+	def generateVars(self, numVars):
+		vars = self.solver.generateVars(numVars)
+		self.record(VARS, vars)
+		return vars
+
+	def addClause(self, lits):
+		self.solver.addClause(lits)
+		self.record(CLAUSE, lits)
+
+	def addConstraint(self, constraint):
+		self.solver.addConstraint(constraint)
+		self.record(CONSTRAINT, constraint.lits, constraint.weights, constraint.relation.value, constraint.bound, constraint.boolLit, constraint.condLit)
+
+	def addWindowConstraints(self, lits, window, bound):
+		self.solver.addWindowConstraints(lits, window, bound)
+		# the weights store the slots of the literals, the relation the window and the Boolean literal the number of slots
+		self.record(WINDOWS, [l for slot in lits for l in slot], [slotIndex for (slotIndex, slot) in enumerate(lits) for _ in slot], window, bound, len(lits))
+
+	def addClauses(self, clauses):
+		self.solver.addClauses(clauses)
+		for lits in clauses:
+			self.record(CLAUSE, lits)
+
+	def addConstraints(self, constraints):
+		self.solver.addConstraints(constraints)
+		for constraint in constraints:
+			self.record(CONSTRAINT, constraint.lits, constraint.weights, constraint.relation.value, constraint.bound, constraint.boolLit, constraint.condLit)
+
+class CachedWsnModel(object):
+	def __init__(self, wsnModel, jsonData, directory):
+		"""WSN model whose encodings are stored on disk, and replayed instead of being encoded again
+
+		The solver calls of an encoding are recorded with the vars as they were generated, so that the replay can map them to the vars of any solver.
+		Therefore, an encoding is identified by the instance, the WSN constraints, the lifetime and the use of activation vars, but not by the solver.
+
+		Parameters:
+
+		wsnModel -- WSN model to encode
+
+		jsonData -- content of the input file, which identifies the instance
+
+		directory -- directory of the cache files
+		"""
+
+		self.wsnModel = wsnModel
+		self.directory = directory
+
+		self.instanceKey = json.dumps([
+			CACHE_FORMAT,
+			type(wsnModel).__name__,
+			wsnModel.GetEncodingKey(),
+			jsonData
+		], sort_keys = True)
+
+		os.makedirs(directory, exist_ok = True)
+
+	def __getattr__(self, name):
+		if name == "wsnModel":
+			raise AttributeError(name)
+		return getattr(self.wsnModel, name)
+
+	def GetCacheFileName(self, lifetime, activationVars):
+		key = "{}/{:d}/{}".format(self.instanceKey, lifetime, activationVars is not None)
+		return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + ".npz")
+
+	def EncodeWsnConstraints(self, lifetime, solver, activationVars = None):
+		fileName = self.GetCacheFileName(lifetime, activationVars)
+
+		data = self.__Load(fileName)
+		if data is not None:
+			logging.info("Replaying the encoding from {}".format(fileName))
+			return self.__Replay(data, solver, activationVars)
+
+		recorder = EncodingRecorder(solver)
+		if activationVars is not None:
+			recorder.record(EXTERNAL_VARS, activationVars)
+		schedulingVars = self.wsnModel.EncodeWsnConstraints(lifetime = lifetime, solver = recorder, activationVars = activationVars)
+
+		# concurrent processes may write the same file, so it is replaced atomically
+		(fd, tmpFileName) = tempfile.mkstemp(dir = self.directory, suffix = ".npz")
+		with os.fdopen(fd, "wb") as file:
+			np.savez_compressed(
+				file,
+				ops = np.array(recorder.ops, dtype = np.int64).reshape(-1, 7),
+				lits = np.array(recorder.lits, dtype = np.int64),
+				weights = np.array(recorder.weights, dtype = np.int64),
+				schedulingVars = np.array(schedulingVars, dtype = np.int64)
+			)
+		os.replace(tmpFileName, fileName)
+		logging.info("Stored the encoding in {}".format(fileName))
+
+		return schedulingVars
+
+	def __Load(self, fileName):
+		if not os.path.isfile(fileName):
+			return None
+
+		try:
+			with np.load(fileName) as data:
+				return {name: data[name] for name in ["ops", "lits", "weights", "schedulingVars"]}
+		except (OSError, KeyError, ValueError):
+			logging.warning("Ignoring the corrupt cache file {}".format(fileName))
+			return None
+
+	def __Replay(self, data, solver, activationVars):
+		ops = data["ops"]
+		lits = data["lits"]
+		weights = data["weights"]
+		recordedSchedulingVars = data["schedulingVars"]
+
+		varMap = np.zeros(np.abs(lits).max() + 1 if len(lits) > 0 else 1, dtype = np.int64)
+
+		def mapLits(lits):
+			return (np.sign(lits) * varMap[np.abs(lits)]).tolist()
+
+		def mapLit(lit):
+			return int(np.sign(lit) * varMap[abs(lit)]) if lit != 0 else None
+
+		# consecutive clauses and constraints are passed to the solver in batches
+		clauses = []
+		constraints = []
+
+		start = 0
+		for (code, end, relation, bound, boolLit, condLit, weighted) in ops.tolist():
+			if code != CLAUSE and clauses:
+				solver.addClauses(clauses)
+				clauses = []
+			if code != CONSTRAINT and constraints:
+				solver.addConstraints(constraints)
+				constraints = []
+
+			segment = lits[start:end]
+			if code == VARS:
+				varMap[segment] = solver.generateVars(end - start)
+			elif code == EXTERNAL_VARS:
+				varMap[segment] = activationVars
+			elif code == CLAUSE:
+				clauses.append(mapLits(segment))
+			elif code == WINDOWS:
+				slots = [[] for _ in range(boolLit)]
+				for (lit, slotIndex) in zip(mapLits(segment), weights[start:end].tolist()):
+					slots[slotIndex].append(lit)
+				solver.addWindowConstraints(slots, window = relation, bound = bound)
+			else:
+				constraints.append(Constraint(
+					mapLits(segment),
+					weights = weights[start:end].tolist() if weighted else None,
+					relation = Relations(relation),
+					bound = bound,
+					boolLit = mapLit(boolLit),
+					condLit = mapLit(condLit)
+				))
+			start = end
+
+		solver.addClauses(clauses)
+		solver.addConstraints(constraints)
+
+		return varMap[recordedSchedulingVars].tolist()
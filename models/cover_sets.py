@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+from math import floor
+import logging
+from time import time
+
+import numpy as np
+from ortools.linear_solver import pywraplp
+
+EPSILON = 1e-6
+
+class CoverSetEngine(object):
+	def __init__(self, wsnModel):
+		"""Column generation over k-covers for model 1 without the evasive and moving target constraints
+
+		Without these constraints the order of the time intervals does not matter, so a scheduling is given by the number of time intervals assigned to each k-cover (i.e., a set of sensors that covers every point by at least k sensors).
+		The LP relaxation of the master problem is solved with k-covers generated on demand by an ILP pricing problem, then the master problem is solved as an ILP over the generated k-covers.
+
+		Parameters:
+
+		wsnModel -- WSN model 1 without the evasive and moving target constraints
+		"""
+
+		assert wsnModel.limit_ON == 0 and wsnModel.limit_crit_ON == 0
+
+		self.wsnModel = wsnModel
+		self.covers = []
+
+		# master problem: maximize the number of time intervals within the lifetimes of the sensors
+		self.master = pywraplp.Solver.CreateSolver("GLOP")
+		self.lifetimeConstraints = [self.master.Constraint(0, sensor.lifetime) for sensor in wsnModel.sensors]
+		self.master.Objective().SetMaximization()
+		self.coverVars = []
+
+		# pricing problem: find the k-cover of minimal dual cost
+		self.pricing = pywraplp.Solver.CreateSolver("SCIP")
+		self.sensorVars = [self.pricing.BoolVar("s{:d}".format(sensorIndex)) for sensorIndex in range(len(wsnModel.sensors))]
+		for point in wsnModel.points:
+			self.pricing.Add(sum(self.sensorVars[sensorIndex] for sensorIndex in point.converingSensorIndices) >= wsnModel.limit_covering)
+		self.pricing.Objective().SetMinimization()
+
+	def __IsCover(self, sensorIndices):
+		return all(sum(1 for sensorIndex in point.converingSensorIndices if sensorIndex in sensorIndices) >= self.wsnModel.limit_covering for point in self.wsnModel.points)
+
+	def __Minimize(self, sensorIndices, costs):
+		"""Drop the sensors from a k-cover as long as it remains a k-cover, the most expensive ones first"""
+
+		cover = set(sensorIndices)
+		for sensorIndex in sorted(sensorIndices, key = lambda sensorIndex: -costs[sensorIndex]):
+			cover.discard(sensorIndex)
+			if not self.__IsCover(cover):
+				cover.add(sensorIndex)
+		return frozenset(cover)
+
+	def __AddCover(self, cover):
+		if cover in self.covers:
+			return False
+
+		self.covers.append(cover)
+		var = self.master.NumVar(0, self.master.infinity(), "c{:d}".format(len(self.covers)))
+		for sensorIndex in cover:
+			self.lifetimeConstraints[sensorIndex].SetCoefficient(var, 1)
+		self.master.Objective().SetCoefficient(var, 1)
+		self.coverVars.append(var)
+		return True
+
+	def Solve(self, timeout = None):
+		"""Compute the bounds on the lifetime and a scheduling that reaches the lower bound
+
+		Parameters:
+
+		timeout -- timeout in seconds (None by default)
+
+		Returns: triple of the lower bound, the upper bound and the scheduling (the lower bound is 0 and the scheduling is None if no scheduling is found)
+		"""
+
+		deadline = time() + timeout if timeout is not None else None
+		sensors = self.wsnModel.sensors
+		upperbound = self.wsnModel.GetUpperBound()
+
+		if not self.__IsCover(set(range(len(sensors)))):
+			return (0, 0, None)
+
+		# the initial k-cover prefers the sensors of long lifetimes
+		self.__AddCover(self.__Minimize(range(len(sensors)), [-sensor.lifetime for sensor in sensors]))
+
+		while deadline is None or time() < deadline:
+			self.master.Solve()
+			value = self.master.Objective().Value()
+			duals = [constraint.dual_value() for constraint in self.lifetimeConstraints]
+
+			for sensorIndex in range(len(sensors)):
+				self.pricing.Objective().SetCoefficient(self.sensorVars[sensorIndex], duals[sensorIndex])
+			if deadline is not None:
+				self.pricing.SetTimeLimit(int(max(deadline - time(), 0) * 1000))
+			status = self.pricing.Solve()
+			if status not in [pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE]:
+				break
+
+			# Farley's bound: no k-cover costs less than the best bound of the pricing problem
+			minimalCost = self.pricing.Objective().BestBound()
+			if minimalCost > EPSILON:
+				upperbound = min(upperbound, floor(value / min(minimalCost, 1) + EPSILON))
+			logging.debug("Column generation: {:d} k-covers, LP = {:f}, minimal cost = {:f}".format(len(self.covers), value, minimalCost))
+
+			if self.pricing.Objective().Value() >= 1 - EPSILON:
+				break
+
+			cover = self.__Minimize([sensorIndex for sensorIndex in range(len(sensors)) if self.sensorVars[sensorIndex].solution_value() > 0.5], duals)
+			if not self.__AddCover(cover):
+				break
+
+		logging.info("Column generation: {:d} k-covers, upper bound = {:d}".format(len(self.covers), upperbound))
+
+		# integer master problem over the generated k-covers
+		integerMaster = pywraplp.Solver.CreateSolver("SCIP")
+		counts = [integerMaster.IntVar(0, upperbound, "c{:d}".format(i)) for i in range(len(self.covers))]
+		for sensorIndex in range(len(sensors)):
+			integerMaster.Add(sum(counts[i] for i in range(len(self.covers)) if sensorIndex in self.covers[i]) <= sensors[sensorIndex].lifetime)
+		integerMaster.Add(sum(counts) <= upperbound)
+		integerMaster.Maximize(sum(counts))
+		if deadline is not None:
+			integerMaster.SetTimeLimit(int(max(deadline - time(), 1) * 1000))
+		status = integerMaster.Solve()
+		if status not in [pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE]:
+			return (0, upperbound, None)
+
+		# expand the k-covers into time intervals
+		timeCovers = [self.covers[i] for i in range(len(self.covers)) for _ in range(int(round(counts[i].solution_value())))]
+		lowerbound = len(timeCovers)
+		schedulingModel = np.array([[sensorIndex in cover for cover in timeCovers] for sensorIndex in range(len(sensors))], dtype = bool).reshape(len(sensors), lowerbound)
+		self.wsnModel.VerifyScheduling(schedulingModel = schedulingModel, lifetime = lowerbound)
+
+		logging.info("Column generation: lower bound = {:d}".format(lowerbound))
+
+		return (lowerbound, upperbound, schedulingModel)
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# maximum number of sensor-point pairs to compute the distances of at once
+CHUNK_SIZE = 1 << 20
+
+def GetDistances(sensors, points):
+	"""Compute the distances between all the points and sensors
+
+	The points are processed in chunks, which bounds the memory used by the temporary arrays for large deployments.
+
+	Parameters:
+
+	sensors -- list of sensors
+
+	points -- list of points
+
+	Returns: matrix of the distances, indexed by points and sensors
+	"""
+
+	sensorCoords = np.array([[sensor.x, sensor.y] for sensor in sensors], dtype = float).reshape(-1, 2)
+	pointCoords = np.array([[point.x, point.y] for point in points], dtype = float).reshape(-1, 2)
+
+	distances = np.empty((len(points), len(sensors)))
+	chunkSize = max(1, CHUNK_SIZE // max(1, len(sensors)))
+	for start in range(0, len(points), chunkSize):
+		differences = pointCoords[start:start + chunkSize, None, :] - sensorCoords[None, :, :]
+		distances[start:start + chunkSize] = np.sqrt((differences ** 2).sum(axis = 2))
+
+	return distances
@@ -2,8 +2,10 @@
 
 import logging
 
+import numpy as np
+
 class WsnModel(object):
-	def __init__(self, limit_covering, limit_ON, limit_crit_ON):
+	def __init__(self, limit_covering, limit_ON, limit_crit_ON, symmetry_breaking = False):
 		self.sensors = []
 		self.points = []
 		self.critical_points = []
@@ -11,6 +13,7 @@ class WsnModel(object):
 		self.limit_covering = limit_covering #min number of sensors that must cover a point
 		self.limit_ON = limit_ON #max time while one sensor can be switched on
 		self.limit_crit_ON = limit_crit_ON #max time while one sensor can be switched on near a critical point; must be less than limit_ON
+		self.symmetry_breaking = symmetry_breaking #whether to add symmetry breaking constraints
 
 		if limit_ON > 0 and limit_crit_ON > 0 and limit_crit_ON >= limit_ON:
 			logging.error("The limit for the moving target constraint must be < than the limit for the evasive constraint")
@@ -26,6 +29,29 @@ class WsnModel(object):
 
 		raise NotImplementedError("Please Implement this method")
 
+	def GetFeatures(self, coverage):
+		"""Compute the cheap features of the instance and of the constraints, for the selection of the solvers (see solvers.selection)
+
+		Parameters:
+
+		coverage -- matrix of whether each sensor can cover each point, at any level (points x sensors)
+
+		Returns: dictionary from the names of the features to their values, to be completed by the model
+		"""
+
+		coverers = coverage.sum(axis = 1)
+		return {
+			"sensors": len(self.sensors),
+			"points": len(self.points),
+			"criticalPoints": len(self.critical_points),
+			"coverageDensity": float(coverage.mean()) if coverage.size else 0.0,
+			"minCoverers": int(coverers.min()) if coverers.size else 0,
+			"meanCoverers": float(coverers.mean()) if coverers.size else 0.0,
+			"limitCovering": self.limit_covering,
+			"limitOn": self.limit_ON,
+			"limitCriticalOn": self.limit_crit_ON
+		}
+
 	def GetUpperBound(self):
 		"""Returns the initial upper bound for optimization algorithms
 
@@ -34,6 +60,45 @@ class WsnModel(object):
 
 		raise NotImplementedError("Please Implement this method")
 
+	def GetEncodingKey(self):
+		"""Returns the parameters that the encoding depends on, besides the instance and the lifetime"""
+
+		return (self.limit_covering, self.limit_ON, self.limit_crit_ON, self.symmetry_breaking)
+
+	def GetMaxConsecutive(self, critical):
+		"""Returns the maximum number of consecutive time intervals in which a sensor can be on (or cover a point), 0 if unlimited
+
+		Parameters:
+
+		critical -- whether the moving target constraint applies
+		"""
+
+		limits = [limit for limit in [self.limit_ON, self.limit_crit_ON if critical else 0] if limit > 0]
+		return min(limits) if limits else 0
+
+	def GetCoverageLevels(self):
+		"""Returns the levels at which the sensors cover the points
+
+		Returns: pair of the matrix of the lowest level index at which each sensor covers each point (points x sensors; the number of levels if none), and the number of levels
+		"""
+
+		raise NotImplementedError("Please Implement this method")
+
+	def GetCriticalPointIndices(self):
+		"""Returns the indices of the points that the moving target constraint applies to"""
+
+		raise NotImplementedError("Please Implement this method")
+
+	def GetSchedulingArray(self, schedulingModel):
+		"""Returns the scheduling of sensors as a boolean NumPy array, indexed by sensor and time (and level, if any)
+
+		Parameters:
+
+		schedulingModel -- scheduling of sensors, either as a boolean array (see Solver.get_values) or as a satisfying model
+		"""
+
+		return np.asarray(schedulingModel) > 0
+
 	def GetSensorVar(self, sensorIndex, time):
 		return time * len(self.sensors) + sensorIndex + 1
 
@@ -42,14 +107,14 @@ class WsnModel(object):
 
 		Parameters:
 
-		schedulingModel -- the satisfying model that represents the scheduling of sensors
+		schedulingModel -- scheduling of sensors (see GetSchedulingArray)
 
 		Returns: estimated amount of resources
 		"""
 
 		raise NotImplementedError("Please Implement this method")
 
-	def EncodeWsnConstraints(self, lifetime, solver):
+	def EncodeWsnConstraints(self, lifetime, solver, activationVars = None):
 		"""Encode all the WSN constraints
 
 		Parameters:
@@ -58,17 +123,109 @@ class WsnModel(object):
 
 		solver -- solver to encode the constraints for
 
+		activationVars -- vars, one per time interval, that must imply the coverage constraint in the respective time interval (undefined by default, i.e., every time interval must be covered)
+
 		Returns: list of scheduling vars
 		"""
 
 		raise NotImplementedError("Please Implement this method")
 
+	def ScheduleGreedily(self):
+		"""Schedule the sensors greedily, time interval by time interval, as long as the WSN constraints can be satisfied
+
+		Returns: pair of the reached lifetime and the scheduling as a boolean array, verified by VerifyScheduling
+		"""
+
+		raise NotImplementedError("Please Implement this method")
+
+	def EncodeLexGreaterOrEqual(self, solver, xs, ys):
+		"""Encode that a vector of literals is lexicographically greater than or equal to another one
+
+		Parameters:
+
+		solver -- solver to encode the constraint for
+
+		xs -- literals of the greater vector
+
+		ys -- literals of the smaller vector
+		"""
+
+		# equalVars[i] is forced to be true if the vectors are equal on the first i positions
+		equalVars = [None] + solver.generateVars(len(xs) - 1)
+		clauses = []
+		for i in range(len(xs)):
+			prefix = [-equalVars[i]] if i > 0 else []
+			clauses.append(prefix + [xs[i], -ys[i]])
+			if i + 1 < len(xs):
+				clauses.append(prefix + [-xs[i], -ys[i], equalVars[i + 1]])
+				clauses.append(prefix + [xs[i], ys[i], equalVars[i + 1]])
+		solver.addClauses(clauses)
+
+	def EncodeSymmetryBreaking(self, solver, sensorVars, sensorKeys, interchangeableTimes):
+		"""Encode symmetry breaking constraints that keep only some of the equivalent schedulings
+
+		Both the sensors and the time intervals are ordered lexicographically w.r.t. the same (sensor-major) order of the vars, which keeps the two orderings compatible.
+
+		Parameters:
+
+		solver -- solver to encode the constraints for
+
+		sensorVars -- vars of each sensor in each time interval
+
+		sensorKeys -- key of each sensor; sensors with equal keys must be interchangeable
+
+		interchangeableTimes -- whether the time intervals are interchangeable
+		"""
+
+		# sensors with the same key: the former one has the lexicographically greater vars
+		lastSensorIndices = {}
+		for sensorIndex in range(len(sensorVars)):
+			key = sensorKeys[sensorIndex]
+			if key in lastSensorIndices:
+				self.EncodeLexGreaterOrEqual(solver,
+					[var for vars in sensorVars[lastSensorIndices[key]] for var in vars],
+					[var for vars in sensorVars[sensorIndex] for var in vars])
+			lastSensorIndices[key] = sensorIndex
+
+		# time intervals: the former one has the lexicographically greater vars
+		if interchangeableTimes and sensorVars:
+			columns = [[var for vars in sensorVars for var in vars[time]] for time in range(len(sensorVars[0]))]
+			for time in range(len(columns) - 1):
+				self.EncodeLexGreaterOrEqual(solver, columns[time], columns[time + 1])
+
+	def GetWindowSums(self, counts, window):
+		"""Returns the sums of counts over every window of consecutive time intervals, by cumulative sums
+
+		Parameters:
+
+		counts -- NumPy array whose last axis is indexed by time
+
+		window -- number of consecutive time intervals in a window
+
+		Returns: NumPy array whose last axis is indexed by the first time interval of the windows
+		"""
+
+		cumulativeSums = np.cumsum(counts, axis = -1)
+		cumulativeSums = np.concatenate((np.zeros(counts.shape[:-1] + (1,), dtype = cumulativeSums.dtype), cumulativeSums), axis = -1)
+		return cumulativeSums[..., window:] - cumulativeSums[..., :-window]
+
+	def ReportViolations(self, violations):
+		"""Fail the verification of a scheduling if it violates any constraint, listing all the violations at once
+
+		Parameters:
+
+		violations -- descriptions of the violated constraints
+		"""
+
+		logging.debug("Verification found {:d} violated constraints".format(len(violations)))
+		assert not violations, "Verification failed: {:d} violated constraints\n{}".format(len(violations), "\n".join(violations))
+
 	def VerifyScheduling(self, schedulingModel, lifetime):
-		"""Verify the scheduling
+		"""Verify the scheduling, reporting all the violated constraints (see ReportViolations)
 
 		Parameters:
 
-		schedulingModel -- satisfying model that represents the scheduling of sensors
+		schedulingModel -- scheduling of sensors (see GetSchedulingArray)
 
 		lifetime -- maximum lifetime of the WSN
 		"""
@@ -80,7 +237,7 @@ class WsnModel(object):
 
 		Parameters:
 
-		schedulingModel -- satisfying model that represents the scheduling of sensors
+		schedulingModel -- scheduling of sensors (see GetSchedulingArray)
 		"""
 
 		raise NotImplementedError("Please Implement this method")
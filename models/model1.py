@@ -3,10 +3,14 @@
 from math import pow, sqrt, ceil
 import logging
 
+import numpy as np
+
 from solvers.card_enc_type import Relations
 from solvers.solver import Constraint
 
 from models.model import WsnModel
+from models.bounds import GetCoverageUpperBound
+from models.geometry import GetDistances
 
 class Sensor:
 	powerConsumptions = {
@@ -40,17 +44,12 @@ class Point:
 	def DistanceFrom(self, sensor):
 		return sqrt(pow(sensor.x - self.x, 2) + pow(sensor.y - self.y, 2))
 
-	def SetCoverage(self, sensors):
-		for i in range(len(sensors)):
-			if self.DistanceFrom(sensors[i]) <= sensors[i].scope:
-				self.converingSensorIndices.append(i)
-
 	def __str__(self):
 		return "({:d},{:d}): covering sensors = {}".format(int(self.x), int(self.y), self.converingSensorIndices)
 
 class WsnModel1(WsnModel):
-	def __init__(self, limit_covering, limit_ON, limit_crit_ON):
-		super().__init__(limit_covering, limit_ON, limit_crit_ON)
+	def __init__(self, limit_covering, limit_ON, limit_crit_ON, symmetry_breaking = False):
+		super().__init__(limit_covering, limit_ON, limit_crit_ON, symmetry_breaking)
 
 	def ReadInputFile(self, json):
 		for s in json["sensors"]:
@@ -64,51 +63,62 @@ class WsnModel1(WsnModel):
 		if self.sensors is None or self.points is None:
 			raise Exception("No sensors or target points specified")
 
-		for target in self.points:
-			target.SetCoverage(self.sensors)
+		# coverage[p, s]: whether sensor s covers point p
+		self.distances = GetDistances(self.sensors, self.points)
+		self.coverage = self.distances <= np.array([sensor.scope for sensor in self.sensors])[None, :]
+		for (pointIndex, point) in enumerate(self.points):
+			point.converingSensorIndices = np.flatnonzero(self.coverage[pointIndex]).tolist()
+		self.criticalPointIndices = [pointIndex for pointIndex in range(len(self.points)) if json["points"][pointIndex]["critical"]]
+		self.criticalSensors = self.coverage[self.criticalPointIndices].any(axis = 0)
+
+		# the sensors differ only by their scopes (one scope for the fix benchmarks)
+		lifetimes = [sensor.lifetime for sensor in self.sensors]
+		self.features = self.GetFeatures(self.coverage)
+		self.features.update(version = 1, levels = 1, levelSpread = 1.0, sensorSpread = max(lifetimes) / max(min(lifetimes), 1) if lifetimes else 1.0)
 
 	def __SensorCoversCriticalPoint(self, sensorIndex):
-		for p in self.critical_points:
-			if sensorIndex in p.converingSensorIndices:
-				return True
-		return False
+		return bool(self.criticalSensors[sensorIndex])
+
+	def GetCoverageLevels(self):
+		return (np.where(self.coverage, 0, 1), 1)
+
+	def GetCriticalPointIndices(self):
+		return self.criticalPointIndices
 
 	def GetUpperBound(self):
-		return ceil(sum(s.lifetime for s in self.sensors) / self.limit_covering)
+		return GetCoverageUpperBound(
+			maxTimesCovered = [[self.sensors[sensorIndex].lifetime for sensorIndex in point.converingSensorIndices] for point in self.points],
+			maxConsecutive = [[self.GetMaxConsecutive(self.__SensorCoversCriticalPoint(sensorIndex)) for sensorIndex in point.converingSensorIndices] for point in self.points],
+			limit_covering = self.limit_covering,
+			upperbound = ceil(sum(s.lifetime for s in self.sensors) / self.limit_covering)
+		)
 
 	def GetResource(self, schedulingModel):
-		return sum(s.lifetime for s in self.sensors) - sum(1 if lit > 0 else 0 for l in schedulingModel for lit in l)
+		return sum(s.lifetime for s in self.sensors) - int(self.GetSchedulingArray(schedulingModel).sum())
 
-	def EncodeWsnConstraints(self, lifetime, solver):
+	def EncodeWsnConstraints(self, lifetime, solver, activationVars = None):
 		# generate scheduling vars
 		schedulingVars = [solver.generateVars(lifetime) for _ in self.sensors]
 
 		# lifetime constraint
-		for sensorIndex in range(len(self.sensors)):
-			solver.addConstraint(Constraint(
-				lits = schedulingVars[sensorIndex],
-				relation = Relations.LessOrEqual,
-				bound = self.sensors[sensorIndex].lifetime
-			))
+		solver.addConstraints([Constraint(
+			lits = schedulingVars[sensorIndex],
+			relation = Relations.LessOrEqual,
+			bound = self.sensors[sensorIndex].lifetime
+		) for sensorIndex in range(len(self.sensors))])
 
 		# coverage constraint
-		for point in self.points:
-			for time in range(lifetime):
-				solver.addConstraint(Constraint(
-					lits = [schedulingVars[sensorIndex][time] for sensorIndex in point.converingSensorIndices],
-					relation = Relations.GreaterOrEqual,
-					bound = self.limit_covering
-				))
+		solver.addConstraints([Constraint(
+			lits = [schedulingVars[sensorIndex][time] for sensorIndex in point.converingSensorIndices],
+			relation = Relations.GreaterOrEqual,
+			bound = self.limit_covering,
+			condLit = activationVars[time] if activationVars else None
+		) for point in self.points for time in range(lifetime)])
 
 		# evasive constraint
 		if self.limit_ON > 0:
 			for sensorIndex in range(len(self.sensors)):
-				for time in range(lifetime - self.limit_ON):
-					solver.addConstraint(Constraint(
-						lits = [schedulingVars[sensorIndex][time + h] for h in range(self.limit_ON + 1)],
-						relation = Relations.LessOrEqual,
-						bound = self.limit_ON
-					))
+				solver.addWindowConstraints([[var] for var in schedulingVars[sensorIndex]], window = self.limit_ON + 1, bound = self.limit_ON)
 
 		# moving target constraint
 		if self.limit_crit_ON > 0:
@@ -116,52 +126,97 @@ class WsnModel1(WsnModel):
 				if not self.__SensorCoversCriticalPoint(sensorIndex):
 					continue
 
-				for time in range(lifetime - self.limit_crit_ON):
-					solver.addConstraint(Constraint(
-						lits = [schedulingVars[sensorIndex][time + h] for h in range(self.limit_crit_ON + 1)],
-						relation = Relations.LessOrEqual,
-						bound = self.limit_crit_ON
-					))
+				solver.addWindowConstraints([[var] for var in schedulingVars[sensorIndex]], window = self.limit_crit_ON + 1, bound = self.limit_crit_ON)
+
+		# symmetry breaking: sensors with the same scope and covered points are interchangeable
+		if self.symmetry_breaking:
+			self.EncodeSymmetryBreaking(solver,
+				sensorVars = [[[var] for var in vars] for vars in schedulingVars],
+				sensorKeys = [(sensor.scope, self.coverage[:, sensorIndex].tobytes()) for (sensorIndex, sensor) in enumerate(self.sensors)],
+				interchangeableTimes = self.limit_ON == 0 and self.limit_crit_ON == 0 and activationVars is None)
 
 		return schedulingVars
 
+	def ScheduleGreedily(self):
+		coverage = self.coverage
+		critical = self.criticalSensors
+
+		# sensors may be switched on as long as they have remaining lifetime and have not been on for too long
+		remaining = np.array([sensor.lifetime for sensor in self.sensors])
+		onFor = np.zeros(len(self.sensors), dtype = int)
+		maxOnFor = np.full(len(self.sensors), np.iinfo(int).max)
+		if self.limit_ON > 0:
+			maxOnFor[:] = self.limit_ON
+		if self.limit_crit_ON > 0:
+			maxOnFor[critical] = np.minimum(maxOnFor[critical], self.limit_crit_ON)
+
+		timeSchedules = []
+		while True:
+			available = (remaining > 0) & (onFor < maxOnFor)
+			selected = np.zeros(len(self.sensors), dtype = bool)
+			missing = np.full(len(self.points), self.limit_covering)
+
+			# select the sensors that cover the most points still missing coverers, then the ones with the most remaining lifetime
+			while (missing > 0).any():
+				gains = coverage[missing > 0].sum(axis = 0) * (available & ~selected)
+				best = np.lexsort((remaining, gains))[-1]
+				if gains[best] == 0:
+					break
+				selected[best] = True
+				missing -= coverage[:, best]
+
+			if (missing > 0).any() or not selected.any():
+				break
+
+			# drop the redundant sensors, the ones with the least remaining lifetime first
+			for sensorIndex in sorted(np.flatnonzero(selected), key = lambda sensorIndex: remaining[sensorIndex]):
+				if (coverage[:, selected].sum(axis = 1) - coverage[:, sensorIndex] >= self.limit_covering).all():
+					selected[sensorIndex] = False
+
+			timeSchedules.append(selected)
+			remaining -= selected
+			onFor = np.where(selected, onFor + 1, 0)
+
+		lifetime = len(timeSchedules)
+		schedulingModel = np.array(timeSchedules, dtype = bool).reshape(lifetime, len(self.sensors)).T
+		self.VerifyScheduling(schedulingModel = schedulingModel, lifetime = lifetime)
+
+		return (lifetime, schedulingModel)
+
 	def VerifyScheduling(self, schedulingModel, lifetime):
+		schedulingModel = self.GetSchedulingArray(schedulingModel)[:, :lifetime]
+		violations = []
+
 		# lifetime constraint
-		for sensorIndex in range(len(self.sensors)):
-			s = sum(1 for x in schedulingModel[sensorIndex] if x > 0)
-			logging.debug("Verify the lifetime constraint for sensor #{:d}:\t{:d} <= {:d}".format(sensorIndex, s, self.sensors[sensorIndex].lifetime))
-			assert s <= self.sensors[sensorIndex].lifetime, "Verification failed: lifetime constraint violated for sensor #{:d}".format(sensorIndex)
+		onTimes = schedulingModel.sum(axis = 1)
+		for sensorIndex in np.flatnonzero(onTimes > np.array([sensor.lifetime for sensor in self.sensors])):
+			violations.append("lifetime constraint violated for sensor #{:d}: {:d} > {:d}".format(sensorIndex, onTimes[sensorIndex], self.sensors[sensorIndex].lifetime))
 
-		# coverage constraint
-		for pointIndex in range(len(self.points)):
-			for time in range(lifetime):
-				s = sum(1 for sensorIndex in self.points[pointIndex].converingSensorIndices if schedulingModel[sensorIndex][time] > 0)
-				logging.debug("Verify the coverage constraint for point #{:d} and time {:d}:\t{:d} >= {:d}".format(pointIndex, time, s, self.limit_covering))
-				assert s >= self.limit_covering, "Verification failed: coverage constraint violated for point #{:d} and time {:d}".format(pointIndex, time)
+		# coverage constraint: covered[p, t] is the number of sensors covering point p at time t
+		covered = self.coverage.astype(int) @ schedulingModel.astype(int)
+		for (pointIndex, time) in np.argwhere(covered < self.limit_covering):
+			violations.append("coverage constraint violated for point #{:d} and time {:d}: {:d} < {:d}".format(pointIndex, time, covered[pointIndex, time], self.limit_covering))
 
 		# evasive constraint
 		if self.limit_ON > 0:
-			for sensorIndex in range(len(self.sensors)):
-				for time in range(lifetime - self.limit_ON):
-					s = sum(1 for h in range(self.limit_ON + 1) if schedulingModel[sensorIndex][time + h] > 0)
-					logging.debug("Verify the evasive constraint for sensor {:d} and time {:d}:\t{:d} <= {:d}".format(sensorIndex, time, s, self.limit_ON))
-					assert s <= self.limit_ON, "Verification failed: evasive constraint violated for sensor {:d} and time {:d}".format(sensorIndex, time)
+			windowSums = self.GetWindowSums(schedulingModel.astype(int), self.limit_ON + 1)
+			for (sensorIndex, time) in np.argwhere(windowSums > self.limit_ON):
+				violations.append("evasive constraint violated for sensor #{:d} and time {:d}: {:d} > {:d}".format(sensorIndex, time, windowSums[sensorIndex, time], self.limit_ON))
 
 		# moving target constraint
 		if self.limit_crit_ON > 0:
-			for sensorIndex in range(len(self.sensors)):
-				if not self.__SensorCoversCriticalPoint(sensorIndex):
-					continue
+			windowSums = self.GetWindowSums(schedulingModel.astype(int), self.limit_crit_ON + 1)
+			for (sensorIndex, time) in np.argwhere((windowSums > self.limit_crit_ON) & self.criticalSensors[:, None]):
+				violations.append("moving target constraint violated for sensor #{:d} and time {:d}: {:d} > {:d}".format(sensorIndex, time, windowSums[sensorIndex, time], self.limit_crit_ON))
 
-				for time in range(lifetime - self.limit_crit_ON):
-					s = sum(1 for h in range(self.limit_crit_ON + 1) if schedulingModel[sensorIndex][time + h] > 0)
-					logging.debug("Verify the moving target constraint for sensor {:d} and time {:d}:\t{:d} <= {:d}".format(sensorIndex, time, s, self.limit_crit_ON))
-					assert s <= self.limit_crit_ON, "Verification failed: moving target constraint violated for sensor {:d} and time {:d}".format(sensorIndex, time)
+		self.ReportViolations(violations)
 
 	def DisplayScheduling(self, schedulingModel):
+		schedulingModel = self.GetSchedulingArray(schedulingModel)
+
 		for sensor in range(len(schedulingModel)):
 			print("Sensor #{:d}:\t".format(sensor), end = "")
 			for time in range(len(schedulingModel[sensor])):
-				print("{:d}\t".format(time + 1) if schedulingModel[sensor][time] > 0 else "\t", end = "")
+				print("{:d}\t".format(time + 1) if schedulingModel[sensor, time] else "\t", end = "")
 			print()
 
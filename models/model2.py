@@ -3,10 +3,14 @@
 from math import pow, sqrt, ceil
 import logging
 
+import numpy as np
+
 from solvers.card_enc_type import Relations
 from solvers.solver import Constraint
 
 from models.model import WsnModel
+from models.bounds import GetCoverageUpperBound
+from models.geometry import GetDistances
 
 class Sensor:
 	def __init__(self, x, y, power):
@@ -37,9 +41,10 @@ class Level:
 		return "(power = {:d}, range = {:d})".format(self.power, self.range)
 
 class WsnModel2(WsnModel):
-	def __init__(self, limit_covering, limit_ON, limit_crit_ON):
-		super().__init__(limit_covering, limit_ON, limit_crit_ON)
+	def __init__(self, limit_covering, limit_ON, limit_crit_ON, symmetry_breaking = False, order_encoding = False):
+		super().__init__(limit_covering, limit_ON, limit_crit_ON, symmetry_breaking)
 		self.levels = []
+		self.order_encoding = order_encoding #whether to encode the levels by "level >= i" vars
 
 	def ReadInputFile(self, json):
 		for s in json["sensors"]:
@@ -57,157 +62,309 @@ class WsnModel2(WsnModel):
 		if self.sensors is None or self.points is None or self.levels is None:
 			raise Exception("No sensors or target points or performance levels specified")
 
+		# distances[p, s]: distance of point p from sensor s, rounded up
+		self.distances = np.ceil(GetDistances(self.sensors, self.points)).astype(int)
+		# minLevels[p, s]: index of the lowest level at which sensor s covers point p (the number of levels if none)
+		self.minLevels = np.full(self.distances.shape, len(self.levels))
+		for levelIndex in reversed(range(len(self.levels))):
+			self.minLevels[self.levels[levelIndex].range >= self.distances] = levelIndex
+
+		fullPowers = [sensor.fullPower for sensor in self.sensors]
+		self.features = self.GetFeatures(self.minLevels < len(self.levels))
+		self.features.update(version = 2, levels = len(self.levels),
+			levelSpread = self.levels[-1].power / max(self.levels[0].power, 1) if self.levels else 1.0,
+			sensorSpread = max(fullPowers) / max(min(fullPowers), 1) if fullPowers else 1.0)
+
 	def GetUpperBound(self):
-		return ceil(sum(ceil(s.fullPower / self.levels[0].power) for s in self.sensors) / self.limit_covering)
+		powers = np.array([level.power for level in self.levels])
+		fullPowers = np.array([sensor.fullPower for sensor in self.sensors])
+		maxTimesCovered = []
+		maxConsecutive = []
+		for pointIndex in range(len(self.points)):
+			# the potential coverers of a point, and the power of the lowest level they can cover it at
+			coverers = np.flatnonzero(self.minLevels[pointIndex] < len(self.levels))
+			maxTimesCovered.append(fullPowers[coverers] // powers[self.minLevels[pointIndex, coverers]])
+			# the moving target constraint applies to the first points, as many as the critical points (see EncodeWsnConstraints)
+			maxConsecutive.append([self.GetMaxConsecutive(pointIndex < len(self.critical_points))] * len(coverers))
+
+		return GetCoverageUpperBound(
+			maxTimesCovered = maxTimesCovered,
+			maxConsecutive = maxConsecutive,
+			limit_covering = self.limit_covering,
+			upperbound = ceil(sum(ceil(s.fullPower / self.levels[0].power) for s in self.sensors) / self.limit_covering)
+		)
+
+	def GetSchedulingArray(self, schedulingModel):
+		# an empty scheduling loses its levels dimension
+		return super().GetSchedulingArray(schedulingModel).reshape(len(self.sensors), -1, len(self.levels))
+
+	def __GetSchedulingLevels(self, schedulingModel):
+		"""Returns the index of the level of each sensor in each time interval (-1 if the sensor is off), as a NumPy array"""
+
+		schedulingModel = self.GetSchedulingArray(schedulingModel)
+		return np.where(schedulingModel.any(axis = 2), schedulingModel.argmax(axis = 2), -1)
 
 	def GetResource(self, schedulingModel):
-		s = 0
-		for sensorIndex in range(len(schedulingModel)):
-			for time in range(len(schedulingModel[sensorIndex])):
-				try:
-					s += next(self.levels[i].power for i in range(len(schedulingModel[sensorIndex][time])) if schedulingModel[sensorIndex][time][i] > 0)
-				except:
-					pass
-					
-		return sum(s.fullPower for s in self.sensors) - s
-
-	def EncodeWsnConstraints(self, lifetime, solver):
-		# generate and constraint scheduling vars (at most 1 scheduling var per sensor and time interval may be true)
+		levels = self.__GetSchedulingLevels(schedulingModel)
+		powers = np.array([level.power for level in self.levels])
+
+		return sum(s.fullPower for s in self.sensors) - int(powers[levels[levels >= 0]].sum())
+
+	def GetCoverageLevels(self):
+		return (self.minLevels, len(self.levels))
+
+	def GetCriticalPointIndices(self):
+		# the moving target constraint applies to the first points, as many as the critical points (see EncodeWsnConstraints)
+		return list(range(len(self.critical_points)))
+
+	def GetEncodingKey(self):
+		return super().GetEncodingKey() + (self.order_encoding,)
+
+	def __EncodeLevelsInOrder(self, lifetime, solver):
+		"""Encode the levels of the sensors by "level >= i" vars, and define the scheduling vars by them
+
+		Returns: pair of the scheduling vars and the "level >= i" vars
+		"""
+
+		if any(self.levels[i].range < self.levels[i - 1].range for i in range(1, len(self.levels))):
+			raise Exception("The order encoding requires the range to increase with the power of the levels")
+
 		schedulingVars = [[solver.generateVars(len(self.levels)) for _ in range(lifetime)] for _ in self.sensors]
+		orderVars = [[solver.generateVars(len(self.levels)) for _ in range(lifetime)] for _ in self.sensors]
 
+		clauses = []
 		for sensorIndex in range(len(self.sensors)):
 			for time in range(lifetime):
-				solver.addConstraint(Constraint(
-					lits = schedulingVars[sensorIndex][time],
-					relation = Relations.LessOrEqual,
-					bound = 1
-				))
-		# there exists a pure Boolean encoding, as well
+				vars = orderVars[sensorIndex][time]
+				for levelIndex in range(len(self.levels)):
+					# level = i iff level >= i and not level >= i+1
+					schedulingVar = schedulingVars[sensorIndex][time][levelIndex]
+					clauses.append([-schedulingVar, vars[levelIndex]])
+					if levelIndex + 1 < len(self.levels):
+						# level >= i+1 implies level >= i
+						clauses.append([-vars[levelIndex + 1], vars[levelIndex]])
+						clauses.append([-schedulingVar, -vars[levelIndex + 1]])
+						clauses.append([schedulingVar, -vars[levelIndex], vars[levelIndex + 1]])
+					else:
+						clauses.append([schedulingVar, -vars[levelIndex]])
+		solver.addClauses(clauses)
+
+		return (schedulingVars, orderVars)
+
+	def EncodeWsnConstraints(self, lifetime, solver, activationVars = None):
+		if self.order_encoding:
+			(schedulingVars, orderVars) = self.__EncodeLevelsInOrder(lifetime, solver)
+		else:
+			# generate and constraint scheduling vars (at most 1 scheduling var per sensor and time interval may be true)
+			schedulingVars = [[solver.generateVars(len(self.levels)) for _ in range(lifetime)] for _ in self.sensors]
+			orderVars = None
+
+			solver.addConstraints([Constraint(
+				lits = schedulingVars[sensorIndex][time],
+				relation = Relations.LessOrEqual,
+				bound = 1
+			) for sensorIndex in range(len(self.sensors)) for time in range(lifetime)])
+			# there exists a pure Boolean encoding, as well
 
 		# lifetime constraint
+		# (in the order encoding, "level >= i" consumes the power increment of level i over level i-1)
+		powerIncrements = [self.levels[i].power - (self.levels[i - 1].power if i > 0 else 0) for i in range(len(self.levels))]
+		constraints = []
 		for sensorIndex in range(len(self.sensors)):
 			lits = []
 			weights = []
 			for time in range(lifetime):
-				lits.extend(schedulingVars[sensorIndex][time])
-				weights.extend([level.power for level in self.levels])
-			solver.addConstraint(Constraint(
+				if orderVars is not None:
+					lits.extend(orderVars[sensorIndex][time][i] for i in range(len(self.levels)) if powerIncrements[i] > 0)
+					weights.extend(powerIncrement for powerIncrement in powerIncrements if powerIncrement > 0)
+				else:
+					lits.extend(schedulingVars[sensorIndex][time])
+					weights.extend([level.power for level in self.levels])
+			constraints.append(Constraint(
 				lits = lits,
 				weights = weights,
 				relation = Relations.LessOrEqual,
 				bound = self.sensors[sensorIndex].fullPower
 			))
+		solver.addConstraints(constraints)
 
-		# coverage and define vars
-		coverageVars = [[solver.generateVars(lifetime) for _ in self.points] for _ in self.sensors]
+		# coverage and define vars, only for the sensors that can reach the points
+		# (a coverage var is equivalent with the disjunction of the vars of the sufficient levels, as at most 1 of them may be true)
+		coverageVars = [[None for _ in self.points] for _ in self.sensors]
+		clauses = []
 		for sensorIndex in range(len(self.sensors)):
 			for pointIndex in range(len(self.points)):
-				distance = ceil(self.points[pointIndex].DistanceFrom(self.sensors[sensorIndex]))
+				levelIndices = [levelIndex for levelIndex in range(len(self.levels)) if self.levels[levelIndex].range >= self.distances[pointIndex, sensorIndex]]
+				if not levelIndices:
+					continue
+
+				if orderVars is not None:
+					# the point is covered iff the level is at least the lowest sufficient one
+					coverageVars[sensorIndex][pointIndex] = [orderVars[sensorIndex][time][levelIndices[0]] for time in range(lifetime)]
+					continue
+
+				coverageVars[sensorIndex][pointIndex] = solver.generateVars(lifetime)
 				for time in range(lifetime):
-					solver.addConstraint(Constraint(
-						lits = schedulingVars[sensorIndex][time],
-						weights = [level.range for level in self.levels],
-						relation = Relations.GreaterOrEqual,
-						bound = distance,
-						boolLit = coverageVars[sensorIndex][pointIndex][time]
-					))
+					coverageVar = coverageVars[sensorIndex][pointIndex][time]
+					clauses.append([-coverageVar] + [schedulingVars[sensorIndex][time][levelIndex] for levelIndex in levelIndices])
+					for levelIndex in levelIndices:
+						clauses.append([-schedulingVars[sensorIndex][time][levelIndex], coverageVar])
+		solver.addClauses(clauses)
 
 		# coverage constraint
+		constraints = []
 		for pointIndex in range(len(self.points)):
+			coveringSensorIndices = [sensorIndex for sensorIndex in range(len(self.sensors)) if coverageVars[sensorIndex][pointIndex] is not None]
 			for time in range(lifetime):
-				solver.addConstraint(Constraint(
-					lits = [coverageVars[sensorIndex][pointIndex][time] for sensorIndex in range(len(self.sensors))],
+				constraints.append(Constraint(
+					lits = [coverageVars[sensorIndex][pointIndex][time] for sensorIndex in coveringSensorIndices],
 					relation = Relations.GreaterOrEqual,
-					bound = self.limit_covering
+					bound = self.limit_covering,
+					condLit = activationVars[time] if activationVars else None
 				))
+		solver.addConstraints(constraints)
 
 		# evasive constraint
 		if self.limit_ON > 0:
 			for sensorIndex in range(len(self.sensors)):
-				for time in range(lifetime - self.limit_ON):
-					lits = []
-					for h in range(self.limit_ON + 1):
-						lits.extend(schedulingVars[sensorIndex][time + h])
-					solver.addConstraint(Constraint(
-						lits = lits,
-						relation = Relations.LessOrEqual,
-						bound = self.limit_ON
-					))
+				if orderVars is not None:
+					slots = [[orderVars[sensorIndex][time][0]] for time in range(lifetime)]
+				else:
+					slots = schedulingVars[sensorIndex]
+				solver.addWindowConstraints(slots, window = self.limit_ON + 1, bound = self.limit_ON)
 		# there exists a pure Boolean encoding, as well
 
 		# moving target constraint
 		if self.limit_crit_ON > 0:
+			clauses = []
 			for sensorIndex in range(len(self.sensors)):
 				for pointIndex in range(len(self.critical_points)):
+					if coverageVars[sensorIndex][pointIndex] is None:
+						continue
+
 					for time in range(lifetime - self.limit_crit_ON):
 						# solver.addConstraint(Constraint(
 						# 	lits = [coverageVars[sensorIndex][pointIndex][time + h] for h in range(self.limit_crit_ON + 1)],
 						# 	relation = Relations.LessOrEqual,
 						# 	bound = self.limit_crit_ON
 						# ))
-						solver.addClause([-coverageVars[sensorIndex][pointIndex][time + h] for h in range(self.limit_crit_ON + 1)])
+						clauses.append([-coverageVars[sensorIndex][pointIndex][time + h] for h in range(self.limit_crit_ON + 1)])
+			solver.addClauses(clauses)
+
+		# symmetry breaking: sensors with the same power and distances from the points are interchangeable
+		if self.symmetry_breaking:
+			self.EncodeSymmetryBreaking(solver,
+				sensorVars = schedulingVars,
+				sensorKeys = [(sensor.fullPower, self.distances[:, sensorIndex].tobytes()) for (sensorIndex, sensor) in enumerate(self.sensors)],
+				interchangeableTimes = self.limit_ON == 0 and self.limit_crit_ON == 0 and activationVars is None)
 
 		return schedulingVars
 
+	def ScheduleGreedily(self):
+		powers = np.array([level.power for level in self.levels])
+		# covers[s, l, p]: whether sensor s covers point p at level l
+		covers = self.minLevels.T[:, None, :] <= np.arange(len(self.levels))[None, :, None]
+		# the moving target constraint applies to the first points, as many as the critical points (see EncodeWsnConstraints)
+		cntCriticalPoints = len(self.critical_points) if self.limit_crit_ON > 0 else 0
+
+		# sensors may be switched on as long as they have remaining power and have not been on (or covered a critical point) for too long
+		remaining = np.array([sensor.fullPower for sensor in self.sensors])
+		onFor = np.zeros(len(self.sensors), dtype = int)
+		coveredFor = np.zeros((len(self.sensors), cntCriticalPoints), dtype = int)
+
+		timeSchedules = []
+		while True:
+			available = (powers[None, :] <= remaining[:, None])
+			if self.limit_ON > 0:
+				available &= (onFor < self.limit_ON)[:, None]
+			if cntCriticalPoints > 0:
+				available &= ~(covers[:, :, :cntCriticalPoints] & (coveredFor >= self.limit_crit_ON)[:, None, :]).any(axis = 2)
+
+			levels = np.full(len(self.sensors), -1)
+			missing = np.full(len(self.points), self.limit_covering)
+
+			# select the sensor and level that cover the most points still missing coverers per power, then the sensor with the most remaining power
+			while (missing > 0).any():
+				gains = covers[:, :, missing > 0].sum(axis = 2) * (available & (levels < 0)[:, None])
+				ratios = gains / powers[None, :]
+				(sensorIndices, levelIndices) = np.nonzero(gains)
+				if len(sensorIndices) == 0:
+					break
+				best = np.lexsort((remaining[sensorIndices], ratios[sensorIndices, levelIndices]))[-1]
+				(sensorIndex, levelIndex) = (sensorIndices[best], levelIndices[best])
+				levels[sensorIndex] = levelIndex
+				missing -= covers[sensorIndex, levelIndex]
+
+			if (missing > 0).any() or (levels < 0).all():
+				break
+
+			# drop the redundant sensors, the ones with the least remaining power first
+			for sensorIndex in sorted(np.flatnonzero(levels >= 0), key = lambda sensorIndex: remaining[sensorIndex]):
+				coverers = sum(covers[s, levels[s]] for s in np.flatnonzero(levels >= 0) if s != sensorIndex)
+				if (coverers >= self.limit_covering).all():
+					levels[sensorIndex] = -1
+
+			timeSchedules.append(levels)
+			on = levels >= 0
+			remaining -= np.where(on, powers[levels], 0)
+			onFor = np.where(on, onFor + 1, 0)
+			covering = covers[np.arange(len(self.sensors)), levels, :cntCriticalPoints] & on[:, None]
+			coveredFor = np.where(covering, coveredFor + 1, 0)
+
+		lifetime = len(timeSchedules)
+		levels = np.array(timeSchedules, dtype = int).reshape(lifetime, len(self.sensors)).T
+		schedulingModel = levels[:, :, None] == np.arange(len(self.levels))[None, None, :]
+		self.VerifyScheduling(schedulingModel = schedulingModel, lifetime = lifetime)
+
+		return (lifetime, schedulingModel)
+
 	def VerifyScheduling(self, schedulingModel, lifetime):
+		schedulingModel = self.GetSchedulingArray(schedulingModel)[:, :lifetime].astype(int)
+		powers = np.array([level.power for level in self.levels])
+		ranges = np.array([level.range for level in self.levels])
+		# coversAt[p, s, l]: whether sensor s covers point p at level l
+		coversAt = ranges[None, None, :] >= self.distances[:, :, None]
+		violations = []
+
+		# at most 1 level per sensor and time interval
+		numLevelsOn = schedulingModel.sum(axis = 2)
+		for (sensorIndex, time) in np.argwhere(numLevelsOn > 1):
+			violations.append("level constraint violated for sensor #{:d} and time {:d}: {:d} levels".format(sensorIndex, time, numLevelsOn[sensorIndex, time]))
+
 		# lifetime constraint
-		for sensorIndex in range(len(self.sensors)):
-			s = 0
-			for time in range(lifetime):
-				try:
-					s += next(self.levels[i].power for i in range(len(schedulingModel[sensorIndex][time])) if schedulingModel[sensorIndex][time][i] > 0)
-				except:
-					pass
-			logging.debug("Verify the lifetime constraint for sensor #{:d}:\t{:d} <= {:d}".format(sensorIndex, s, self.sensors[sensorIndex].fullPower))
-			assert s <= self.sensors[sensorIndex].fullPower, "Verification failed: lifetime constraint violated for sensor #{:d}".format(sensorIndex)
+		consumed = (schedulingModel @ powers).sum(axis = 1)
+		for sensorIndex in np.flatnonzero(consumed > np.array([sensor.fullPower for sensor in self.sensors])):
+			violations.append("lifetime constraint violated for sensor #{:d}: {:d} > {:d}".format(sensorIndex, consumed[sensorIndex], self.sensors[sensorIndex].fullPower))
 
-		# coverage constraint
-		for pointIndex in range(len(self.points)):
-			for time in range(lifetime):
-				s = 0
-				for sensorIndex in range(len(self.sensors)):
-					try:
-						r = next(self.levels[i].range for i in range(len(schedulingModel[sensorIndex][time])) if schedulingModel[sensorIndex][time][i] > 0)
-						if r >= self.points[pointIndex].DistanceFrom(self.sensors[sensorIndex]):
-							s += 1
-					except:
-						pass
-
-				logging.debug("Verify the coverage constraint for point #{:d} and time {:d}:\t{:d} >= {:d}".format(pointIndex, time, s, self.limit_covering))
-				assert s >= self.limit_covering, "Verification failed: coverage constraint violated for point #{:d} and time {:d}".format(pointIndex, time)
+		# coverage constraint: covered[p, t] is the number of sensors covering point p at time t
+		(numSensors, numTimes, numLevels) = schedulingModel.shape
+		covered = coversAt.reshape(len(self.points), numSensors * numLevels).astype(int) @ schedulingModel.transpose(0, 2, 1).reshape(numSensors * numLevels, numTimes)
+		for (pointIndex, time) in np.argwhere(covered < self.limit_covering):
+			violations.append("coverage constraint violated for point #{:d} and time {:d}: {:d} < {:d}".format(pointIndex, time, covered[pointIndex, time], self.limit_covering))
 
 		# evasive constraint
 		if self.limit_ON > 0:
-			for sensorIndex in range(len(self.sensors)):
-				for time in range(lifetime - self.limit_ON):
-					s = sum(1 for h in range(self.limit_ON + 1) for i in range(len(schedulingModel[sensorIndex][time])) if schedulingModel[sensorIndex][time + h][i] > 0)
-					logging.debug("Verify the evasive constraint for sensor {:d} and time {:d}:\t{:d} <= {:d}".format(sensorIndex, time, s, self.limit_ON))
-					assert s <= self.limit_ON, "Verification failed: evasive constraint violated for sensor {:d} and time {:d}".format(sensorIndex, time)
+			windowSums = self.GetWindowSums(numLevelsOn, self.limit_ON + 1)
+			for (sensorIndex, time) in np.argwhere(windowSums > self.limit_ON):
+				violations.append("evasive constraint violated for sensor #{:d} and time {:d}: {:d} > {:d}".format(sensorIndex, time, windowSums[sensorIndex, time], self.limit_ON))
 
 		# moving target constraint
+		# (it applies to the first points, as many as the critical points, see EncodeWsnConstraints)
 		if self.limit_crit_ON > 0:
-			for sensorIndex in range(len(self.sensors)):
-				for pointIndex in range(len(self.critical_points)):
-					for time in range(lifetime - self.limit_crit_ON):
-						s = 0
-						for h in range(self.limit_crit_ON + 1):
-							try:
-								r = next(self.levels[i].range for i in range(len(schedulingModel[sensorIndex][time + h])) if schedulingModel[sensorIndex][time + h][i] > 0)
-								if r >= self.points[pointIndex].DistanceFrom(self.sensors[sensorIndex]):
-									s += 1
-							except:
-								pass
-
-						logging.debug("Verify the moving target constraint for sensor {:d} and time {:d}:\t{:d} <= {:d}".format(sensorIndex, time, s, self.limit_crit_ON))
-						assert s <= self.limit_crit_ON, "Verification failed: moving target constraint violated for sensor {:d} and time {:d}".format(sensorIndex, time)
+			# covering[s, p, t]: whether sensor s covers critical point p at time t
+			covering = np.einsum("psl,stl->spt", coversAt[:len(self.critical_points)].astype(int), schedulingModel)
+			windowSums = self.GetWindowSums(covering, self.limit_crit_ON + 1)
+			for (sensorIndex, pointIndex, time) in np.argwhere(windowSums > self.limit_crit_ON):
+				violations.append("moving target constraint violated for sensor #{:d}, point #{:d} and time {:d}: {:d} > {:d}".format(sensorIndex, pointIndex, time, windowSums[sensorIndex, pointIndex, time], self.limit_crit_ON))
+
+		self.ReportViolations(violations)
 
 	def DisplayScheduling(self, schedulingModel):
-		for sensor in range(len(schedulingModel)):
+		levels = self.__GetSchedulingLevels(schedulingModel)
+
+		for sensor in range(len(levels)):
 			print("Sensor #{:d}:\t".format(sensor), end = "")
-			for time in range(len(schedulingModel[sensor])):
-				try:
-					print("{:d}@{:d}\t".format(time, next(i + 1 for i in range(len(schedulingModel[sensor][time])) if schedulingModel[sensor][time][i] > 0)), end = "")
-				except StopIteration:
-					print("\t", end = "")
+			for time in range(len(levels[sensor])):
+				print("{:d}@{:d}\t".format(time, levels[sensor, time] + 1) if levels[sensor, time] >= 0 else "\t", end = "")
 			print()
 
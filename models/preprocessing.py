@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+import numpy as np
+
+class InstanceReduction(object):
+	def __init__(self, wsnModel, jsonData):
+		"""Reduce an instance by removing the target points whose coverage constraint is implied by the one of another point, and then the sensors that cover no remaining point
+
+		The coverage constraint of a point p is implied by the one of a point q if every sensor that covers q at some level covers p at that level, as well.
+		Of identical points, the first one is kept. The points the moving target constraint applies to are always kept.
+		A scheduling of the reduced instance remains a scheduling of the original instance once the removed sensors are switched off.
+
+		Parameters:
+
+		wsnModel -- WSN model of the original instance
+
+		jsonData -- content of the input file of the original instance
+		"""
+
+		self.wsnModel = wsnModel
+
+		(levels, numLevels) = wsnModel.GetCoverageLevels()
+		(numPoints, numSensors) = levels.shape
+
+		protected = np.zeros(numPoints, dtype = bool)
+		if wsnModel.limit_crit_ON > 0:
+			protected[[pointIndex for (pointIndex, p) in enumerate(jsonData["points"]) if p["critical"]]] = True
+			protected[wsnModel.GetCriticalPointIndices()] = True
+
+		# a dominating point covers no more than the dominated one, so the points are visited by decreasing levels, the protected ones first among equals
+		keptPoints = []
+		for pointIndex in np.lexsort((np.arange(numPoints), ~protected, -levels.sum(axis = 1))):
+			if not protected[pointIndex] and keptPoints and (levels[keptPoints] >= levels[pointIndex]).all(axis = 1).any():
+				continue
+			keptPoints.append(pointIndex)
+
+		self.pointIndices = sorted(keptPoints)
+		self.sensorIndices = np.flatnonzero((levels[self.pointIndices] < numLevels).any(axis = 0)).tolist()
+		self.isTriviallyUnsat = bool(((levels < numLevels).sum(axis = 1) < wsnModel.limit_covering).any())
+
+		self.jsonData = dict(jsonData)
+		self.jsonData["points"] = [jsonData["points"][pointIndex] for pointIndex in self.pointIndices]
+		self.jsonData["sensors"] = [jsonData["sensors"][sensorIndex] for sensorIndex in self.sensorIndices]
+
+		logging.info("Preprocessing: {:d} of {:d} target points and {:d} of {:d} sensors kept{}".format(
+			len(self.pointIndices), numPoints, len(self.sensorIndices), numSensors,
+			", trivially UNSAT" if self.isTriviallyUnsat else ""))
+
+	def RestoreScheduling(self, schedulingModel, lifetime):
+		"""Map a scheduling of the reduced instance to the sensors of the original instance, the removed sensors being off
+
+		Parameters:
+
+		schedulingModel -- scheduling of the sensors of the reduced instance, as a boolean array (see WsnModel.GetSchedulingArray)
+
+		lifetime -- lifetime of the scheduling
+
+		Returns: scheduling of the sensors of the original instance, as a boolean array
+		"""
+
+		schedulingModel = np.asarray(schedulingModel) > 0
+		restored = np.zeros((len(self.wsnModel.sensors), lifetime) + schedulingModel.shape[2:], dtype = bool)
+		restored[self.sensorIndices] = schedulingModel
+
+		return restored
@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+from collections import Counter
 from enum import Enum
 import glob
 import os
 import json
+import shlex
 from time import time
+from threading import Timer
+import signal
 from sys import stdout, exit
 from math import pow, sqrt, ceil
 import numpy
@@ -15,8 +19,12 @@ logging.captureWarnings(True)
 
 from models.model1 import WsnModel1
 from models.model2 import WsnModel2
+from models.cache import CachedWsnModel
+from models.cover_sets import CoverSetEngine
+from models.preprocessing import InstanceReduction
 
-from solvers.card_enc_type import CardEncType, Relations, RelationOps
+from solvers.card_enc_type import CardEncType, PBEncType, Relations, RelationOps
+from solvers.dump import DumpCompressions, DumpFormats
 from solvers.solver import SolverResult
 from solvers.solver_sat import SatSolver, SatSolvers
 from solvers.solver_smt import SmtSolver, SmtSolvers
@@ -24,23 +32,45 @@ from solvers.solver_smt import SmtSolver, SmtSolvers
 from solvers.solver_or import OrSolver, OrSolvers
 from solvers.solver_cp import CpSat, CpSolvers
 from solvers.solver_gurobi import GurobiSolver, GurobiSolvers
+from solvers.solver_incremental import IncrementalSolver
+from solvers.portfolio import Portfolio, PortfolioMember, CreateSolver
+from solvers.tracing import CreateProbeEvent, GetProbeStatus, TraceFormats, Tracer
+from solvers.selection import SolverSelector
 
 
 class SearchAlgorithms(Enum):
     Linear = 'linear'
     RegressionLinear = 'reglinear'
     Binary = 'binary'
+    Kary = 'kary'
+    Maximize = 'maximize'
 
 
-def Optimize(wsnModel):
+def LogResultProvider(result):
+    """Log the solver that provided the result of a probe, and count the probes won by each solver"""
+
+    logging.info("Result provided by: {}".format(result.solverType))
+    resultProviders[result.solverType.value] += 1
+
+
+def Optimize(wsnModel, lowerbound, upperbound):
+    """Search for the optimal lifetime between a satisfiable lifetime and an upper bound"""
+
+    if lowerbound >= upperbound:
+        return lowerbound
+
     # try:
     if search_algorithm == SearchAlgorithms.Binary:
-        return SearchOptimumBinary(wsnModel, lowerbound=1, upperbound=wsnModel.GetUpperBound(), solvedMap={})
+        return SearchOptimumBinary(wsnModel, lowerbound=lowerbound, upperbound=upperbound, solvedMap={})
     # return SearchOptimumBinary(wsnModel, lowerbound = 1, upperbound = None, solvedMap = {})
+    elif search_algorithm == SearchAlgorithms.Kary:
+        return SearchOptimumKary(wsnModel, lowerbound=lowerbound, upperbound=upperbound)
+    elif search_algorithm == SearchAlgorithms.Maximize:
+        return SearchOptimumMaximize(wsnModel, upperbound=upperbound)
     elif search_algorithm == SearchAlgorithms.Linear:
-        return SearchOptimumLinear(wsnModel, lowerbound=1)
+        return SearchOptimumLinear(wsnModel, lowerbound=lowerbound)
     else:
-        return SearchOptimumRegLinear(wsnModel, lowerbound=1, upperbound=wsnModel.GetUpperBound())
+        return SearchOptimumRegLinear(wsnModel, lowerbound=lowerbound, upperbound=upperbound)
 
 
 # except:
@@ -91,6 +121,82 @@ def SearchOptimumBinary(wsnModel, lowerbound, upperbound, solvedMap):
         return upperbound
 
 
+def SearchOptimumKary(wsnModel, lowerbound, upperbound):
+    """Probe several lifetimes between the bounds concurrently, one per lane of the portfolio
+
+    Probes that become irrelevant as the bounds move are cancelled, and their lanes are reused right away.
+    """
+
+    portfolio = GetPortfolio(wsnModel)
+    solvedMap = {}
+    running = {}
+
+    maximumSAT = lowerbound
+    minimumUNSAT = upperbound + 1
+
+    while minimumUNSAT - maximumSAT > 1:
+        # cancel the probes outside of the bounds
+        for probeId, lifetime in list(running.items()):
+            if lifetime <= maximumSAT or lifetime >= minimumUNSAT:
+                portfolio.cancel(probeId)
+                del running[probeId]
+
+        # split the remaining interval evenly among the running and new probes
+        cntParts = len(running) + portfolio.getFreeLanes() + 1
+        candidates = sorted(set(maximumSAT + int((minimumUNSAT - maximumSAT) * j / cntParts) for j in range(1, cntParts)),
+                            key=lambda i: abs(2 * i - maximumSAT - minimumUNSAT))
+        for i in candidates:
+            if portfolio.getFreeLanes() == 0:
+                break
+            if maximumSAT < i < minimumUNSAT and i not in running.values():
+                logging.info("T = {:d}".format(i))
+                running[portfolio.submit(i)] = i
+
+        to = startTime + timeout - time() if timeout else None
+        (probeId, result) = portfolio.wait(timeout=to)
+        if probeId is None:
+            print("TIMEOUT")
+            for probeId in running:
+                portfolio.cancel(probeId)
+            return None
+        if result is None:
+            return None
+
+        i = running.pop(probeId)
+        solvedMap[i] = result.isSAT
+        LogResultProvider(result)
+        logging.info("elapsed time = {:f}".format(time() - startTime))
+        logging.info(sorted(solvedMap.items()))
+        stdout.flush()
+
+        if result.isSAT:
+            maximumSAT = max(maximumSAT, i)
+        else:
+            minimumUNSAT = min(minimumUNSAT, i)
+
+    for probeId in running:
+        portfolio.cancel(probeId)
+
+    return maximumSAT
+
+
+def SearchOptimumMaximize(wsnModel, upperbound):
+    """Encode all the lifetimes up to the upper bound once, and let the solvers maximize the number of served time intervals"""
+
+    portfolio = GetPortfolio(wsnModel)
+
+    to = startTime + timeout - time() if timeout else None
+    result = portfolio.solve(upperbound, timeout=to, maximize=True)
+    if result is None:
+        print("TIMEOUT")
+        return None
+
+    LogResultProvider(result)
+    logging.info("elapsed time = {:f}".format(time() - startTime))
+
+    return result.lifetime
+
+
 def SearchOptimumLinear(wsnModel, lowerbound):
     solvedMap = {}
 
@@ -188,75 +294,127 @@ def SearchOptimumRegLinear(wsnModel, lowerbound, upperbound, RegressionDegree=10
         stdout.flush()
 
 
-def runSolver(args):
-    (solverType, wsnModel, cardinalityEnc, lifetime, getModel) = args
+incrementalSolver = None
+# time to encode the incremental solver, traced with its first probe
+incrementalEncodeTime = None
+
+
+def EncodeIncremental(wsnModel, solverType):
+    """Create the incremental solver, within the time limit
+
+    Returns: False iff the time limit expired during encoding
+    """
+
+    global incrementalSolver, incrementalEncodeTime
+
+    def onTimeout(signum, frame):
+        raise TimeoutError()
+
+    to = startTime + timeout - time() if timeout else None
+    if to is not None:
+        if to <= 0:
+            return False
+        signal.signal(signal.SIGALRM, onTimeout)
+        signal.setitimer(signal.ITIMER_REAL, to)
+
+    try:
+        encodeStartTime = time()
+        solver = CreateSolver(PortfolioMember(solverType, cardinalityEnc=cardEnc, pbEnc=pbEnc))
+        logging.info("{} starts encoding WSN...".format(solverType))
+        incrementalSolver = IncrementalSolver(wsnModel, solver, upperbound=wsnModel.GetUpperBound())
+        incrementalEncodeTime = time() - encodeStartTime
+    except TimeoutError:
+        return False
+    finally:
+        if to is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    return True
+
 
-    if solverType in SatSolvers:
-        solver = SatSolver(satSolverType=solverType, cardinalityEnc=cardinalityEnc, dumpFileName=dump_file)
-    elif solverType in SmtSolvers:
-        solver = SmtSolver(smtSolverType=solverType, dumpFileName=dump_file)
-    # elif solverType in MipSolvers:
-    #     solver = MipSolver(mipSolverType=solverType)
-    elif solverType in OrSolvers:
-        solver = OrSolver(orSolverType=solverType)
-    elif solverType in CpSolvers:
-        solver = CpSat()
-    elif solverType in GurobiSolvers:
-        solver = GurobiSolver()
+def DetermineSATOrUNSATIncremental(wsnModel, lifetime, getModel=False):
+    global incrementalSolver, incrementalEncodeTime
 
-    logging.info("{} starts encoding WSN...".format(solverType))
-    schedulingVars = wsnModel.EncodeWsnConstraints(lifetime=lifetime, solver=solver)
+    solverType = (satSolverType + smtSolverType)[0]
+    if incrementalSolver is None:
+        if not EncodeIncremental(wsnModel, solverType):
+            print("TIMEOUT")
+            return None
+
+    to = startTime + timeout - time() if timeout else None
+    timer = None
+    if to is not None:
+        timer = Timer(max(to, 0), incrementalSolver.interrupt)
+        timer.start()
 
     logging.info("{} starts solving...".format(solverType))
-    isSAT = solver.solve()
-    if isSAT == None:
-        return
+    solveStartTime = time()
+    isSAT = incrementalSolver.solve(lifetime)
+    solveTime = time() - solveStartTime
 
-    result = SolverResult(solverType, isSAT)
-    if isSAT and getModel:
-        result.model = solver.get_model(schedulingVars)
+    if timer:
+        timer.cancel()
+
+    if tracer is not None:
+        # the statistics of the incremental solver accumulate over the probes
+        tracer.addProbe(CreateProbeEvent(solverType, solveStartTime - (incrementalEncodeTime or 0), incrementalEncodeTime or 0, solveTime,
+                                         GetProbeStatus(isSAT), incrementalSolver.solver.get_statistics(),
+                                         lifetime=lifetime, winner=isSAT is not None))
+        incrementalEncodeTime = None
+
+    if isSAT is None:
+        print("TIMEOUT")
+        return None
 
-    del solver
+    result = SolverResult(solverType, isSAT)
+    LogResultProvider(result)
+    if result.isSAT:
+        logging.info("SAT")
+        if getModel:
+            result.model = incrementalSolver.get_model(lifetime)
+    else:
+        logging.info("UNSAT")
 
     return result
 
 
+portfolio = None
+
+
+def GetPortfolio(wsnModel):
+    global portfolio
+
+    if portfolio is None:
+        members = []
+        members.extend([PortfolioMember(solverType, cardinalityEnc=cardEnc, dumpFileName=dump_file, pbEnc=pbEnc, dumpCompression=dump_compression) for solverType in satSolverType])
+        members.extend([PortfolioMember(solverType, dumpFileName=dump_file, dumpCompression=dump_compression) for solverType in smtSolverType])
+        # members.extend([PortfolioMember(solverType) for solverType in mipSolverType])
+        members.extend([PortfolioMember(solverType, dumpFileName=dump_file, dumpFormat=dump_format, dumpCompression=dump_compression) for solverType in orSolverType])
+        members.extend([PortfolioMember(solverType) for solverType in cpSolverType])
+        members.extend([PortfolioMember(solverType, dumpFileName=dump_file, dumpFormat=dump_format, dumpCompression=dump_compression) for solverType in gurobiSolverType])
+        portfolio = Portfolio(wsnModel, members, lanes=parallel_probes if search_algorithm == SearchAlgorithms.Kary else 1, tracer=tracer)
+
+    return portfolio
+
+
 def DetermineSATOrUNSAT(wsnModel, lifetime, getModel=False):
-    from pathos.multiprocessing import ProcessPool
-    from multiprocess.context import TimeoutError
+    if incremental:
+        return DetermineSATOrUNSATIncremental(wsnModel, lifetime, getModel)
+
+    portfolio = GetPortfolio(wsnModel)
 
     # wait for one of the solvers to finish
-    solverConfigs = []
-    if satSolverType:
-        solverConfigs.extend([(solverType, wsnModel, cardEnc, lifetime, getModel) for solverType in satSolverType])
-    if smtSolverType:
-        solverConfigs.extend([(solverType, wsnModel, None, lifetime, getModel) for solverType in smtSolverType])
-    # if mipSolverType:
-    #     solverConfigs.extend([(solverType, wsnModel, None, lifetime, getModel) for solverType in mipSolverType])
-    if orSolverType:
-        solverConfigs.extend([(solverType, wsnModel, None, lifetime, getModel) for solverType in orSolverType])
-    if cpSolverType:
-        solverConfigs.extend([(solverType, wsnModel, None, lifetime, getModel) for solverType in cpSolverType])
-    if gurobiSolverType:
-        solverConfigs.extend([(solverType, wsnModel, None, lifetime, getModel) for solverType in gurobiSolverType])
-
-    to = int(startTime + timeout - time()) if timeout else None
-    pool = ProcessPool(len(solverConfigs), timeout=to)
+    to = startTime + timeout - time() if timeout else None
+    result = portfolio.solve(lifetime, getModel=getModel, timeout=to)
 
-    result = None
-    try:
-        result = pool.uimap(runSolver, solverConfigs).next(timeout=to)
-    except TimeoutError:
+    if result is None:
         print("TIMEOUT")
     else:
-        logging.info("Result provided by: {}".format(result.solverType))
+        LogResultProvider(result)
         if result.isSAT:
             logging.info("SAT")
         else:
             logging.info("UNSAT")
-    finally:
-        pool.terminate()
-        pool.clear()
 
     return result
 
@@ -276,10 +434,28 @@ parser.add_argument("-e", "--evasive",
 parser.add_argument("-m", "--movingtarget",
                     action="store", type=int, dest="limit_crit_ON", default=0,
                     help="moving target constraint enabled to set a limit on how long a sensor can be active continuously near critical points")
+parser.add_argument("--symmetry-breaking",
+                    action="store_true", dest="symmetry_breaking", default=False,
+                    help="add constraints that break the symmetries of interchangeable sensors and time intervals")
+parser.add_argument("--preprocess",
+                    action="store_true", dest="preprocess", default=False,
+                    help="remove the target points whose coverage is implied by other points, and the sensors that cover no remaining point")
+parser.add_argument("--order-encoding",
+                    action="store_true", dest="order_encoding", default=False,
+                    help="encode the power levels of WSN model 2 by \"level >= i\" vars")
 parser.add_argument("-a", "--algorithm",
                     action="store", dest="search_algorithm", default="binary",
-                    choices=["linear", "reglinear", "binary"],
+                    choices=[a.value for a in list(SearchAlgorithms)],
                     help="which search algorithm to apply")
+parser.add_argument("-p", "--parallel-probes",
+                    action="store", type=int, dest="parallel_probes", default=2,
+                    help="number of lifetimes to probe concurrently by the k-ary search (default: 2)")
+parser.add_argument("--no-heuristic",
+                    action="store_false", dest="heuristic", default=True,
+                    help="do not start the search from the lifetime reached by a greedy scheduling")
+parser.add_argument("--cover-sets",
+                    action="store_true", dest="cover_sets", default=False,
+                    help="bound the lifetime by column generation over k-covers before the search (model 1 without -e and -m only)")
 parser.add_argument("--sat-solver",
                     action="store", nargs='+', dest="sat_solver", default=["none"], type=str.lower,
                     choices=[s.value for s in list(SatSolvers)] + ["none"],
@@ -302,10 +478,21 @@ parser.add_argument("--cp-solver",
 parser.add_argument("--gurobi-solver",
                     action="store_true", dest="gurobi_solver",
                     help="run Gurobi")
+parser.add_argument("--incremental",
+                    action="store_true", dest="incremental", default=False,
+                    help="encode the WSN once and reuse the same SAT or SMT solver for all the lifetimes (requires exactly one SAT solver or Z3)")
 parser.add_argument("--card-enc",
                     action="store", dest="card_enc", default="seqcounter", type=str.lower,
                     choices=[e.name for e in list(CardEncType)] + ["none"],
                     help="the name of the cardinality encoding (default: none)")
+parser.add_argument("--pb-enc",
+                    action="store", dest="pb_enc", default="none", type=str.lower,
+                    choices=[e.name for e in list(PBEncType)] + ["none"],
+                    help="the name of the pseudo-Boolean encoding of weighted constraints, requires pypblib (default: none)")
+parser.add_argument("--selector",
+                    action="store", dest="selector",
+                    help="select the solvers and their encodings by the features of the instance, by a selection trained by scripts/train_selector.py; "
+                         "they replace the ones given on the command line")
 parser.add_argument("--get-scheduling",
                     action="store_true", dest="bool_get_scheduling", default=False,
                     help="get the scheduling")
@@ -315,6 +502,24 @@ parser.add_argument("--verify-scheduling",
 parser.add_argument("--dump-file",
                     action="store", dest="dump_file",
                     help="dump the intermediate DIMACS/SMT-LIB/etc. file, if applicable")
+parser.add_argument("--dump-format",
+                    action="store", dest="dump_format", default="mps", type=str.lower,
+                    choices=[f.name for f in list(DumpFormats)],
+                    help="format of the models dumped by OR-Tools and Gurobi (default: mps)")
+parser.add_argument("--dump-compression",
+                    action="store", dest="dump_compression", default="none", type=str.lower,
+                    choices=[c.name for c in list(DumpCompressions)],
+                    help="compression of the dump file (default: none)")
+parser.add_argument("--encoding-cache",
+                    action="store", dest="encoding_cache",
+                    help="directory to store the encodings in, and to load them from instead of encoding again")
+parser.add_argument("--trace-file",
+                    action="store", dest="trace_file",
+                    help="write the encode and solve times, status and statistics of every probe of every solver to a file")
+parser.add_argument("--trace-format",
+                    action="store", dest="trace_format", default="jsonl", type=str.lower,
+                    choices=[f.name for f in list(TraceFormats)],
+                    help="format of the trace file: JSON lines, or Chrome trace events (default: jsonl)")
 parser.add_argument("--log",
                     action="store", dest="loglevel", default="ERROR", type=str.upper,
                     choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
@@ -337,34 +542,72 @@ bool_get_scheduling = args.bool_get_scheduling
 bool_verify_scheduling = args.bool_verify_scheduling
 
 search_algorithm = next(a for a in list(SearchAlgorithms) if a.value == args.search_algorithm)
+parallel_probes = args.parallel_probes
+if parallel_probes < 1:
+    parser.error("the number of parallel probes must be positive")
+
+
+def GetSolverTypes(args):
+    """Returns the types of the solvers of the portfolio and of the SAT encodings, given by the command-line arguments"""
 
-satSolverType = []
-for args_solver in args.sat_solver:
-    if args_solver != "none": satSolverType.append(next(s for s in list(SatSolvers) if s.value == args_solver))
+    satSolverType = []
+    for args_solver in args.sat_solver:
+        if args_solver != "none": satSolverType.append(next(s for s in list(SatSolvers) if s.value == args_solver))
 
-smtSolverType = []
-for args_solver in args.smt_solver:
-    if args_solver != "none": smtSolverType.append(next(s for s in list(SmtSolvers) if s.value == args_solver))
+    smtSolverType = []
+    for args_solver in args.smt_solver:
+        if args_solver != "none": smtSolverType.append(next(s for s in list(SmtSolvers) if s.value == args_solver))
 
-# mipSolverType = []
-# for args_solver in args.mip_solver:
-#     if args_solver != "none": mipSolverType.append(next(s for s in list(MipSolvers) if s.value == args_solver))
+    # mipSolverType = []
+    # for args_solver in args.mip_solver:
+    #     if args_solver != "none": mipSolverType.append(next(s for s in list(MipSolvers) if s.value == args_solver))
 
-orSolverType = []
-for args_solver in args.or_solver:
-    if args_solver != "none": orSolverType.append(next(s for s in list(OrSolvers) if s.value == args_solver))
+    orSolverType = []
+    for args_solver in args.or_solver:
+        if args_solver != "none": orSolverType.append(next(s for s in list(OrSolvers) if s.value == args_solver))
 
-cpSolverType = [CpSolvers.CPSat] if args.cp_solver else []
+    cpSolverType = [CpSolvers.CPSat] if args.cp_solver else []
 
-gurobiSolverType = [GurobiSolvers.GurobiSolver] if args.gurobi_solver else []
+    gurobiSolverType = [GurobiSolvers.GurobiSolver] if args.gurobi_solver else []
 
-cardEnc = next(e for e in list(CardEncType) if e.name == args.card_enc) if args.card_enc != "none" else None
+    cardEnc = next(e for e in list(CardEncType) if e.name == args.card_enc) if args.card_enc != "none" else None
+    pbEnc = next(e for e in list(PBEncType) if e.name == args.pb_enc) if args.pb_enc != "none" else None
+
+    return (satSolverType, smtSolverType, orSolverType, cpSolverType, gurobiSolverType, cardEnc, pbEnc)
+
+
+(satSolverType, smtSolverType, orSolverType, cpSolverType, gurobiSolverType, cardEnc, pbEnc) = GetSolverTypes(args)
 
 dump_file = args.dump_file
+dump_format = DumpFormats[args.dump_format]
+dump_compression = DumpCompressions[args.dump_compression]
 
 logging.basicConfig(stream=stdout, level=getattr(logging, args.loglevel))
 timeout = args.timeout
 
+incremental = args.incremental
+if incremental:
+    if len(satSolverType) + len(smtSolverType) != 1 or orSolverType or cpSolverType or gurobiSolverType:
+        parser.error("--incremental requires exactly one SAT or SMT solver and no other solvers")
+    if satSolverType == [SatSolvers.Lingeling] or smtSolverType and smtSolverType != [SmtSolvers.Z3]:
+        parser.error("--incremental does not support {}, since it cannot be interrupted".format((satSolverType + smtSolverType)[0].value))
+    if search_algorithm == SearchAlgorithms.Kary:
+        parser.error("--incremental does not support the k-ary search")
+    if dump_file:
+        parser.error("--incremental does not support --dump-file, since no single formula corresponds to the probed lifetimes")
+
+heuristic = args.heuristic
+cover_sets = args.cover_sets
+if cover_sets and (limit_ON > 0 or limit_crit_ON > 0):
+    parser.error("--cover-sets does not support the evasive and moving target constraints")
+
+if args.selector and (incremental or search_algorithm == SearchAlgorithms.Maximize):
+    parser.error("--selector does not support --incremental and the maximize algorithm, which restrict the solvers")
+
+if search_algorithm == SearchAlgorithms.Maximize:
+    if satSolverType or smtSolverType or orSolverType or not (cpSolverType or gurobiSolverType):
+        parser.error("the maximize algorithm requires CP-SAT and/or Gurobi and no other solvers")
+
 # endregion
 
 if not os.path.isfile(inputFile):
@@ -376,30 +619,134 @@ with open(inputFile) as file:
     jsonData = json.load(file)
 
 wsnModels = [WsnModel1, WsnModel2]
-wsnModel = wsnModels[jsonData["version"] - 1](limit_covering, limit_ON, limit_crit_ON)
-wsnModel.ReadInputFile(jsonData)
+if cover_sets and jsonData["version"] != 1:
+    parser.error("--cover-sets supports WSN model 1 only")
+if args.order_encoding and jsonData["version"] != 2:
+    parser.error("--order-encoding supports WSN model 2 only")
+
+
+def CreateWsnModel(jsonData):
+    wsnModel = wsnModels[jsonData["version"] - 1](limit_covering, limit_ON, limit_crit_ON, args.symmetry_breaking,
+                                                  **({"order_encoding": True} if args.order_encoding else {}))
+    wsnModel.ReadInputFile(jsonData)
+    return wsnModel
+
+
+wsnModel = originalWsnModel = CreateWsnModel(jsonData)
+print("FEATURES: {}".format(json.dumps(originalWsnModel.features, sort_keys=True)))
+
+if args.selector:
+    selection = SolverSelector(args.selector).select(originalWsnModel.features)
+    if selection is None:
+        logging.warning("No training instance of the selector is comparable, so the solvers given on the command line are kept")
+    else:
+        (config, arguments) = selection
+        print("SELECTED: {} ({})".format(config, arguments))
+        # only the solvers and their encodings are taken from the arguments of the selected configuration
+        (satSolverType, smtSolverType, orSolverType, cpSolverType, gurobiSolverType, cardEnc, pbEnc) = GetSolverTypes(
+            parser.parse_args([inputFile] + shlex.split(arguments)))
+
+if jsonData["version"] == 2 and not pbEnc and any(s != SatSolvers.Minicard for s in satSolverType):
+    parser.error("WSN model 2 requires --pb-enc for SAT solvers other than Minicard")
+
+reduction = None
+if args.preprocess:
+    reduction = InstanceReduction(wsnModel, jsonData)
+    print("PREPROCESSING: {:d} of {:d} target points and {:d} of {:d} sensors kept".format(
+        len(reduction.pointIndices), len(wsnModel.points), len(reduction.sensorIndices), len(wsnModel.sensors)))
+    jsonData = reduction.jsonData
+    wsnModel = CreateWsnModel(jsonData)
+if args.encoding_cache:
+    wsnModel = CachedWsnModel(wsnModel, jsonData, args.encoding_cache)
 
 startTime = time()
+# time spent in each phase (bounds, search, scheduling), and number of probes won by each solver
+phaseTimes = {}
+resultProviders = Counter()
+tracer = Tracer(args.trace_file, TraceFormats[args.trace_format]) if args.trace_file else None
+
+# satisfiable lifetime, along with its scheduling if known, and upper bound on the lifetime
+lowerbound = 0
+lowerboundScheduling = None
+upperbound = wsnModel.GetUpperBound()
+logging.info("Upper bound: T = {:d}".format(upperbound))
+
+if upperbound == 0:
+    # some point has not enough potential coverers
+    isSAT = False
+else:
+    if heuristic:
+        (lowerbound, lowerboundScheduling) = wsnModel.ScheduleGreedily()
+        logging.info("Greedy scheduling: T = {:d}".format(lowerbound))
+        logging.info("elapsed time = {:f}".format(time() - startTime))
 
-logging.info("T = 1")
-if DetermineSATOrUNSAT(wsnModel, lifetime=1).isSAT:
+    if lowerbound > 0:
+        isSAT = True
+    else:
+        logging.info("T = 1")
+        result = DetermineSATOrUNSAT(wsnModel, lifetime=1)
+        isSAT = result.isSAT if result is not None else None
+        (lowerbound, lowerboundScheduling) = (1, None)
+
+if isSAT is None:
+    logging.info("elapsed time = {:f}".format(time() - startTime))
+elif isSAT:
     print("SAT")
     logging.info("elapsed time = {:f}".format(time() - startTime))
+
+    if cover_sets:
+        print("Generating k-covers...")
+        to = startTime + timeout - time() if timeout else None
+        (coverLowerbound, coverUpperbound, coverScheduling) = CoverSetEngine(wsnModel).Solve(timeout=to)
+        upperbound = min(upperbound, coverUpperbound)
+        if coverLowerbound > lowerbound:
+            (lowerbound, lowerboundScheduling) = (coverLowerbound, coverScheduling)
+
+    print("BOUNDS: {:d} <= T <= {:d}".format(lowerbound, upperbound))
+    phaseTimes["bounds"] = time() - startTime
+
     print("Starting to search for the optimum...")
-    optimum = Optimize(wsnModel)
+    phaseStartTime = time()
+    optimum = Optimize(wsnModel, lowerbound, upperbound)
+    phaseTimes["search"] = time() - phaseStartTime
+    phaseStartTime = time()
+    result = None
     if optimum:
         print("OPTIMUM: {:d}".format(optimum))
         if bool_get_scheduling or bool_verify_scheduling:
-            result = DetermineSATOrUNSAT(wsnModel, lifetime=optimum, getModel=True)
-            if bool_get_scheduling:
-                wsnModel.DisplayScheduling(schedulingModel=result.model)
-            if bool_verify_scheduling:
-                wsnModel.VerifyScheduling(schedulingModel=result.model, lifetime=optimum)
-                print("Scheduling was successfully verified")
+            if optimum == lowerbound and lowerboundScheduling is not None:
+                result = SolverResult(None, True, model=lowerboundScheduling)
+            else:
+                result = DetermineSATOrUNSAT(wsnModel, lifetime=optimum, getModel=True)
+    elif lowerboundScheduling is not None:
+        # the best scheduling known serves as the fallback answer
+        optimum = lowerbound
+        print("BEST LIFETIME FOUND: {:d}".format(optimum))
+        result = SolverResult(None, True, model=lowerboundScheduling)
+
+    if result is not None:
+        # the scheduling refers to the sensors of the original instance
+        schedulingModel = reduction.RestoreScheduling(result.model, optimum) if reduction is not None else result.model
+        if bool_get_scheduling:
+            originalWsnModel.DisplayScheduling(schedulingModel=schedulingModel)
+        if bool_verify_scheduling:
+            originalWsnModel.VerifyScheduling(schedulingModel=schedulingModel, lifetime=optimum)
+            print("Scheduling was successfully verified")
+    if bool_get_scheduling or bool_verify_scheduling:
+        phaseTimes["scheduling"] = time() - phaseStartTime
 else:
     print("UNSAT")
     logging.info("elapsed time = {:f}".format(time() - startTime))
 
+for (phase, phaseTime) in phaseTimes.items():
+    print("{} TIME = {:f}".format(phase.upper(), phaseTime))
+if resultProviders:
+    print("RESULTS PROVIDED BY: {}".format(", ".join("{} = {:d}".format(solverType, count) for (solverType, count) in resultProviders.most_common())))
 print("ELAPSED TIME = {:f}".format(time() - startTime))
 
+if portfolio is not None:
+    portfolio.close()
+if tracer is not None:
+    tracer.close()
+
 logging.shutdown()
@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import csv
+import glob
+import os
+import re
+import resource
+import shlex
+import signal
+import sqlite3
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from enum import Enum
+from threading import Timer
+from time import time
+
+RootDir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# seconds granted to neO beyond its own timeout before it is killed
+GracePeriod = 10
+
+
+class RunStatus(Enum):
+    Optimum = 'optimum'
+    BestFound = 'best'  # timeout, with the best lifetime found so far
+    Unsat = 'unsat'
+    Timeout = 'timeout'
+    Memout = 'memout'
+    Error = 'error'
+
+
+# the statuses that give the exact answer, which must not change between runs
+SolvedStatuses = [RunStatus.Optimum.value, RunStatus.Unsat.value]
+
+Fields = ["run_id", "instance", "config", "arguments", "status", "optimum", "lowerbound", "upperbound",
+          "bounds_time", "search_time", "scheduling_time", "elapsed_time", "wall_time", "cpu_time", "max_memory",
+          "winner", "return_code", "features"]
+
+
+def ParseOutput(output):
+    """Parse the output of neO
+
+    Parameters:
+
+    output -- text printed by neO
+
+    Returns: dictionary of the fields of the results that neO reports (see Fields)
+    """
+
+    result = {"optimum": None, "lowerbound": None, "upperbound": None, "winner": None, "features": None}
+    statuses = set()
+    for line in output.splitlines():
+        line = line.strip()
+        optimumMatch = re.fullmatch(r"(OPTIMUM|BEST LIFETIME FOUND): (\d+)", line)
+        boundsMatch = re.fullmatch(r"BOUNDS: (\d+) <= T <= (\d+)", line)
+        timeMatch = re.fullmatch(r"(BOUNDS|SEARCH|SCHEDULING|ELAPSED) TIME = ([\d.]+)", line)
+        # the solver that won the most probes comes first
+        winnerMatch = re.fullmatch(r"RESULTS PROVIDED BY: (\S+) = \d+.*", line)
+        # the features of the instance, for the training of the solver selection
+        featuresMatch = re.fullmatch(r"FEATURES: (\{.*\})", line)
+        if line in ["UNSAT", "TIMEOUT"]:
+            statuses.add(line)
+        elif optimumMatch:
+            statuses.add(optimumMatch.group(1))
+            result["optimum"] = int(optimumMatch.group(2))
+        elif boundsMatch:
+            (result["lowerbound"], result["upperbound"]) = (int(boundsMatch.group(1)), int(boundsMatch.group(2)))
+        elif timeMatch:
+            result[timeMatch.group(1).lower() + "_time"] = float(timeMatch.group(2))
+        elif winnerMatch:
+            result["winner"] = winnerMatch.group(1)
+        elif featuresMatch:
+            result["features"] = featuresMatch.group(1)
+
+    if "OPTIMUM" in statuses:
+        result["status"] = RunStatus.Optimum.value
+    elif "BEST LIFETIME FOUND" in statuses:
+        result["status"] = RunStatus.BestFound.value
+    elif "UNSAT" in statuses:
+        result["status"] = RunStatus.Unsat.value
+    elif "TIMEOUT" in statuses:
+        result["status"] = RunStatus.Timeout.value
+    else:
+        result["status"] = RunStatus.Error.value
+
+    return result
+
+
+def RunInstance(neoCommand, instance, arguments, timeout = None, cpuLimit = None, memoryLimit = None):
+    """Run neO on an instance, and collect its results along with the resources it has used
+
+    Parameters:
+
+    neoCommand -- command that runs neO, as a list
+
+    instance -- path of the input file
+
+    arguments -- further command-line arguments of neO, as a list
+
+    timeout -- timeout in seconds, passed to neO, which is killed if it overruns by more than GracePeriod (None by default)
+
+    cpuLimit -- limit on the CPU time of each process of neO, in seconds (None by default)
+
+    memoryLimit -- limit on the address space of each process of neO, in MB (None by default)
+
+    Returns: dictionary of the fields of the results (see Fields)
+    """
+
+    def SetLimits():
+        if cpuLimit:
+            resource.setrlimit(resource.RLIMIT_CPU, (cpuLimit, cpuLimit + 1))
+        if memoryLimit:
+            resource.setrlimit(resource.RLIMIT_AS, (memoryLimit << 20, memoryLimit << 20))
+
+    command = neoCommand + [instance] + arguments + (["--timeout", str(timeout)] if timeout else [])
+    startTime = time()
+    # neO runs in its own session, so that its solver processes can be killed along with it
+    process = subprocess.Popen(command, stdout = subprocess.PIPE, stderr = subprocess.STDOUT, text = True,
+                               preexec_fn = SetLimits, start_new_session = True)
+    killed = []
+
+    def Kill():
+        killed.append(True)
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    timer = None
+    if timeout:
+        timer = Timer(timeout + GracePeriod, Kill)
+        timer.start()
+
+    output = process.stdout.read()
+    process.stdout.close()
+    # the resource usage covers the solver processes, as well, once neO has waited for them
+    (_, waitStatus, usage) = os.wait4(process.pid, 0)
+    process.returncode = -os.WTERMSIG(waitStatus) if os.WIFSIGNALED(waitStatus) else os.WEXITSTATUS(waitStatus)
+    if timer:
+        timer.cancel()
+
+    result = ParseOutput(output)
+    result["wall_time"] = time() - startTime
+    result["cpu_time"] = usage.ru_utime + usage.ru_stime
+    result["max_memory"] = usage.ru_maxrss / 1024
+    result["return_code"] = process.returncode
+
+    if killed or process.returncode in [-signal.SIGXCPU, -signal.SIGKILL]:
+        result["status"] = RunStatus.Timeout.value
+    elif "MemoryError" in output:
+        result["status"] = RunStatus.Memout.value
+    elif process.returncode != 0:
+        result["status"] = RunStatus.Error.value
+    if result["status"] == RunStatus.Error.value:
+        result["error"] = output[-1000:]
+
+    return result
+
+
+class ResultStore(object):
+    def __init__(self, fileName):
+        """Open a SQLite database of the results of the benchmark runs
+
+        Parameters:
+
+        fileName -- name of the database file, which is created if it does not exist
+        """
+
+        self.connection = sqlite3.connect(fileName)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS results ({}, PRIMARY KEY (run_id, instance, config))".format(", ".join(Fields)))
+        # a database of an older version lacks the newer fields
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(results)")]
+        with self.connection:
+            for field in Fields:
+                if field not in columns:
+                    self.connection.execute("ALTER TABLE results ADD COLUMN {}".format(field))
+
+    def close(self):
+        self.connection.close()
+
+    def add(self, result):
+        """Add the result of running a configuration on an instance, replacing the previous one of the same run"""
+
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO results VALUES ({})".format(", ".join("?" * len(Fields))), [result.get(field) for field in Fields])
+
+    def getResults(self, runIds = None):
+        """Returns the results of some runs (all of them by default), as a list of dictionaries of the fields"""
+
+        if runIds is None:
+            cursor = self.connection.execute("SELECT {} FROM results ORDER BY run_id, instance, config".format(", ".join(Fields)))
+        else:
+            cursor = self.connection.execute("SELECT {} FROM results WHERE run_id IN ({}) ORDER BY run_id, instance, config".format(
+                ", ".join(Fields), ", ".join("?" * len(runIds))), runIds)
+        return [dict(zip(Fields, row)) for row in cursor]
+
+    def getRun(self, runId):
+        """Returns the results of a run, as a dictionary from (instance, config) pairs to dictionaries of the fields"""
+
+        return {(result["instance"], result["config"]): result for result in self.getResults([runId])}
+
+    def exportCsv(self, runId, fileName):
+        """Write the results of a run to a CSV file"""
+
+        results = self.getRun(runId)
+        with open(fileName, "w", newline = "") as file:
+            writer = csv.DictWriter(file, fieldnames = Fields)
+            writer.writeheader()
+            for key in sorted(results):
+                writer.writerow(results[key])
+
+
+def CompareRuns(baseline, current, slowdown = 1.5, minSlowdown = 1.0):
+    """Compare the results of a run against the ones of a baseline run, on their common instances and configurations
+
+    Parameters:
+
+    baseline -- results of the baseline run (see ResultStore.getRun)
+
+    current -- results of the current run
+
+    slowdown -- ratio of the wall times beyond which a run is reported as slower
+
+    minSlowdown -- difference of the wall times in seconds below which a run is never reported as slower, to ignore noise
+
+    Returns: list of descriptions of the regressions
+    """
+
+    regressions = []
+    for key in sorted(set(baseline) & set(current)):
+        (old, new) = (baseline[key], current[key])
+        name = "{} [{}]".format(*key)
+        if old["status"] in SolvedStatuses and new["status"] in SolvedStatuses:
+            if (old["status"], old["optimum"]) != (new["status"], new["optimum"]):
+                regressions.append("WRONG ANSWER: {}: {} {} instead of {} {}".format(name, new["status"], new["optimum"], old["status"], old["optimum"]))
+            elif new["wall_time"] > old["wall_time"] * slowdown and new["wall_time"] - old["wall_time"] >= minSlowdown:
+                regressions.append("SLOWDOWN: {}: {:.2f} s instead of {:.2f} s".format(name, new["wall_time"], old["wall_time"]))
+        elif old["status"] in SolvedStatuses:
+            regressions.append("NOT SOLVED: {}: {} instead of {} {}".format(name, new["status"], old["status"], old["optimum"]))
+
+    return regressions
+
+
+def CollectInstances(patterns):
+    """Returns the input files given by paths, directories (searched recursively) and glob patterns, relative to the root of neO"""
+
+    instances = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            if os.path.isdir(path):
+                instances.extend(sorted(glob.glob(os.path.join(path, "**", "*.wsn"), recursive = True)))
+            else:
+                instances.append(path)
+
+    return sorted(set(os.path.relpath(os.path.abspath(instance), RootDir) for instance in instances))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Run neO on benchmarks in batch, store the results, and compare them against a baseline run")
+
+    parser.add_argument("instances", nargs = "*", default = [os.path.join(RootDir, "benchmarks")],
+                        help = "input files, directories or glob patterns (default: all the benchmarks)")
+    parser.add_argument("-c", "--config",
+                        action = "append", nargs = 2, dest = "configs", metavar = ("NAME", "ARGUMENTS"), required = True,
+                        help = "a named configuration of neO, i.e., its command-line arguments such as \"--sat-solver minicard -a reglinear\" (can be repeated)")
+    parser.add_argument("-j", "--jobs",
+                        action = "store", type = int, dest = "jobs", default = 1,
+                        help = "number of runs in parallel (default: 1)")
+    parser.add_argument("--timeout",
+                        action = "store", type = int, dest = "timeout", default = None,
+                        help = "timeout of each run in seconds")
+    parser.add_argument("--cpu-limit",
+                        action = "store", type = int, dest = "cpu_limit", default = None,
+                        help = "limit on the CPU time of each process of a run in seconds")
+    parser.add_argument("--memory-limit",
+                        action = "store", type = int, dest = "memory_limit", default = None,
+                        help = "limit on the memory of each process of a run in MB")
+    parser.add_argument("--neo",
+                        action = "store", dest = "neo", default = " ".join(shlex.quote(s) for s in [sys.executable, os.path.join(RootDir, "neO.py")]),
+                        help = "command that runs neO, e.g., an executable built by build.sh (default: neO.py by the current Python)")
+    parser.add_argument("--database",
+                        action = "store", dest = "database", default = "benchmark.sqlite",
+                        help = "SQLite database to store the results in (default: benchmark.sqlite)")
+    parser.add_argument("--run-id",
+                        action = "store", dest = "run_id", default = datetime.now().strftime("%Y%m%d-%H%M%S"),
+                        help = "name of the run in the database (default: the current date and time)")
+    parser.add_argument("--csv",
+                        action = "store", dest = "csv",
+                        help = "CSV file to write the results of the run to")
+    parser.add_argument("--baseline",
+                        action = "store", dest = "baseline",
+                        help = "name of the run to compare against; the script fails if there is any wrong answer, unsolved instance or slowdown")
+    parser.add_argument("--slowdown",
+                        action = "store", type = float, dest = "slowdown", default = 1.5,
+                        help = "ratio of the wall times beyond which a run counts as a slowdown (default: 1.5)")
+    parser.add_argument("--min-slowdown",
+                        action = "store", type = float, dest = "min_slowdown", default = 1.0,
+                        help = "difference of the wall times in seconds below which a run never counts as a slowdown (default: 1.0)")
+
+    args = parser.parse_args()
+
+    instances = CollectInstances(args.instances)
+    if not instances:
+        parser.error("no input files found")
+    configs = [(name, shlex.split(arguments)) for (name, arguments) in args.configs]
+    neoCommand = shlex.split(args.neo)
+
+    store = ResultStore(args.database)
+    if args.baseline and not store.getRun(args.baseline):
+        parser.error("no results of the baseline run {} in {}".format(args.baseline, args.database))
+
+    def Run(instance, name, arguments):
+        result = RunInstance(neoCommand, os.path.join(RootDir, instance), arguments, args.timeout, args.cpu_limit, args.memory_limit)
+        result.update({"run_id": args.run_id, "instance": instance, "config": name, "arguments": " ".join(shlex.quote(a) for a in arguments)})
+        return result
+
+    runs = [(instance, name, arguments) for instance in instances for (name, arguments) in configs]
+    with ThreadPoolExecutor(max_workers = args.jobs) as executor:
+        futures = [executor.submit(Run, *run) for run in runs]
+        for (i, future) in enumerate(futures):
+            result = future.result()
+            store.add(result)
+            print("[{:d}/{:d}] {} [{}]: {} {} in {:.2f} s".format(i + 1, len(runs), result["instance"], result["config"], result["status"],
+                                                              "" if result["optimum"] is None else result["optimum"], result["wall_time"]))
+            if "error" in result:
+                print(result["error"])
+            sys.stdout.flush()
+
+    if args.csv:
+        store.exportCsv(args.run_id, args.csv)
+
+    regressions = []
+    if args.baseline:
+        regressions = CompareRuns(store.getRun(args.baseline), store.getRun(args.run_id), args.slowdown, args.min_slowdown)
+        print("\n".join(regressions) if regressions else "No regressions against {}".format(args.baseline))
+    store.close()
+
+    exit(1 if regressions else 0)
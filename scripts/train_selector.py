@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import sys
+
+RootDir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, RootDir)
+
+from scripts.benchmark import ResultStore
+from solvers.selection import TrainSelector
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Train the selection of the solvers of neO (see its option --selector) from the results of benchmark runs")
+
+    parser.add_argument("output_file", help = "the file to store the trained selection in")
+    parser.add_argument("--database",
+                        action = "store", dest = "database", default = "benchmark.sqlite",
+                        help = "SQLite database of the results of scripts/benchmark.py (default: benchmark.sqlite)")
+    parser.add_argument("--run-id",
+                        action = "append", dest = "run_ids", default = None,
+                        help = "name of a run to train on (can be repeated; default: all the runs)")
+    parser.add_argument("--neighbours",
+                        action = "store", type = int, dest = "neighbours", default = 5,
+                        help = "number of the most similar training instances to select by (default: 5)")
+
+    args = parser.parse_args()
+    if args.neighbours < 1:
+        parser.error("the number of neighbours must be positive")
+
+    store = ResultStore(args.database)
+    results = store.getResults(args.run_ids)
+    store.close()
+    if not any(result["features"] for result in results):
+        parser.error("no results with the features of the instances in {}".format(args.database))
+
+    cntInstances = TrainSelector(results, args.output_file, args.neighbours)
+    print("Trained on {:d} instances and {:d} configurations".format(cntInstances, len(set(result["config"] for result in results if result["features"]))))
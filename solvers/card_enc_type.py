@@ -11,6 +11,15 @@ class CardEncType(Enum):
 	kmtotalizer = EncType.kmtotalizer
 #	ownSeqCounter = 102
 
+# values of pysat.pb.EncType, which is available only with the package pypblib
+class PBEncType(Enum):
+	best = 0
+	bdd = 1
+	seqcounter = 2
+	sortnetwrk = 3
+	adder = 4
+	binmerge = 5
+
 class Relations(Enum):
 	Less = -2
 	LessOrEqual = -1
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import lzma
+import os
+import shutil
+import tempfile
+
+from enum import Enum
+
+class DumpCompressions(Enum):
+	none = ""
+	gzip = ".gz"
+	xz = ".xz"
+
+# format of the models dumped by the OR-Tools and Gurobi backends
+class DumpFormats(Enum):
+	mps = ".mps"
+	lp = ".lp"
+
+# length of the line reserved for the header of an uncompressed dump file
+HEADER_WIDTH = 64
+
+# size of the chunks copied between files
+CHUNK_SIZE = 1 << 20
+
+def OpenCompressed(fileName, mode, compression):
+	"""Open a file, compressing the written data (or decompressing the read data)
+
+	Parameters:
+
+	fileName -- name of the file
+
+	mode -- mode to open the file in, as for open() (e.g., "wt" or "ab")
+
+	compression -- type of the compression
+
+	Returns: file object
+	"""
+
+	if compression == DumpCompressions.gzip:
+		return gzip.open(fileName, mode)
+	elif compression == DumpCompressions.xz:
+		return lzma.open(fileName, mode)
+	return open(fileName, mode)
+
+class DumpFile(object):
+	def __init__(self, fileName, compression = DumpCompressions.none, reserveHeader = False):
+		"""Text file a formula is streamed to, while it is passed to the solver
+
+		The formula is never kept in memory. If the header depends on the whole formula (e.g., the numbers of vars and clauses in DIMACS), it is written on closing:
+		an uncompressed file starts with a line reserved for the header, which is overwritten in place, while the body of a compressed file is written to a temporary file,
+		which is then appended to the compressed header as is, since both gzip and xz allow concatenated streams.
+
+		Parameters:
+
+		fileName -- name of the dump file, without the extension of the compression
+
+		compression -- type of the compression
+
+		reserveHeader -- whether the header is written on closing
+		"""
+
+		self.name = fileName + compression.value
+		self.compression = compression
+		self.reserveHeader = reserveHeader
+		self.closed = False
+
+		if reserveHeader and compression != DumpCompressions.none:
+			(fd, self.bodyFileName) = tempfile.mkstemp(dir = os.path.dirname(os.path.abspath(self.name)), suffix = compression.value)
+			os.close(fd)
+			self.file = OpenCompressed(self.bodyFileName, "wt", compression)
+		else:
+			self.bodyFileName = None
+			self.file = OpenCompressed(self.name, "wt", compression)
+			if reserveHeader:
+				self.file.write(" " * (HEADER_WIDTH - 1) + "\n")
+
+	def __del__(self):
+		if not getattr(self, "closed", True):
+			self.file.close()
+			if self.bodyFileName:
+				os.remove(self.bodyFileName)
+
+	def write(self, text):
+		self.file.write(text)
+
+	def close(self, header = None):
+		"""Complete the dump file
+
+		Parameters:
+
+		header -- header of the dump file, without the line break (only if it is reserved)
+		"""
+
+		if self.closed:
+			return
+		self.closed = True
+
+		if not self.reserveHeader:
+			self.file.close()
+		elif self.bodyFileName is None:
+			if len(header) >= HEADER_WIDTH:
+				raise Exception("The header of the dump file is too long: {}".format(header))
+			self.file.seek(0)
+			self.file.write(header.ljust(HEADER_WIDTH - 1) + "\n")
+			self.file.close()
+		else:
+			self.file.close()
+			with OpenCompressed(self.name, "wt", self.compression) as file:
+				file.write(header + "\n")
+			with open(self.name, "ab") as file, open(self.bodyFileName, "rb") as body:
+				shutil.copyfileobj(body, file, CHUNK_SIZE)
+			os.remove(self.bodyFileName)
+
+	def copyFrom(self, fileName):
+		"""Append the content of an uncompressed text file in chunks"""
+
+		with open(fileName, "r") as file:
+			shutil.copyfileobj(file, self.file, CHUNK_SIZE)
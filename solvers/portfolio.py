@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+from queue import Empty
+from threading import Thread
+from time import sleep, time
+
+from multiprocess import Process, Queue, Value
+
+# the heavy backend modules are imported once, before the workers are forked
+from solvers.dump import DumpCompressions, DumpFormats
+from solvers.solver import SolverResult
+from solvers.solver_incremental import LifetimeMaximizer
+from solvers.solver_sat import SatSolver, SatSolvers
+from solvers.solver_smt import SmtSolver, SmtSolvers, Z3PbSolver
+from solvers.solver_or import OrSolver, OrSolvers
+from solvers.solver_cp import CpSat, CpSolvers
+from solvers.solver_gurobi import GurobiSolver, GurobiSolvers
+from solvers.tracing import CreateProbeEvent, GetProbeStatus
+
+class PortfolioMember(object):
+	def __init__(self, solverType, cardinalityEnc = None, dumpFileName = None, pbEnc = None, dumpFormat = DumpFormats.mps, dumpCompression = DumpCompressions.none):
+		"""Configuration of a solver in the portfolio
+
+		Parameters:
+
+		solverType -- type of the solver to instantiate
+
+		cardinalityEnc -- type of the cardinality encoding to use (SAT solvers only)
+
+		dumpFileName -- name of the dump file (not supported by CP-SAT)
+
+		pbEnc -- type of the pseudo-Boolean encoding to use for weighted constraints (SAT solvers only)
+
+		dumpFormat -- format of the dump file (OR-Tools and Gurobi only)
+
+		dumpCompression -- type of the compression of the dump file
+		"""
+
+		self.solverType = solverType
+		self.cardinalityEnc = cardinalityEnc
+		self.dumpFileName = dumpFileName
+		self.pbEnc = pbEnc
+		self.dumpFormat = dumpFormat
+		self.dumpCompression = dumpCompression
+
+def CreateSolver(member):
+	"""Instantiate the solver of a portfolio member
+
+	Parameters:
+
+	member -- portfolio member
+
+	Returns: the new solver
+	"""
+
+	solverType = member.solverType
+	if solverType in SatSolvers:
+		return SatSolver(satSolverType = solverType, cardinalityEnc = member.cardinalityEnc, dumpFileName = member.dumpFileName, expectInterrupt = True, pbEnc = member.pbEnc, dumpCompression = member.dumpCompression)
+	elif solverType == SmtSolvers.Z3:
+		return Z3PbSolver(dumpFileName = member.dumpFileName, dumpCompression = member.dumpCompression)
+	elif solverType in SmtSolvers:
+		return SmtSolver(smtSolverType = solverType, dumpFileName = member.dumpFileName, dumpCompression = member.dumpCompression)
+	elif solverType in OrSolvers:
+		return OrSolver(orSolverType = solverType, dumpFileName = member.dumpFileName, dumpFormat = member.dumpFormat, dumpCompression = member.dumpCompression)
+	elif solverType in CpSolvers:
+		return CpSat()
+	elif solverType in GurobiSolvers:
+		return GurobiSolver(dumpFileName = member.dumpFileName, dumpFormat = member.dumpFormat, dumpCompression = member.dumpCompression)
+
+	raise Exception("Undefined solver type: {}".format(solverType))
+
+def _Probe(member, wsnModel, probeId, lifetime, getModel, maximize, cancelled):
+	"""Encode and solve a probe in a worker process
+
+	Returns: pair of the result (None if interrupted or cancelled) and the trace event of the probe
+	"""
+
+	startTime = time()
+	solver = CreateSolver(member)
+
+	logging.info("{} starts encoding WSN...".format(member.solverType))
+	if maximize:
+		maximizer = LifetimeMaximizer(wsnModel, solver, upperbound = lifetime)
+	else:
+		schedulingVars = wsnModel.EncodeWsnConstraints(lifetime = lifetime, solver = solver)
+
+	encodeTime = time() - startTime
+	if cancelled.value >= probeId:
+		return (None, CreateProbeEvent(member.solverType, startTime, encodeTime, 0, "cancelled"))
+
+	solving = [True]
+	def interruptIfCancelled():
+		# interrupt repeatedly, since an interrupt that comes before the solving starts may be lost
+		while solving[0]:
+			if cancelled.value >= probeId:
+				try:
+					solver.interrupt()
+				except NotImplementedError:
+					# the solver cannot be stopped, so the worker leaves and gets respawned
+					os._exit(1)
+			sleep(0.01)
+
+	watcher = Thread(target = interruptIfCancelled, daemon = True)
+	watcher.start()
+
+	logging.info("{} starts solving...".format(member.solverType))
+	solveStartTime = time()
+	try:
+		if maximize:
+			optimum = maximizer.solve()
+			isSAT = True if optimum is not None else None
+		else:
+			isSAT = solver.solve()
+	finally:
+		solving[0] = False
+		watcher.join()
+
+	event = CreateProbeEvent(member.solverType, startTime, encodeTime, time() - solveStartTime, GetProbeStatus(isSAT), solver.get_statistics())
+	if isSAT is None:
+		return (None, event)
+
+	if maximize:
+		event["optimum"] = optimum
+		result = SolverResult(member.solverType, isSAT, lifetime = optimum)
+		if getModel:
+			result.model = maximizer.get_model(optimum)
+		return (result, event)
+
+	result = SolverResult(member.solverType, isSAT)
+	if isSAT and getModel:
+		result.model = solver.get_values(schedulingVars)
+
+	return (result, event)
+
+def _RunWorker(lane, memberIndex, member, wsnModel, requests, results, cancelled):
+	"""Main loop of a worker process, serving probe requests one after the other"""
+
+	while True:
+		request = requests.get()
+		if request is None:
+			break
+
+		(probeId, lifetime, getModel, maximize) = request
+
+		(result, event) = (None, None)
+		if cancelled.value < probeId:
+			startTime = time()
+			try:
+				(result, event) = _Probe(member, wsnModel, probeId, lifetime, getModel, maximize, cancelled)
+			except Exception:
+				logging.exception("{} failed for T = {:d}".format(member.solverType, lifetime))
+				event = CreateProbeEvent(member.solverType, startTime, time() - startTime, 0, "failed")
+
+		if event is not None:
+			event.update(probe = probeId, lifetime = lifetime, lane = lane, member = memberIndex)
+		results.put((probeId, memberIndex, result, event))
+
+class Portfolio(object):
+	def __init__(self, wsnModel, members, lanes = 1, tracer = None):
+		"""Start one long-lived worker process per portfolio member and lane
+
+		The WSN model is passed to the workers only once, at startup; later on, the workers receive only probe requests.
+		Each lane runs all the members on one probe at a time, so several lanes can probe different lifetimes concurrently.
+
+		Parameters:
+
+		wsnModel -- WSN model to solve
+
+		members -- list of portfolio members
+
+		lanes -- number of probes that can run concurrently (1 by default)
+
+		tracer -- tracer to write the events of the probes of every member to (see solvers.tracing.Tracer; None by default)
+		"""
+
+		self.wsnModel = wsnModel
+		self.members = members
+		self.lanes = lanes
+		self.tracer = tracer
+		self.results = Queue()
+		self.workers = [[None for _ in members] for _ in range(lanes)]
+		self.cntProbes = 0
+		self.probes = {}
+
+		for lane in range(lanes):
+			for memberIndex in range(len(members)):
+				self.__StartWorker(lane, memberIndex)
+
+	def __StartWorker(self, lane, memberIndex):
+		requests = Queue()
+		cancelled = Value('i', self.cntProbes, lock = False)
+		process = Process(
+			target = _RunWorker,
+			args = (lane, memberIndex, self.members[memberIndex], self.wsnModel, requests, self.results, cancelled),
+			daemon = True
+		)
+		process.start()
+
+		self.workers[lane][memberIndex] = (process, requests, cancelled)
+
+	def getFreeLanes(self):
+		"""Returns: number of lanes without a running probe"""
+
+		return self.lanes - len(self.probes)
+
+	def submit(self, lifetime, getModel = False, maximize = False):
+		"""Start racing the portfolio members on a certain lifetime, in a free lane
+
+		Parameters:
+
+		lifetime -- lifetime to check (upper bound on the lifetime if maximizing)
+
+		getModel -- whether to retrieve the satisfying model
+
+		maximize -- whether to maximize the lifetime in one shot instead of checking it (False by default)
+
+		Returns: identifier of the probe
+		"""
+
+		busyLanes = set(lane for (lane, _, _) in self.probes.values())
+		lane = next(l for l in range(self.lanes) if l not in busyLanes)
+
+		self.cntProbes += 1
+		probeId = self.cntProbes
+
+		for memberIndex in range(len(self.members)):
+			if not self.workers[lane][memberIndex][0].is_alive():
+				logging.info("Respawning the worker of {}".format(self.members[memberIndex].solverType))
+				self.__StartWorker(lane, memberIndex)
+			self.workers[lane][memberIndex][1].put((probeId, lifetime, getModel, maximize))
+
+		self.probes[probeId] = (lane, lifetime, set(range(len(self.members))))
+
+		return probeId
+
+	def wait(self, timeout = None):
+		"""Wait for the next running probe to be decided, and cancel the members that lost on it
+
+		Parameters:
+
+		timeout -- timeout in seconds (None by default)
+
+		Returns: pair of the probe identifier and the result of the winner
+		(the result is None if every member failed; both are None in case of timeout or if there is no running probe)
+		"""
+
+		deadline = time() + timeout if timeout is not None else None
+
+		while self.probes:
+			if deadline is not None and time() >= deadline:
+				break
+
+			try:
+				(probeId, memberIndex, result, event) = self.results.get(timeout = 0.1)
+			except Empty:
+				# a worker that could not be interrupted may have left meanwhile
+				for probeId in list(self.probes):
+					(lane, _, pending) = self.probes[probeId]
+					for memberIndex in list(pending):
+						if not self.workers[lane][memberIndex][0].is_alive():
+							pending.discard(memberIndex)
+					if not pending:
+						self.cancel(probeId)
+						return (probeId, None)
+				continue
+
+			if probeId not in self.probes:
+				# late result of a cancelled probe
+				self.__Trace(event, False)
+				continue
+
+			pending = self.probes[probeId][2]
+			pending.discard(memberIndex)
+			self.__Trace(event, result is not None)
+			if result is not None or not pending:
+				self.cancel(probeId)
+				return (probeId, result)
+
+		return (None, None)
+
+	def __Trace(self, event, isWinner):
+		if self.tracer is not None and event is not None:
+			event["winner"] = isWinner
+			self.tracer.addProbe(event)
+
+	def solve(self, lifetime, getModel = False, timeout = None, maximize = False):
+		"""Race the portfolio members on a certain lifetime, and cancel the losers as soon as one of them finishes
+
+		Parameters:
+
+		lifetime -- lifetime to check (upper bound on the lifetime if maximizing)
+
+		getModel -- whether to retrieve the satisfying model
+
+		timeout -- timeout in seconds (None by default)
+
+		maximize -- whether to maximize the lifetime in one shot instead of checking it (False by default)
+
+		Returns: the result of the winner (None in case of timeout or if every member failed)
+		"""
+
+		deadline = time() + timeout if timeout is not None else None
+
+		probeId = self.submit(lifetime, getModel, maximize)
+
+		while True:
+			(decidedProbeId, result) = self.wait(timeout = max(deadline - time(), 0) if deadline is not None else None)
+			if decidedProbeId is None:
+				self.cancel(probeId)
+				return None
+			if decidedProbeId == probeId:
+				return result
+
+	def cancel(self, probeId):
+		"""Cancel a probe in every member that is still working on it
+
+		Parameters:
+
+		probeId -- identifier of the probe
+		"""
+
+		if probeId not in self.probes:
+			return
+
+		(lane, _, _) = self.probes.pop(probeId)
+		for (_, _, cancelled) in self.workers[lane]:
+			cancelled.value = max(cancelled.value, probeId)
+
+	def close(self):
+		"""Stop all the worker processes"""
+
+		for probeId in list(self.probes):
+			self.cancel(probeId)
+
+		workers = [worker for laneWorkers in self.workers for worker in laneWorkers]
+
+		for (process, requests, _) in workers:
+			if process.is_alive():
+				requests.put(None)
+
+		for (process, _, _) in workers:
+			process.join(timeout = 1)
+			if process.is_alive():
+				process.terminate()
+
+		# the events of the probes cancelled at the end
+		while True:
+			try:
+				(_, _, _, event) = self.results.get(timeout = 0.1)
+			except Empty:
+				break
+			self.__Trace(event, False)
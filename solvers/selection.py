@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+import json
+from collections import defaultdict
+
+import numpy as np
+
+# the features that must match exactly between an instance and its neighbours (e.g., the WSN model)
+ExactFeatures = ["version"]
+
+# statuses of the runs that give the exact answer (see scripts/benchmark.py)
+SolvedStatuses = ["optimum", "unsat"]
+
+# factor of the largest wall time that an unsolved run counts as (i.e., the penalized average runtime PAR10)
+UnsolvedPenalty = 10
+
+def TrainSelector(results, fileName, neighbours = 5):
+	"""Train the selection of the configurations of neO from the results of benchmark runs, and store it in a file
+
+	The selection is by the nearest neighbours of the instance in the space of the features: the configuration with the lowest
+	penalized average runtime over the neighbours wins. Each instance counts once per set of features, since the features
+	include the parameters of the WSN constraints.
+
+	Parameters:
+
+	results -- list of the results of the runs, as dictionaries with the fields "instance", "config", "arguments", "status",
+	"wall_time" and "features" (JSON of the features of the instance printed by neO, see WsnModel.GetFeatures)
+
+	fileName -- name of the file of the trained selection
+
+	neighbours -- number of the nearest neighbours to select by (5 by default)
+
+	Returns: number of the training instances
+	"""
+
+	results = [result for result in results if result.get("features")]
+	if not results:
+		raise Exception("No results with the features of the instances to train on")
+
+	penalty = UnsolvedPenalty * max(result["wall_time"] for result in results)
+	configs = {}
+	times = defaultdict(lambda: defaultdict(list))
+	for result in results:
+		configs[result["config"]] = result["arguments"] or ""
+		# the same instance and constraints (i.e., the same features) in several runs give several samples
+		key = (result["instance"], result["features"])
+		times[key][result["config"]].append(result["wall_time"] if result["status"] in SolvedStatuses else penalty)
+
+	featureNames = sorted(json.loads(results[0]["features"]))
+	instances = [{
+		"instance": instance,
+		"features": [json.loads(features)[name] for name in featureNames],
+		"times": dict((config, sum(samples) / len(samples)) for (config, samples) in configTimes.items())
+	} for ((instance, features), configTimes) in sorted(times.items())]
+
+	values = np.array([instance["features"] for instance in instances], dtype = float)
+	selector = {
+		"features": featureNames,
+		"mean": values.mean(axis = 0).tolist(),
+		# the constant features do not count in the distances
+		"std": [std if std > 0 else 1.0 for std in values.std(axis = 0).tolist()],
+		"neighbours": neighbours,
+		"penalty": penalty,
+		"configs": configs,
+		"instances": instances
+	}
+	with open(fileName, "w") as file:
+		json.dump(selector, file, indent = 1)
+
+	return len(instances)
+
+class SolverSelector(object):
+	def __init__(self, fileName):
+		"""Load a selection of the configurations of neO trained by TrainSelector
+
+		Parameters:
+
+		fileName -- name of the file of the trained selection
+		"""
+
+		with open(fileName) as file:
+			selector = json.load(file)
+
+		self.featureNames = selector["features"]
+		self.mean = np.array(selector["mean"])
+		self.std = np.array(selector["std"])
+		self.neighbours = selector["neighbours"]
+		self.penalty = selector["penalty"]
+		self.configs = selector["configs"]
+		self.instances = selector["instances"]
+		self.values = (np.array([instance["features"] for instance in self.instances], dtype = float) - self.mean) / self.std
+
+	def select(self, features):
+		"""Select the configuration of neO for an instance
+
+		Parameters:
+
+		features -- features of the instance (see WsnModel.GetFeatures)
+
+		Returns: pair of the name of the configuration and its command-line arguments (None if no training instance is comparable)
+		"""
+
+		candidates = [index for (index, instance) in enumerate(self.instances)
+			if all(instance["features"][self.featureNames.index(name)] == features[name] for name in ExactFeatures if name in self.featureNames)]
+		if not candidates:
+			return None
+
+		values = (np.array([features[name] for name in self.featureNames], dtype = float) - self.mean) / self.std
+		distances = np.linalg.norm(self.values[candidates] - values, axis = 1)
+		nearest = [candidates[index] for index in np.argsort(distances, kind = "stable")[:self.neighbours]]
+
+		# a configuration not run on a neighbour counts as unsolved there
+		scores = dict((config, sum(self.instances[index]["times"].get(config, self.penalty) for index in nearest)) for config in self.configs)
+		config = min(sorted(scores), key = lambda config: scores[config])
+
+		return (config, self.configs[config])
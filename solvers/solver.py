@@ -1,18 +1,21 @@
 # -*- coding: utf-8 -*-
 
+import numpy as np
+
 from solvers.card_enc_type import Relations, RelationOps
 
 SAT = True
 UNSAT = False
 
 class SolverResult():
-	def __init__(self, solverType, isSAT, model = None):
+	def __init__(self, solverType, isSAT, model = None, lifetime = None):
 		self.solverType = solverType
 		self.isSAT = isSAT
 		self.model = model
+		self.lifetime = lifetime
 
 class Constraint():
-	def __init__(self, lits, weights = None, relation = Relations.GreaterOrEqual, bound = 1, boolLit = None):
+	def __init__(self, lits, weights = None, relation = Relations.GreaterOrEqual, bound = 1, boolLit = None, condLit = None):
 		"""Instatiate a pseudo-Boolean constraint
 
 		Parameters:
@@ -26,6 +29,8 @@ class Constraint():
 		bound -- bound on the RHS of the constraint
 
 		boolLit -- Boolean literal that is set to be equivalent with the constraint (undefined by default)
+
+		condLit -- Boolean literal that must imply the constraint (undefined by default)
 		"""
 
 		assert(lits is not None)
@@ -40,13 +45,17 @@ class Constraint():
 		self.bound = bound
 		self.boolLit = boolLit
 
+		assert(boolLit is None or condLit is None)
+		self.condLit = condLit
+
 	def __str__(self):
-		return "{}{} {} {:d}{}".format(
+		return "{}{} {} {:d}{}{}".format(
 			self.lits,
 			" * {}".format(self.weights) if self.weights is not None else "",
 			RelationOps[self.relation],
 			self.bound,
-			"\t <=> {:d}".format(self.boolLit) if self.boolLit else ""
+			"\t <=> {:d}".format(self.boolLit) if self.boolLit else "",
+			"\t <= {:d}".format(self.condLit) if self.condLit else ""
 		)
 
 class Solver(object):
@@ -82,14 +91,84 @@ class Solver(object):
 
 		raise NotImplementedError("Please Implement this method")
 
-	def solve(self):
+	def addClauses(self, clauses):
+		"""Add clauses to the solver in one batch
+
+		Parameters:
+
+		clauses -- list of clauses, each given by its literals
+		"""
+
+		for lits in clauses:
+			self.addClause(lits)
+
+	def addConstraints(self, constraints):
+		"""Add constraints to the solver in one batch
+
+		Parameters:
+
+		constraints -- list of constraints to add
+		"""
+
+		for constraint in constraints:
+			self.addConstraint(constraint)
+
+	def addWindowConstraints(self, lits, window, bound):
+		"""Add "AtMost" cardinality constraints over every window of consecutive slots, e.g., time intervals
+
+		Parameters:
+
+		lits -- literals of each slot
+
+		window -- number of consecutive slots in a window
+
+		bound -- upper bound on the number of true literals in a window
+		"""
+
+		self.addConstraints([Constraint(
+			lits = [l for slot in lits[start:start + window] for l in slot],
+			relation = Relations.LessOrEqual,
+			bound = bound
+		) for start in range(len(lits) - window + 1)])
+
+	def maximize(self, lits):
+		"""Set the objective to maximize the number of true literals; solve() then optimizes
+
+		Parameters:
+
+		lits -- literals to count
+		"""
+
+		raise NotImplementedError("Please Implement this method")
+
+	def get_objective(self):
+		"""Get the objective value of the best solution and the best bound on it, after solve()
+
+		Returns: pair of the objective value and the bound
+		"""
+
+		raise NotImplementedError("Please Implement this method")
+
+	def solve(self, assumptions = None):
 		"""Start the solving process
 
+		Parameters:
+
+		assumptions -- literals to assume true during this call only (None by default; not supported by every solver)
+
 		Returns: True iff satisfiable
 		"""
 
 		raise NotImplementedError("Please Implement this method")
 
+	def interrupt(self):
+		"""Interrupt the running solving process, e.g., from a timer thread
+
+		The interrupted call of solve() returns None.
+		"""
+
+		raise NotImplementedError("Please Implement this method")
+
 	def get_model(self, vars):
 		"""Get the satisfying model for certain vars
 
@@ -101,3 +180,24 @@ class Solver(object):
 		"""
 
 		raise NotImplementedError("Please Implement this method")
+
+	def get_values(self, vars):
+		"""Get the truth values of certain vars in the satisfying model at once
+
+		Parameters:
+
+		vars -- a (nested) list of vars of regular shape, e.g., the scheduling vars of the sensors
+
+		Returns: a boolean NumPy array of the shape of vars
+		"""
+
+		# the assignments are either literals or 0/1 values
+		return np.asarray(self.get_model(vars)) > 0.5
+
+	def get_statistics(self):
+		"""Get statistics of the last solving process, along with the number of vars and constraints created
+
+		Returns: a dictionary from the names of the statistics to their values (each solver provides its own ones)
+		"""
+
+		return {}
@@ -6,6 +6,8 @@ from enum import Enum
 
 import logging
 
+import numpy as np
+
 from solvers.card_enc_type import Relations
 from solvers.solver import Solver, Constraint
 
@@ -14,6 +16,11 @@ class CpSolvers(Enum):
     CPSat = 'cp-sat'
 
 
+class ObjectiveLogger(cp_model.CpSolverSolutionCallback):
+    def on_solution_callback(self):
+        logging.info("CP-SAT found a solution of value {:g} (bound = {:g})".format(self.ObjectiveValue(), self.BestObjectiveBound()))
+
+
 class CpSat(Solver):
     def __init__(self):
         """Initialize the CP model"""
@@ -22,7 +29,11 @@ class CpSat(Solver):
         self.solver = cp_model.CpSolver()
         # self.model.verbose = 0
         self.vars = []
+        # indices of the vars in the model, which the constraints are built from directly
+        self.varIndices = []
         self.cntConstraints = 0
+        self.interrupted = False
+        self.hasObjective = False
 
     def __del__(self):
         """Delete the model"""
@@ -33,7 +44,8 @@ class CpSat(Solver):
         cntVars = len(self.vars)
         newVars = [i for i in range(cntVars + 1, cntVars + numVars + 1)]
 
-        self.vars += [self.model.NewBoolVar("v{:d}".format(v)) for v in newVars]
+        self.vars += [self.model.NewBoolVar("") for v in newVars]
+        self.varIndices += [var.Index() for var in self.vars[cntVars:]]
 
         return newVars
 
@@ -46,12 +58,25 @@ class CpSat(Solver):
         else:
             return self.getVar(lit).Not()
 
+    def getIndex(self, lit):
+        """Get the literal in the model proto (the index of the var, or -index-1 for its negation)"""
+
+        index = self.varIndices[abs(lit) - 1]
+        return index if lit > 0 else -index - 1
+
     def addClause(self, lits):
-        self.model.AddBoolOr([self.getLit(l) for l in lits])
+        self.addClauses([lits])
 
-        self.cntConstraints += 1
+    def addClauses(self, clauses):
+        # the constraints are added to the model proto directly, which avoids the wrappers of the literals
+        constraints = self.model.Proto().constraints
+        getIndex = self.getIndex
+        for lits in clauses:
+            constraints.add().bool_or.literals.extend([getIndex(l) for l in lits])
+
+            self.cntConstraints += 1
 
-        logging.debug("Constraint #{:d}:   clause {}".format(self.cntConstraints, lits))
+            logging.debug("Constraint #%d:   clause %s", self.cntConstraints, lits)
 
     def __addConstraint(self, constraint):
         # logging.info(str(constraint))
@@ -61,26 +86,31 @@ class CpSat(Solver):
         else:
             weights = [1 for _ in constraint.lits]
 
-        indicator = constraint.boolLit
-        lhs = sum(weights[i] * self.getLit(constraint.lits[i]) for i in range(len(constraint.lits)))
         if constraint.relation == Relations.LessOrEqual:
-            constraint = lhs <= constraint.bound
+            (lb, ub) = (None, constraint.bound)
         elif constraint.relation == Relations.Less:
-            constraint = lhs < constraint.bound
+            (lb, ub) = (None, constraint.bound - 1)
         elif constraint.relation == Relations.GreaterOrEqual:
-            constraint = lhs >= constraint.bound
+            (lb, ub) = (constraint.bound, None)
         elif constraint.relation == Relations.Greater:
-            constraint = lhs > constraint.bound
+            (lb, ub) = (constraint.bound + 1, None)
         else:
             raise Exception("Undefined value for a relation: {}".format(constraint.relation))
 
-        if indicator:
-            self.model.Add(constraint).OnlyEnforceIf(self.getLit(indicator))
-        else:
-            self.model.Add(constraint)
+        # a negative literal -v stands for 1 - v
+        offset = sum(weights[i] for i in range(len(constraint.lits)) if constraint.lits[i] < 0)
+
+        linearConstraint = self.model.Proto().constraints.add()
+        linearConstraint.linear.vars.extend([self.varIndices[abs(l) - 1] for l in constraint.lits])
+        linearConstraint.linear.coeffs.extend([weights[i] if constraint.lits[i] > 0 else -weights[i] for i in range(len(constraint.lits))])
+        linearConstraint.linear.domain.extend([cp_model.INT_MIN if lb is None else lb - offset, cp_model.INT_MAX if ub is None else ub - offset])
+        if constraint.boolLit:
+            linearConstraint.enforcement_literal.append(self.getIndex(constraint.boolLit))
 
         self.cntConstraints += 1
 
+        logging.debug("Constraint #%d:   %s", self.cntConstraints, constraint)
+
         """
         # With atmost constraint only:
         if constraint.relation == Relations.LessOrEqual:
@@ -98,6 +128,16 @@ class CpSat(Solver):
         """
 
     def addConstraint(self, constraint):
+        if constraint.condLit is not None:
+            self.__addConstraint(Constraint(
+                lits=constraint.lits,
+                weights=constraint.weights,
+                relation=constraint.relation,
+                bound=constraint.bound,
+                boolLit=constraint.condLit
+            ))
+            return
+
         self.__addConstraint(constraint)
 
         if constraint.boolLit is not None:
@@ -109,6 +149,31 @@ class CpSat(Solver):
                 boolLit=-constraint.boolLit
             ))
 
+    def addWindowConstraints(self, lits, window, bound):
+        if len(lits) < window:
+            return
+
+        if bound == window - 1 and all(len(slot) == 1 for slot in lits):
+            # no window may be full
+            self.addClauses([[-slot[0] for slot in lits[start:start + window]] for start in range(len(lits) - window + 1)])
+            return
+
+        # prefix sums of the slots, shared by the windows
+        prefixSums = [0]
+        maxSum = 0
+        for slot in lits:
+            maxSum += len(slot)
+            prefixSum = self.model.NewIntVar(0, maxSum, "")
+            self.model.Add(prefixSum == prefixSums[-1] + cp_model.LinearExpr.Sum([self.getLit(l) for l in slot]))
+            prefixSums.append(prefixSum)
+
+        for start in range(len(lits) - window + 1):
+            self.model.Add(prefixSums[start + window] - prefixSums[start] <= bound)
+
+        self.cntConstraints += 1
+
+        logging.debug("Constraint #%d:   at most %d in every %d slots of %s", self.cntConstraints, bound, window, lits)
+
     def __atmost(self, lits, weights, bound, boolLit=0):
         """Add an "AtMost", i.e., less-or-equal cardinality constraint to the solver
 
@@ -135,8 +200,14 @@ class CpSat(Solver):
 
         # logging.debug("Constraint #{:d}:   {}".format(self.cntConstraints, constraint))
 
-    def solve(self):
-        res = self.solver.Solve(self.model)
+    def solve(self, assumptions=None):
+        if assumptions is not None:
+            raise NotImplementedError("Solving under assumptions is not supported by {}".format(type(self).__name__))
+
+        if self.hasObjective:
+            res = self.solver.Solve(self.model, ObjectiveLogger())
+        else:
+            res = self.solver.Solve(self.model)
         if res == cp_model.OPTIMAL or res == cp_model.FEASIBLE:
             return True
         elif res == cp_model.INFEASIBLE:
@@ -144,9 +215,22 @@ class CpSat(Solver):
         elif res == cp_model.MODEL_INVALID:
             logging.error(self.model.Validate())
         elif res == cp_model.UNKNOWN:
+            if self.interrupted:
+                return None
             logging.warning("CP-SAT solver stopped!")
         logging.error("Simplex methods terminated with unexpected status: {}".format(res))
 
+    def maximize(self, lits):
+        self.model.Maximize(sum(self.getLit(l) for l in lits))
+        self.hasObjective = True
+
+    def get_objective(self):
+        return (self.solver.ObjectiveValue(), self.solver.BestObjectiveBound())
+
+    def interrupt(self):
+        self.interrupted = True
+        self.solver.StopSearch()
+
     def get_model(self, lit):
         assert self.model
 
@@ -156,3 +240,16 @@ class CpSat(Solver):
             return [self.get_model(l) for l in lit]
         else:
             return self.solver.Value(self.getLit(lit))
+
+    def get_statistics(self):
+        return {"vars": len(self.vars), "constraints": self.cntConstraints,
+                "conflicts": self.solver.NumConflicts(), "branches": self.solver.NumBranches(), "time": self.solver.WallTime()}
+
+    def get_values(self, vars):
+        assert self.model
+
+        # the values of all the vars are read from the response at once
+        values = np.array(self.solver.ResponseProto().solution, dtype = bool)[self.varIndices]
+        lits = np.asarray(vars, dtype = int)
+
+        return values[np.abs(lits) - 1] == (lits > 0)
@@ -1,33 +1,73 @@
 import logging
+import os
+import tempfile
 from enum import Enum
 from operator import neg
 from typing import Type
 
-from gurobipy import Model, GRB
+import numpy as np
+from gurobipy import Model, GRB, LinExpr, quicksum
+
+# the matrix API of gurobipy requires SciPy, without which the constraints are added one by one
+try:
+    import scipy.sparse
+except ImportError:
+    scipy = None
 
 from solvers.card_enc_type import Relations
+from solvers.dump import DumpFile, DumpCompressions, DumpFormats
 from solvers.solver import Solver, Constraint
 import uuid
 
+# number of linear constraints collected at most before adding them to the model as one matrix constraint
+BATCH_SIZE = 1 << 14
+
 class GurobiSolvers(Enum):
     GurobiSolver = 'gurobi'
 
 
+def logObjective(model, where):
+    if where == GRB.Callback.MIPSOL:
+        logging.info("Gurobi found a solution of value {:g} (bound = {:g})".format(
+            model.cbGet(GRB.Callback.MIPSOL_OBJ), model.cbGet(GRB.Callback.MIPSOL_OBJBND)))
+
+
 class GurobiSolver(Solver):
-    def __init__(self):
+    def __init__(self, dumpFileName=None, dumpFormat=DumpFormats.mps, dumpCompression=DumpCompressions.none):
+        """Initialize the solver
+
+        Parameters:
+
+        dumpFileName -- name of the dump file
+
+        dumpFormat -- format of the dump file
+
+        dumpCompression -- type of the compression of the dump file
+        """
+
         super().__init__()
         self.model = Model()
         self.model.setParam('OutputFlag', 0)
         self.vars = []
         self.cntConstraints = 0
+        self.hasObjective = False
+
+        # linear constraints waiting to be added as one matrix constraint, as rows of a CSR matrix
+        self.rowLits = []
+        self.rowWeights = []
+        self.rowStarts = [0]
+        self.rowSenses = []
+        self.rowRhs = []
+
+        self.dumpFileName = dumpFileName
+        self.dumpFormat = dumpFormat
+        self.dumpCompression = dumpCompression
 
     def generateVars(self, numVars):
         cntVars = len(self.vars)
         newVars = [i for i in range(cntVars + 1, cntVars + numVars + 1)]
 
-        self.vars += [self.model.addVar(vtype = GRB.BINARY, name = "v{:d}".format(v)) for v in newVars]
-
-#         self.model.update()
+        self.vars += self.model.addMVar(numVars, vtype = GRB.BINARY).tolist()
 
         return newVars
 
@@ -42,16 +82,62 @@ class GurobiSolver(Solver):
 #            return 1 - self.getVar(lit)
 
     def addClause(self, lits):
-        offset = 0
-        for i in range(len(lits)):
-            if lits[i] < 0:
-                offset += 1
+        self.addClauses([lits])
 
-        self.model.addConstr(sum(self.getLit(l) for l in lits) >= 1 - offset)
+    def __addRow(self, lits, weights, sense, rhs):
+        """Add the linear constraint lits*weights (sense) rhs, where a negative literal -v stands for 1 - v"""
 
-        self.cntConstraints += 1
+        if scipy is None:
+            offset = 0
+            for i in range(len(lits)):
+                if lits[i] < 0:
+                    offset += weights[i]
+
+            self.model.addLConstr(LinExpr([weights[i] if lits[i] > 0 else -weights[i] for i in range(len(lits))], [self.getVar(l) for l in lits]), sense, rhs - offset)
+            return
+
+        self.rowLits.extend(lits)
+        self.rowWeights.extend(weights)
+        self.rowStarts.append(len(self.rowLits))
+        self.rowSenses.append(sense)
+        self.rowRhs.append(rhs)
+
+        if len(self.rowRhs) >= BATCH_SIZE:
+            self.__flushRows()
+
+    def __flushRows(self):
+        """Add the collected linear constraints to the model as one matrix constraint"""
+
+        if not self.rowRhs:
+            return
 
-        logging.debug("Constraint #{:d}:   clause {}".format(self.cntConstraints, lits))
+        lits = np.array(self.rowLits, dtype = np.int64)
+        weights = np.array(self.rowWeights, dtype = float)
+        rows = np.repeat(np.arange(len(self.rowRhs)), np.diff(self.rowStarts))
+        offsets = np.bincount(rows[lits < 0], weights = weights[lits < 0], minlength = len(self.rowRhs))
+
+        # the columns of the matrix are all the vars of the model, in the order of their creation
+        self.model.update()
+        A = scipy.sparse.csr_matrix((np.where(lits > 0, weights, -weights), np.abs(lits) - 1, self.rowStarts), shape = (len(self.rowRhs), len(self.vars)))
+        A.sum_duplicates()
+        self.model.addMConstr(A, None, np.array(self.rowSenses), np.array(self.rowRhs, dtype = float) - offsets)
+
+        self.rowLits = []
+        self.rowWeights = []
+        self.rowStarts = [0]
+        self.rowSenses = []
+        self.rowRhs = []
+
+    def addClauses(self, clauses):
+        addRow = self.__addRow
+        for lits in clauses:
+            addRow(lits, [1] * len(lits), GRB.GREATER_EQUAL, 1)
+
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            for (i, lits) in enumerate(clauses):
+                logging.debug("Constraint #%d:   clause %s", self.cntConstraints + i + 1, lits)
+
+        self.cntConstraints += len(clauses)
 
     def __addConstraint(self, constraint):
 #        logging.info(str(constraint))
@@ -75,6 +161,16 @@ class GurobiSolver(Solver):
             raise Exception("Undefined value for a relation: {}".format(constraint.relation))
 
     def addConstraint(self, constraint):
+        if constraint.condLit is not None:
+            self.__addConstraint(Constraint(
+                lits=constraint.lits,
+                weights=constraint.weights,
+                relation=constraint.relation,
+                bound=constraint.bound,
+                boolLit=constraint.condLit
+            ))
+            return
+
         self.__addConstraint(constraint)
 
         if constraint.boolLit is not None:
@@ -102,39 +198,85 @@ class GurobiSolver(Solver):
         if weights is None:
             weights = [1 for _ in lits]
 
-        offset = 0
-        for i in range(len(lits)):
-            if lits[i] < 0:
-                offset += weights[i]
-
-        lhs = sum(weights[i] * self.getLit(lits[i]) for i in range(len(lits)))
-        bound -= offset
-
         if boolLit:
-            self.model.addGenConstrIndicator(self.getVar(boolLit), boolLit > 0, lhs, GRB.LESS_EQUAL, bound)
+            offset = 0
+            for i in range(len(lits)):
+                if lits[i] < 0:
+                    offset += weights[i]
+
+            lhs = LinExpr([weights[i] if lits[i] > 0 else -weights[i] for i in range(len(lits))], [self.getVar(l) for l in lits])
+            self.model.addGenConstrIndicator(self.getVar(boolLit), boolLit > 0, lhs, GRB.LESS_EQUAL, bound - offset)
         else:
-            self.model.addConstr(lhs <= bound)
+            self.__addRow(lits, weights, GRB.LESS_EQUAL, bound)
 
         self.cntConstraints += 1
 
-        logging.debug("Constraint #{:d}: {}   {} <= {}".format(self.cntConstraints,
-            "{} =>".format(boolLit) if boolLit else "",
-            "+".join(["{}*{}".format(weights[i], lits[i]) for i in range(len(lits))]),
-            bound))
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("Constraint #{:d}: {}   {} <= {}".format(self.cntConstraints,
+                "{} =>".format(boolLit) if boolLit else "",
+                "+".join(["{}*{}".format(weights[i], lits[i]) for i in range(len(lits))]),
+                bound))
 #        logging.debug(str(constraint))
 
-    def solve(self):
+    def solve(self, assumptions=None):
         """Start the solving process
 
-        Returns: True iff satisfiable
+        Returns: True iff satisfiable (None if interrupted)
         """
 
-        self.model.optimize()
+        if assumptions is not None:
+            raise NotImplementedError("Solving under assumptions is not supported by {}".format(type(self).__name__))
+
+        self.__flushRows()
+
+        if self.dumpFileName:
+            self.__dump()
+
+        if self.hasObjective:
+            self.model.optimize(logObjective)
+        else:
+            self.model.optimize()
         logging.debug(f'Solver status is {self.model.status}')
         if self.model.status == GRB.OPTIMAL:
             return True
+        elif self.model.status == GRB.INTERRUPTED:
+            return None
         return False
 
+    def __dump(self):
+        """Write the model to the dump file, once before the first solving"""
+
+        fileName = self.dumpFileName + self.dumpFormat.value
+        self.dumpFileName = None
+        self.model.update()
+
+        # Gurobi writes the model file itself, which is then compressed in chunks
+        if self.dumpCompression == DumpCompressions.none:
+            self.model.write(fileName)
+            return
+
+        (fd, tmpFileName) = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(fileName)), suffix=self.dumpFormat.value)
+        os.close(fd)
+        try:
+            self.model.write(tmpFileName)
+            dumpFile = DumpFile(fileName, compression=self.dumpCompression)
+            dumpFile.copyFrom(tmpFileName)
+            dumpFile.close()
+        finally:
+            os.remove(tmpFileName)
+
+    def maximize(self, lits):
+        self.model.setObjective(quicksum(self.getVar(l) if l > 0 else 1 - self.getVar(l) for l in lits), GRB.MAXIMIZE)
+        # the objective is integral
+        self.model.setParam('MIPGapAbs', 0.99)
+        self.hasObjective = True
+
+    def get_objective(self):
+        return (self.model.ObjVal, self.model.ObjBound)
+
+    def interrupt(self):
+        self.model.terminate()
+
     def get_model(self, var):
         """Get the satisfying model for certain vars
 
@@ -150,8 +292,22 @@ class GurobiSolver(Solver):
         if not var:
             return None
         elif isinstance(var, list):
+            if all(isinstance(v, int) for v in var):
+                # the values of a list of vars are queried at once
+                return self.model.getAttr(GRB.Attr.X, [self.getVar(v) for v in var])
             return [self.get_model(v) for v in var]
         else:
-            return self.model.getVarByName(self.getVar(var).varName).x
-            return self.getVar(var).x
-#            return self.model.getVarByName(self.getVar(var).varName).x == 1
+            return self.getVar(var).X
+
+    def get_statistics(self):
+        return {"vars": len(self.vars), "constraints": self.cntConstraints,
+                "iterations": self.model.IterCount, "nodes": self.model.NodeCount, "time": self.model.Runtime}
+
+    def get_values(self, vars):
+        assert(self.model)
+
+        # the values of all the vars are queried at once
+        values = np.array(self.model.getAttr(GRB.Attr.X, self.vars)) > 0.5
+        lits = np.asarray(vars, dtype = int)
+
+        return values[np.abs(lits) - 1] == (lits > 0)
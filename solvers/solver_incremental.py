@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+class IncrementalSolver(object):
+	def __init__(self, wsnModel, solver, upperbound):
+		"""Encode the WSN constraints once, for all the lifetimes up to an upper bound
+
+		Each time interval gets an activation var that must imply the coverage constraint in that time interval.
+		A lifetime T is then checked by assuming the activation vars of the first T time intervals.
+
+		Parameters:
+
+		wsnModel -- WSN model to encode
+
+		solver -- solver that supports solving under assumptions
+
+		upperbound -- upper bound on the lifetime of the WSN
+		"""
+
+		self.solver = solver
+		self.upperbound = upperbound
+
+		logging.info("Encoding WSN incrementally up to T = {:d}...".format(upperbound))
+		self.activationVars = solver.generateVars(upperbound)
+		self.schedulingVars = wsnModel.EncodeWsnConstraints(lifetime = upperbound, solver = solver, activationVars = self.activationVars)
+
+	def solve(self, lifetime):
+		"""Check if the WSN can be scheduled for a certain lifetime
+
+		Parameters:
+
+		lifetime -- lifetime to check
+
+		Returns: True iff satisfiable (None if interrupted)
+		"""
+
+		if lifetime > self.upperbound:
+			return False
+
+		return self.solver.solve(assumptions = self.activationVars[:lifetime])
+
+	def interrupt(self):
+		"""Interrupt the running solving process"""
+
+		self.solver.interrupt()
+
+	def get_model(self, lifetime):
+		"""Get the scheduling of the sensors after a satisfiable call of solve()
+
+		Parameters:
+
+		lifetime -- lifetime that has been checked
+
+		Returns: the scheduling of sensors as a boolean array (see Solver.get_values)
+		"""
+
+		return self.solver.get_values([vars[:lifetime] for vars in self.schedulingVars])
+
+class LifetimeMaximizer(IncrementalSolver):
+	def __init__(self, wsnModel, solver, upperbound):
+		"""Encode the WSN constraints once, for all the lifetimes up to an upper bound, and maximize the lifetime in one shot
+
+		The activation vars of the incremental encoding indicate the served time intervals.
+		As a served time interval must follow served ones only, the lifetime is the number of true activation vars.
+
+		Parameters:
+
+		wsnModel -- WSN model to encode
+
+		solver -- solver that supports an objective
+
+		upperbound -- upper bound on the lifetime of the WSN
+		"""
+
+		super().__init__(wsnModel, solver, upperbound)
+
+		for time in range(upperbound - 1):
+			solver.addClause([-self.activationVars[time + 1], self.activationVars[time]])
+
+		solver.maximize(self.activationVars)
+
+	def solve(self):
+		"""Find the maximal lifetime
+
+		Returns: the maximal lifetime (None if interrupted before proving optimality)
+		"""
+
+		if not self.solver.solve():
+			return None
+
+		(lifetime, bound) = self.solver.get_objective()
+		lifetime = int(round(lifetime))
+		if lifetime < int(bound + 1e-6):
+			logging.info("Maximization stopped with T = {:d} (bound = {:g})".format(lifetime, bound))
+			return None
+
+		return lifetime
@@ -61,7 +61,7 @@ class MipSolver(Solver):
 		
 		self.cntConstraints += 1
 		
-		logging.debug("Constraint #{:d}:   clause {}".format(self.cntConstraints, lits))
+		logging.debug("Constraint #%d:   clause %s", self.cntConstraints, lits)
 
 	def __addConstraint(self, constraint):
 		# logging.info(str(constraint))
@@ -83,6 +83,16 @@ class MipSolver(Solver):
 			raise Exception("Undefined value for a relation: {}".format(constraint.relation))
 
 	def addConstraint(self, constraint):
+		if constraint.condLit is not None:
+			self.__addConstraint(Constraint(
+				lits = constraint.lits,
+				weights = constraint.weights,
+				relation = constraint.relation,
+				bound = constraint.bound,
+				boolLit = constraint.condLit
+			))
+			return
+
 		self.__addConstraint(constraint)
 
 		if constraint.boolLit is not None:
@@ -120,9 +130,12 @@ class MipSolver(Solver):
 		self.model += constraint
 
 		self.cntConstraints += 1
-		logging.debug("Constraint #{:d}:   {}".format(self.cntConstraints, constraint))
+		logging.debug("Constraint #%d:   %s", self.cntConstraints, constraint)
+
+	def solve(self, assumptions = None):
+		if assumptions is not None:
+			raise NotImplementedError("Solving under assumptions is not supported by {}".format(type(self).__name__))
 
-	def solve(self):
 		res = self.model.optimize()
 
 		if res == OptimizationStatus.OPTIMAL or res == OptimizationStatus.FEASIBLE:
@@ -1,12 +1,15 @@
 # -*- coding: utf-8 -*-
 
-from ortools.linear_solver import pywraplp
+from ortools.linear_solver import pywraplp, linear_solver_pb2
 
 from enum import Enum
 
 import logging
 
+import numpy as np
+
 from solvers.card_enc_type import Relations
+from solvers.dump import DumpFile, DumpCompressions, DumpFormats
 from solvers.solver import Solver, Constraint
 
 
@@ -24,12 +27,18 @@ class OrSolvers(Enum):
     # GLOP = 'glop'
 
 class OrSolver(Solver):
-    def __init__(self, orSolverType):
+    def __init__(self, orSolverType, dumpFileName=None, dumpFormat=DumpFormats.mps, dumpCompression=DumpCompressions.none):
         """Initialize the solver
 
 		Parameters:
 
 		orSolverType -- type of the OR solver to instantiate
+
+		dumpFileName -- name of the dump file
+
+		dumpFormat -- format of the dump file
+
+		dumpCompression -- type of the compression of the dump file
 		"""
 
         self.solver: pywraplp.Solver = pywraplp.Solver.CreateSolver(orSolverType.value)
@@ -37,6 +46,10 @@ class OrSolver(Solver):
         self.vars = []
         self.cntConstraints = 0
 
+        self.dumpFileName = dumpFileName
+        self.dumpFormat = dumpFormat
+        self.dumpCompression = dumpCompression
+
     def __del__(self):
         """Delete the solver"""
 
@@ -46,7 +59,7 @@ class OrSolver(Solver):
         cntVars = len(self.vars)
         newVars = [i for i in range(cntVars + 1, cntVars + numVars + 1)]
 
-        self.vars += [self.solver.BoolVar("v{:d}".format(v)) for v in newVars]
+        self.vars += [self.solver.BoolVar("") for v in newVars]
 
         return newVars
 
@@ -60,11 +73,33 @@ class OrSolver(Solver):
             return 1 - self.getVar(lit)
 
     def addClause(self, lits):
-        self.solver.Add(pywraplp.Solver.Sum(self.solver, (self.getLit(l) for l in lits)) >= 1)
+        self.addClauses([lits])
 
-        self.cntConstraints += 1
+    def __addRow(self, lits, weights, lb, ub):
+        """Add the linear constraint lb <= lits*weights <= ub by its coefficients, where a negative literal -v stands for 1 - v"""
+
+        # setting the coefficients directly avoids building a linear expression by Python operators
+        coefficients = {}
+        for i in range(len(lits)):
+            if lits[i] > 0:
+                coefficients[lits[i]] = coefficients.get(lits[i], 0) + weights[i]
+            else:
+                coefficients[-lits[i]] = coefficients.get(-lits[i], 0) - weights[i]
+                lb -= weights[i]
+                ub -= weights[i]
+
+        constraint = self.solver.RowConstraint(lb, ub, "")
+        for (var, coefficient) in coefficients.items():
+            constraint.SetCoefficient(self.vars[var - 1], coefficient)
 
-        logging.debug("Constraint #{:d}:   clause {}".format(self.cntConstraints, lits))
+    def addClauses(self, clauses):
+        infinity = self.solver.infinity()
+        for lits in clauses:
+            self.__addRow(lits, [1] * len(lits), 1, infinity)
+
+            self.cntConstraints += 1
+
+            logging.debug("Constraint #%d:   clause %s", self.cntConstraints, lits)
 
     def __addConstraint(self, constraint):
         # logging.info(str(constraint))
@@ -88,6 +123,16 @@ class OrSolver(Solver):
             raise Exception("Undefined value for a relation: {}".format(constraint.relation))
 
     def addConstraint(self, constraint):
+        if constraint.condLit is not None:
+            self.__addConstraint(Constraint(
+                lits=constraint.lits,
+                weights=constraint.weights,
+                relation=constraint.relation,
+                bound=constraint.bound,
+                boolLit=constraint.condLit
+            ))
+            return
+
         self.__addConstraint(constraint)
 
         if constraint.boolLit is not None:
@@ -115,29 +160,54 @@ class OrSolver(Solver):
         if weights is None:
             weights = [1 for _ in lits]
 
-        lhs = sum(weights[i] * self.getLit(lits[i]) for i in range(len(lits)))
-
         if boolLit:
-            lhs = lhs + (sum(weights) - bound) * self.getLit(boolLit)
-            bound = sum(weights)
-
-        constraint = lhs <= bound
+            lits = lits + [boolLit]
+            weights = weights + [sum(weights) - bound]
+            bound = sum(weights[:-1])
 
-        self.solver.Add(constraint)
+        self.__addRow(lits, weights, -self.solver.infinity(), bound)
 
         self.cntConstraints += 1
 
-        logging.debug("Constraint #{:d}:   {} <= {}".format(self.cntConstraints, "+".join(
-            ["{}*{}".format(weights[i], lits[i]) for i in range(len(lits))]), bound))
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("Constraint #{:d}:   {} <= {}".format(self.cntConstraints, "+".join(
+                ["{}*{}".format(weights[i], lits[i]) for i in range(len(lits))]), bound))
+
+    def solve(self, assumptions=None):
+        if assumptions is not None:
+            raise NotImplementedError("Solving under assumptions is not supported by {}".format(type(self).__name__))
+
+        if self.dumpFileName:
+            self.__dump()
 
-    def solve(self):
         res = self.solver.Solve()
         if res == self.solver.OPTIMAL or res == self.solver.FEASIBLE:
             return True
-        elif res == self.solver.NOT_SOLVED or res == self.solver.INFEASIBLE or res == self.solver.ABNORMAL:
+        elif res == self.solver.NOT_SOLVED:
+            # interrupted
+            return None
+        elif res == self.solver.INFEASIBLE or res == self.solver.ABNORMAL:
             return False
         logging.error("Simplex methods terminated with unexpected status: {}".format(res))
 
+    def __dump(self):
+        """Write the model to the dump file, once before the first solving"""
+
+        # OR-Tools exports a model only as a string, which is written through the compression right away
+        if self.dumpFormat == DumpFormats.lp:
+            content = self.solver.ExportModelAsLpFormat(False)
+        else:
+            content = self.solver.ExportModelAsMpsFormat(False, False)
+
+        dumpFile = DumpFile(self.dumpFileName + self.dumpFormat.value, compression=self.dumpCompression)
+        dumpFile.write(content)
+        dumpFile.close()
+        self.dumpFileName = None
+
+    def interrupt(self):
+        if not self.solver.InterruptSolve():
+            raise NotImplementedError("Interruption is not supported by {}".format(self.solver.SolverVersion()))
+
     def get_model(self, var):
         assert self.solver
 
@@ -147,3 +217,18 @@ class OrSolver(Solver):
             return [self.get_model(v) for v in var]
         else:
             return self.getLit(var).solution_value()
+
+    def get_statistics(self):
+        return {"vars": len(self.vars), "constraints": self.cntConstraints,
+                "iterations": self.solver.iterations(), "nodes": self.solver.nodes(), "time": self.solver.wall_time() / 1000}
+
+    def get_values(self, vars):
+        assert self.solver
+
+        # the values of all the vars are queried at once (the vars of the model are the generated ones, in order)
+        response = linear_solver_pb2.MPSolutionResponse()
+        self.solver.FillSolutionResponseProto(response)
+        values = np.array(response.variable_value) > 0.5
+        lits = np.asarray(vars, dtype = int)
+
+        return values[np.abs(lits) - 1] == (lits > 0)
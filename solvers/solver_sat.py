@@ -2,13 +2,15 @@
 
 from pysat.card import CardEnc
 from pysat.solvers import Minicard, Minisat22, MinisatGH, Glucose3, Glucose4, Lingeling, MapleChrono, MapleCM, Maplesat
-from pysat.formula import CNF, CNFPlus
 
 from enum import Enum
 
 import logging
 
+import numpy as np
+
 from solvers.card_enc_type import CardEncType, Relations, RelationOps
+from solvers.dump import DumpFile, DumpCompressions
 from solvers.solver import Solver, Constraint
 
 class SatSolvers(Enum):
@@ -36,8 +38,11 @@ SatSolverClasses = {
 
 dumpImpliedConstraints = False
 
+# number of clauses collected at most before passing them to the SAT solver
+BATCH_SIZE = 1 << 14
+
 class SatSolver(Solver):
-	def __init__(self, satSolverType, cardinalityEnc = None, dumpFileName = None):
+	def __init__(self, satSolverType, cardinalityEnc = None, dumpFileName = None, expectInterrupt = False, pbEnc = None, dumpCompression = DumpCompressions.none):
 		"""Initialize the solver
 
 		Parameters:
@@ -47,6 +52,12 @@ class SatSolver(Solver):
 		cardinalityEnc -- type of the cardinality encoding to use
 
 		dumpFileName -- name of the dump file
+
+		expectInterrupt -- whether the solving process may be interrupted (always the case when solving under assumptions)
+
+		pbEnc -- type of the pseudo-Boolean encoding to use for weighted constraints (requires the package pypblib; by default, only Minicard supports weighted constraints, by duplicating the literals)
+
+		dumpCompression -- type of the compression of the dump file
 		"""
 
 		if satSolverType != SatSolvers.Minicard and not cardinalityEnc:
@@ -54,26 +65,35 @@ class SatSolver(Solver):
 
 		self.cntVars = 0
 		self.cntConstraints = 0
+		self.cntClauses = 0
 		self.cardEnc = cardinalityEnc
+		self.pbEnc = pbEnc
+		if pbEnc:
+			try:
+				from pysat.pb import PBEnc
+			except AssertionError:
+				raise Exception("For {} you must install the package pypblib".format(pbEnc))
+			self.PBEnc = PBEnc
+		self.expectInterrupt = expectInterrupt
 		self.solver = SatSolverClasses[satSolverType]()
 
-		self.dumpFile = self.cnf = None
+		# the clauses are streamed to the dump file, whose header is written before solving
+		self.dumpFile = None
+		self.cntDumped = 0
 		if dumpFileName:
-			if isinstance(self.solver, Minicard):
-				dumpFileName += ".cnf+"
-				self.cnf = None if dumpImpliedConstraints else CNFPlus()
-			else:
-				dumpFileName += ".cnf"
-				self.cnf = CNF()
-			self.dumpFile = open(dumpFileName, "w")
+			dumpFileName += ".cnf+" if isinstance(self.solver, Minicard) else ".cnf"
+			self.dumpFile = DumpFile(dumpFileName, compression = dumpCompression, reserveHeader = True)
 
 	def __del__(self):
 		"""Delete the solver"""
 
 		self.solver.delete()
 
-		if self.dumpFile:
-			self.dumpFile.close()
+		self.__closeDumpFile()
+
+	def __closeDumpFile(self):
+		if self.dumpFile and not self.dumpFile.closed:
+			self.dumpFile.close(header = "p {} {:d} {:d}".format("cnf+" if isinstance(self.solver, Minicard) else "cnf", self.cntVars, self.cntDumped))
 
 	def generateVars(self, numVars):
 		vars = [i for i in range(self.cntVars + 1, self.cntVars + 1 + numVars)]
@@ -84,27 +104,43 @@ class SatSolver(Solver):
 	
 	def __extendLits(self, lits, newLit, cntNewLit = 1):
 		if cntNewLit > 1 and not isinstance(self.solver, Minicard):
-			raise("Duplicated literal handling is not supported by {}".format(self.solver))
+			raise Exception("Duplicated literal handling is not supported by {}, choose a pseudo-Boolean encoding".format(self.solver))
 		
 		lits.extend(cntNewLit * [newLit])
 
 	def addClause(self, lits):
-		lits = lits.copy()
+		self.addClauses([lits])
 
-		self.solver.add_clause(lits)
+	def addClauses(self, clauses):
+		clauses = [list(lits) for lits in clauses]
 
-		if self.cnf:
-			self.cnf.append(lits)
-		elif self.dumpFile:
-			for l in lits:
-				self.dumpFile.write("{:d} ".format(l))
-			self.dumpFile.write("0\n")
-		
-		self.cntConstraints += 1
-		
-		logging.debug("Constraint #{:d}:   clause {}".format(self.cntConstraints, lits))
+		self.__appendClauses(clauses)
+
+		self.__dumpClauses(clauses)
+
+		if logging.getLogger().isEnabledFor(logging.DEBUG):
+			for (i, lits) in enumerate(clauses):
+				logging.debug("Constraint #%d:   clause %s", self.cntConstraints + i + 1, lits)
+
+		self.cntConstraints += len(clauses)
+
+	def __appendClauses(self, clauses):
+		"""Pass clauses to the SAT solver in one call"""
+
+		if clauses:
+			self.solver.append_formula(clauses)
+			self.cntVars = max(self.cntVars, self.solver.nof_vars())
+			self.cntClauses += len(clauses)
+
+	def __dumpClauses(self, clauses):
+		if self.dumpFile:
+			self.dumpFile.write("".join("".join("{:d} ".format(l) for l in lits) + "0\n" for lits in clauses))
+			self.cntDumped += len(clauses)
+
+	def __addConstraint(self, constraint, clauses):
+		if self.pbEnc and constraint.weights is not None and any(w > 1 for w in constraint.weights):
+			return self.__atmostWeighted(constraint, clauses)
 
-	def __addConstraint(self, constraint):
 		if constraint.weights is None:
 			lits = constraint.lits.copy()
 		else:
@@ -113,40 +149,126 @@ class SatSolver(Solver):
 				self.__extendLits(lits, newLit = constraint.lits[i], cntNewLit = constraint.weights[i])
 
 		if constraint.relation == Relations.LessOrEqual:
-			return self.__atmost(lits, constraint.bound, constraint.boolLit)
+			return self.__atmost(lits, constraint.bound, constraint.boolLit, clauses)
 		elif constraint.relation == Relations.Less:
-			return self.__atmost(lits, constraint.bound - 1, constraint.boolLit)
+			return self.__atmost(lits, constraint.bound - 1, constraint.boolLit, clauses)
 		elif constraint.relation == Relations.GreaterOrEqual:
-			return self.__atmost([-l for l in lits], len(lits) - constraint.bound, constraint.boolLit)
+			return self.__atmost([-l for l in lits], len(lits) - constraint.bound, constraint.boolLit, clauses)
 		elif constraint.relation == Relations.Greater:
-			return self.__atmost([-l for l in lits], len(lits) - constraint.bound - 1, constraint.boolLit)
+			return self.__atmost([-l for l in lits], len(lits) - constraint.bound - 1, constraint.boolLit, clauses)
 		else:
 			raise Exception("Undefined value for a relation: {}".format(constraint.relation))
 
 	def addConstraint(self, constraint):
-		if constraint.boolLit is None:
-			self.__addConstraint(constraint)
-		else:
-			equiv_lit = self.__addConstraint(constraint)
+		self.addConstraints([constraint])
+
+	def addConstraints(self, constraints):
+		# the clauses of the encodings are collected, and passed to the SAT solver at once
+		clauses = []
 
-			if not equiv_lit:
+		for constraint in constraints:
+			if constraint.condLit is not None:
 				self.__addConstraint(Constraint(
 					lits = constraint.lits,
 					weights = constraint.weights,
-					relation = Relations(-constraint.relation.value),
+					relation = constraint.relation,
 					bound = constraint.bound,
-					boolLit = -constraint.boolLit
-				))
+					boolLit = constraint.condLit
+				), clauses)
+			elif constraint.boolLit is None:
+				self.__addConstraint(constraint, clauses)
 			else:
-				print("EQUIV LIT: {:d}".format(equiv_lit))
-				extra_clauses = [ [-constraint.boolLit, equiv_lit], [constraint.boolLit, -equiv_lit] ]
+				equiv_lit = self.__addConstraint(constraint, clauses)
+
+				if not equiv_lit:
+					self.__addConstraint(Constraint(
+						lits = constraint.lits,
+						weights = constraint.weights,
+						relation = Relations(-constraint.relation.value),
+						bound = constraint.bound,
+						boolLit = -constraint.boolLit
+					), clauses)
+				else:
+					print("EQUIV LIT: {:d}".format(equiv_lit))
+					clauses.extend([ [-constraint.boolLit, equiv_lit], [constraint.boolLit, -equiv_lit] ])
+
+			if len(clauses) >= BATCH_SIZE:
+				self.__flushClauses(clauses)
+
+		self.__flushClauses(clauses)
+
+	def __flushClauses(self, clauses):
+		"""Pass the collected clauses to the SAT solver, and empty the list"""
 
-				self.solver.append_formula(extra_clauses)
+		self.__appendClauses(clauses)
+		self.__dumpClauses(clauses)
 
-				if self.cnf:
-					self.cnf.extend(extra_clauses)
+		clauses.clear()
 
-	def __atmost(self, lits, bound, boolLit = 0):
+	def addWindowConstraints(self, lits, window, bound):
+		if len(lits) < window:
+			return
+
+		if bound == window - 1 and all(len(slot) == 1 for slot in lits):
+			# no window may be full
+			self.addClauses([[-slot[0] for slot in lits[start:start + window]] for start in range(len(lits) - window + 1)])
+			return
+
+		if isinstance(self.solver, Minicard):
+			# native "AtMost" constraints need no aux vars
+			return super().addWindowConstraints(lits, window, bound)
+
+		# The slots are split into blocks of the window length, and every block gets a prefix and a suffix counter.
+		# A window consists of a suffix of a block and a prefix of the next block, so the counters are shared by the windows.
+		clauses = []
+		blocks = [lits[start:start + window] for start in range(0, len(lits), window)]
+		prefixCounters = [self.__encodeCounter(block, bound + 1, clauses) for block in blocks]
+		suffixCounters = [self.__encodeCounter(block[::-1], bound + 1, clauses)[::-1] for block in blocks]
+
+		for start in range(len(lits) - window + 1):
+			(blockIndex, offset) = divmod(start, window)
+			suffixCounter = suffixCounters[blockIndex][offset]
+			prefixCounter = prefixCounters[blockIndex + 1][offset - 1] if offset > 0 else []
+
+			# at least j true literals in the suffix and at least bound+1-j in the prefix are not allowed together
+			for j in range(bound + 2):
+				if j > len(suffixCounter) or bound + 1 - j > len(prefixCounter):
+					continue
+				clauses.append(([-suffixCounter[j - 1]] if j > 0 else []) + ([-prefixCounter[bound - j]] if j < bound + 1 else []))
+
+		self.__flushClauses(clauses)
+
+		self.cntConstraints += 1
+		logging.debug("Constraint #%d:   at most %d in every %d slots of %s", self.cntConstraints, bound, window, lits)
+
+	def __encodeCounter(self, slots, limit, clauses):
+		"""Encode a sequential counter over the literals of slots
+
+		Parameters:
+
+		slots -- literals of each slot
+
+		limit -- maximum count to represent
+
+		clauses -- list to collect the clauses of the encoding in
+
+		Returns: for each slot, the vars whose j-th one is implied if at least j literals are true in the slots up to it
+		"""
+
+		counters = []
+		previous = []
+		for slot in slots:
+			for lit in slot:
+				current = self.generateVars(min(len(previous) + 1, limit))
+				for j in range(len(current)):
+					if j < len(previous):
+						clauses.append([-previous[j], current[j]])
+					clauses.append([-lit, current[j]] if j == 0 else [-lit, -previous[j - 1], current[j]])
+				previous = current
+			counters.append(previous)
+		return counters
+
+	def __atmost(self, lits, bound, boolLit, clauses):
 		"""Add an "AtMost", i.e., less-or-equal cardinality constraint to the solver
 
 		Parameters:
@@ -155,7 +277,9 @@ class SatSolver(Solver):
 
 		bound -- upper bound on the RHS of the constraint
 
-		boolLit -- Boolean literal that must imply the constraint (undefined by default)
+		boolLit -- Boolean literal that must imply the constraint (undefined if None or 0)
+
+		clauses -- list to collect the clauses of the encoding in (the caller passes them to the SAT solver)
 
 		Returns: Boolean literal that is equivalent with the constraint (0 if no such lit exists)
 		"""
@@ -175,58 +299,113 @@ class SatSolver(Solver):
 					no_return = True
 			)
 
-			if self.cnf:
-				self.cnf.append([lits, bound], is_atmost = True)
-			elif self.dumpFile:
-				for l in lits:
-					self.dumpFile.write("{:d} ".format(l))
-				self.dumpFile.write("<= {:d} ".format(bound))
-				if boolLit:
-					self.dumpFile.write("<= {:d} ".format(boolLit))
+			if self.dumpFile:
+				self.dumpFile.write("".join("{:d} ".format(l) for l in lits) + "<= {:d}".format(bound))
+				if dumpImpliedConstraints and boolLit:
+					self.dumpFile.write(" <= {:d}".format(boolLit))
 				self.dumpFile.write("\n")
+				self.cntDumped += 1
 
 			self.cntConstraints += 1
 			self.cntVars = max(self.cntVars, self.solver.nof_vars())
-			logging.debug("Constraint #{:d}:   {} <= {:d}".format(self.cntConstraints, lits, bound))
+			logging.debug("Constraint #%d:   %s <= %d", self.cntConstraints, lits, bound)
 		else:
-			constraint = CardEnc.atmost(
-						lits = lits,
-						bound = bound,
-						top_id = max(self.cntVars, self.solver.nof_vars()),
-						encoding = self.cardEnc.value
-					)
-
-#			equiv_lit = constraint.equiv_var
-#			if boolLit and not equiv_lit:
-
-			if boolLit:
-				cntLits = len(lits)
-				# lits += [boolLit for _ in range(cntLits - bound)]
-				self.__extendLits(lits, boolLit, cntLits - bound)
-				bound = cntLits
-				constraint = CardEnc.atmost(
+			if bound < 0:
+				encoding = [[]]
+			else:
+				cnf = CardEnc.atmost(
 							lits = lits,
 							bound = bound,
 							top_id = max(self.cntVars, self.solver.nof_vars()),
 							encoding = self.cardEnc.value
 						)
-			
-			self.solver.append_formula(constraint.clauses)
+				# the aux vars are reserved now, since the clauses reach the SAT solver later
+				self.cntVars = max(self.cntVars, cnf.nv)
+				encoding = cnf.clauses
+
+#			equiv_lit = constraint.equiv_var
+#			if boolLit and not equiv_lit:
+
+			if boolLit:
+				# the whole encoding is switched off by -boolLit
+				encoding = [cl + [-boolLit] for cl in encoding]
 
-			if self.cnf:
-				self.cnf.extend(constraint.clauses)
+			clauses.extend(encoding)
 
 			self.cntConstraints += 1
-			self.cntVars = max(self.cntVars, self.solver.nof_vars())
-			logging.debug("Constraint #{:d} ({:d} clauses):   {} <= {:d}".format(self.cntConstraints, self.solver.nof_clauses(), lits, bound))
+			logging.debug("Constraint #%d (%d clauses):   %s <= %d", self.cntConstraints, len(encoding), lits, bound)
 		
 		return equiv_lit
 
-	def solve(self):
-		if self.dumpFile:
-			self.__dump()
+	def __atmostWeighted(self, constraint, clauses):
+		"""Add a weighted constraint to the solver by a pseudo-Boolean encoding, as an "AtMost" constraint
+
+		Parameters:
 
-		return self.solver.solve()
+		constraint -- weighted constraint
+
+		clauses -- list to collect the clauses of the encoding in (the caller passes them to the SAT solver)
+
+		Returns: Boolean literal that is equivalent with the constraint (always 0)
+		"""
+
+		lits = [constraint.lits[i] for i in range(len(constraint.lits)) if constraint.weights[i] > 0]
+		weights = [w for w in constraint.weights if w > 0]
+
+		if constraint.relation == Relations.LessOrEqual:
+			bound = constraint.bound
+		elif constraint.relation == Relations.Less:
+			bound = constraint.bound - 1
+		elif constraint.relation == Relations.GreaterOrEqual:
+			(lits, bound) = ([-l for l in lits], sum(weights) - constraint.bound)
+		elif constraint.relation == Relations.Greater:
+			(lits, bound) = ([-l for l in lits], sum(weights) - constraint.bound - 1)
+		else:
+			raise Exception("Undefined value for a relation: {}".format(constraint.relation))
+
+		if bound < 0:
+			encoding = [[]]
+		elif bound >= sum(weights):
+			encoding = []
+		else:
+			cnf = self.PBEnc.atmost(
+						lits = lits,
+						weights = weights,
+						bound = bound,
+						top_id = max(self.cntVars, self.solver.nof_vars()),
+						encoding = self.pbEnc.value
+					)
+			# the aux vars are reserved now, since the clauses reach the SAT solver later
+			self.cntVars = max(self.cntVars, cnf.nv)
+			encoding = cnf.clauses
+
+		if constraint.boolLit:
+			# the whole encoding is switched off by -boolLit
+			encoding = [cl + [-constraint.boolLit] for cl in encoding]
+
+		clauses.extend(encoding)
+
+		self.cntConstraints += 1
+		logging.debug("Constraint #%d (%d clauses):   %s * %s <= %d", self.cntConstraints, len(encoding), lits, weights, bound)
+
+		return 0
+
+	def solve(self, assumptions = None):
+		self.__closeDumpFile()
+
+		if isinstance(self.solver, Lingeling) or (assumptions is None and not self.expectInterrupt):
+			return self.solver.solve(assumptions = assumptions or [])
+
+		isSAT = self.solver.solve_limited(assumptions = assumptions or [], expect_interrupt = True)
+		self.solver.clear_interrupt()
+
+		return isSAT
+
+	def interrupt(self):
+		if isinstance(self.solver, Lingeling):
+			raise NotImplementedError("Interruption is not supported by {}".format(self.solver))
+
+		self.solver.interrupt()
 
 	def get_model(self, var, model = None):
 		if not model:
@@ -237,18 +416,22 @@ class SatSolver(Solver):
 		elif isinstance(var, list):
 			return [self.get_model(v, model) for v in var]
 		else:
-			return next(v for v in model if abs(v) == abs(var))
-	
-	def __dump(self):
-		if self.cnf:
-			self.cnf.to_fp(self.dumpFile)
-			self.dumpFile.close()
-		elif self.dumpFile:
-			self.dumpFile.close()
-
-			with open(self.dumpFile.name, "r") as file:
-				content = file.readlines()
-
-			with open(self.dumpFile.name, "w") as file:
-				file.write("p cnf+ {:d} {:d}\n".format(self.cntVars, self.cntConstraints))
-				file.write("".join(content))
+			# the model lists the literals of the vars in order (the vars not known to the solver are false)
+			return model[abs(var) - 1] if abs(var) <= len(model) else -abs(var)
+
+	def get_statistics(self):
+		# the statistics of the solver accumulate over the calls of solve()
+		statistics = {"vars": self.cntVars, "clauses": self.cntClauses, "constraints": self.cntConstraints}
+		statistics.update(self.solver.accum_stats())
+
+		return statistics
+
+	def get_values(self, vars):
+		model = np.array(self.solver.get_model(), dtype = int)
+		lits = np.asarray(vars, dtype = int)
+
+		# values[v]: whether var v is true (the vars not known to the solver are false)
+		values = np.zeros(max(self.cntVars, len(model)) + 1, dtype = bool)
+		values[np.abs(model)] = model > 0
+
+		return values[np.abs(lits)] == (lits > 0)
@@ -1,13 +1,21 @@
 # -*- coding: utf-8 -*-
 
-from pysmt.shortcuts import Symbol, Int, Ite, Plus, Minus, Times, LE, LT, GE, GT, Or, Not, Iff, to_smtlib
+from pysmt.shortcuts import Symbol, Int, Ite, Plus, Minus, Times, LE, LT, GE, GT, Or, Not, Iff, Implies
+from pysmt.smtlib.printers import SmtPrinter
 from pysmt.shortcuts import Solver
+from pysmt.exceptions import SolverReturnedUnknownResultError
 
 from enum import Enum
 
 import logging
 
+try:
+	import z3
+except ImportError:
+	z3 = None
+
 from solvers.card_enc_type import Relations, RelationOps
+from solvers.dump import DumpFile, DumpCompressions
 import solvers.solver
 
 class SmtSolvers(Enum):
@@ -18,22 +26,23 @@ class SmtSolvers(Enum):
 	# Boolector = 'btor'
 
 class SmtSolver(solvers.solver.Solver):
-	def __init__(self, smtSolverType, dumpFileName = None):
+	def __init__(self, smtSolverType, dumpFileName = None, dumpCompression = DumpCompressions.none):
 		"""Initialize the solver
 
 		Parameters:
 
 		smtSolverType -- type of the SNT solver to instantiate
+
+		dumpFileName -- name of the dump file
+
+		dumpCompression -- type of the compression of the dump file
 		"""
 
 		self.vars = []
 		self.cntConstraints = 0
 		self.solver = Solver(name = smtSolverType.value, logic = "QF_LIA")
 
-		self.dumpFile = None
-		if dumpFileName:
-			self.dumpFile = open(dumpFileName + ".smt2", "w")
-			self.dumpFile.write("(set-logic QF_LIA)")
+		self._openDumpFile(dumpFileName, dumpCompression)
 
 	def __del__(self):
 		"""Delete the solver"""
@@ -43,6 +52,19 @@ class SmtSolver(solvers.solver.Solver):
 		if self.dumpFile:
 			self.dumpFile.close()
 
+	def _openDumpFile(self, dumpFileName, dumpCompression):
+		# the assertions are printed to the dump file directly, without building their SMT-LIB strings
+		self.dumpFile = self.printer = None
+		if dumpFileName:
+			self.dumpFile = DumpFile(dumpFileName + ".smt2", compression = dumpCompression)
+			self.dumpFile.write("(set-logic QF_LIA)")
+			self.printer = SmtPrinter(self.dumpFile)
+
+	def _closeDumpFile(self):
+		if self.dumpFile and not self.dumpFile.closed:
+			self.dumpFile.write("(check-sat)(exit)")
+			self.dumpFile.close()
+
 	def generateVars(self, numVars):
 		cntVars = len(self.vars)
 
@@ -69,20 +91,28 @@ class SmtSolver(solvers.solver.Solver):
 			Int(0 if lit > 0 else 1)
 		)
 
+	def _dumpAssertion(self, expr):
+		if self.dumpFile:
+			self.dumpFile.write("(assert ")
+			self.printer.printer(expr)
+			self.dumpFile.write(")")
+
+	def getClauseExpr(self, lits):
+		return Or([self.getLit(l) for l in lits])
+
 	def addClause(self, lits):
-		expr = Or([self.getLit(l) for l in lits])
+		expr = self.getClauseExpr(lits)
 
 		self.solver.add_assertion(
 			expr
 		)
 
-		if self.dumpFile:
-			self.dumpFile.write("(assert {})".format(to_smtlib(expr, daggify = False)))
+		self._dumpAssertion(expr)
 		
 		self.cntConstraints += 1
-		logging.debug("Constraint #{:d}:   clause {}".format(self.cntConstraints, lits))
+		logging.debug("Constraint #%d:   clause %s", self.cntConstraints, lits)
 
-	def addConstraint(self, constraint):
+	def getConstraintExpr(self, constraint):
 		if constraint.weights is None:
 			lits = [self.boolToInt(l) for l in constraint.lits]
 		else:
@@ -108,22 +138,37 @@ class SmtSolver(solvers.solver.Solver):
 
 		if constraint.boolLit:
 			expr = Iff(expr, self.getLit(constraint.boolLit))
+		elif constraint.condLit:
+			expr = Implies(self.getLit(constraint.condLit), expr)
+
+		return expr
+
+	def addConstraint(self, constraint):
+		expr = self.getConstraintExpr(constraint)
+
 		self.solver.add_assertion(expr)
 		
-		if self.dumpFile:
-			self.dumpFile.write("(assert {})".format(to_smtlib(expr, daggify = False)))
+		self._dumpAssertion(expr)
 
 		self.cntConstraints += 1
-		logging.debug("Constraint #{:d}:   {}   {}".format(self.cntConstraints,
+		logging.debug("Constraint #%d:   %s   %s", self.cntConstraints,
 			"{:d}   <=>".format(constraint.boolLit) if constraint.boolLit else "",
-			expr))
+			expr)
 
-	def solve(self):
-		if self.dumpFile:
-			self.dumpFile.write("(check-sat)(exit)")
-			self.dumpFile.close()
+	def solve(self, assumptions = None):
+		self._closeDumpFile()
+
+		try:
+			return self.solver.solve(assumptions = [self.getLit(l) for l in assumptions] if assumptions is not None else None)
+		except SolverReturnedUnknownResultError:
+			# interrupted
+			return None
 
-		return self.solver.solve()
+	def interrupt(self):
+		if not hasattr(self.solver, "z3"):
+			raise NotImplementedError("Interruption is not supported by {}".format(type(self.solver).__name__))
+
+		self.solver.z3.ctx.interrupt()
 
 	def get_model(self, var):
 		if not var:
@@ -132,3 +177,116 @@ class SmtSolver(solvers.solver.Solver):
 			return [self.get_model(v) for v in var]
 		else:
 			return var if self.solver.get_value(self.getVar(var)).is_true() else -var
+
+	def get_statistics(self):
+		return {"vars": len(self.vars), "constraints": self.cntConstraints}
+
+class Z3PbSolver(SmtSolver):
+	def __init__(self, dumpFileName = None, dumpCompression = DumpCompressions.none):
+		"""Initialize Z3 by its own API, which provides native pseudo-Boolean constraints instead of sums of Ite terms
+
+		Parameters:
+
+		dumpFileName -- name of the dump file (the constraints are dumped in QF_LIA)
+
+		dumpCompression -- type of the compression of the dump file
+		"""
+
+		if z3 is None:
+			raise Exception("For the native pseudo-Boolean constraints of Z3 you must install the package z3-solver")
+
+		self.vars = []
+		self.z3Vars = []
+		self.cntConstraints = 0
+		# every constraint is Boolean, so the default solver, which handles the pseudo-Boolean constraints natively, beats the one for QF_LIA
+		self.solver = z3.Solver()
+
+		self._openDumpFile(dumpFileName, dumpCompression)
+
+	def __del__(self):
+		"""Delete the solver"""
+
+		self._closeDumpFile()
+
+	def generateVars(self, numVars):
+		newVars = super().generateVars(numVars)
+
+		self.z3Vars += [z3.Bool("v{:d}".format(v), self.solver.ctx) for v in newVars]
+
+		return newVars
+
+	def getZ3Lit(self, lit):
+		return self.z3Vars[lit - 1] if lit > 0 else z3.Not(self.z3Vars[-lit - 1])
+
+	def addClause(self, lits):
+		self.addClauses([lits])
+
+	def addClauses(self, clauses):
+		getZ3Lit = self.getZ3Lit
+		self.solver.add([z3.Or([getZ3Lit(l) for l in lits]) for lits in clauses])
+
+		for lits in clauses:
+			if self.dumpFile:
+				self._dumpAssertion(self.getClauseExpr(lits))
+
+			self.cntConstraints += 1
+			logging.debug("Constraint #%d:   clause %s", self.cntConstraints, lits)
+
+	def addConstraint(self, constraint):
+		weights = constraint.weights if constraint.weights is not None else [1] * len(constraint.lits)
+		args = [(self.getZ3Lit(l), w) for (l, w) in zip(constraint.lits, weights) if w != 0]
+
+		if constraint.relation == Relations.LessOrEqual:
+			expr = z3.PbLe(args, constraint.bound)
+		elif constraint.relation == Relations.Less:
+			expr = z3.PbLe(args, constraint.bound - 1)
+		elif constraint.relation == Relations.GreaterOrEqual:
+			expr = z3.PbGe(args, constraint.bound)
+		elif constraint.relation == Relations.Greater:
+			expr = z3.PbGe(args, constraint.bound + 1)
+		else:
+			raise Exception("Undefined value for a relation: {}".format(constraint.relation))
+
+		if constraint.boolLit:
+			expr = self.getZ3Lit(constraint.boolLit) == expr
+		elif constraint.condLit:
+			expr = z3.Implies(self.getZ3Lit(constraint.condLit), expr)
+		self.solver.add(expr)
+
+		if self.dumpFile:
+			self._dumpAssertion(self.getConstraintExpr(constraint))
+
+		self.cntConstraints += 1
+		logging.debug("Constraint #%d:   %s   %s %s %d", self.cntConstraints,
+			"{:d}   <=>".format(constraint.boolLit) if constraint.boolLit else "",
+			args, RelationOps[constraint.relation], constraint.bound)
+
+	def solve(self, assumptions = None):
+		self._closeDumpFile()
+
+		result = self.solver.check([self.getZ3Lit(l) for l in assumptions or []])
+		if result == z3.unknown:
+			# interrupted
+			return None
+		return result == z3.sat
+
+	def interrupt(self):
+		self.solver.ctx.interrupt()
+
+	def get_model(self, var, model = None):
+		if model is None:
+			model = self.solver.model()
+
+		if not var:
+			return None
+		elif isinstance(var, list):
+			return [self.get_model(v, model) for v in var]
+		else:
+			return var if z3.is_true(model.eval(self.z3Vars[abs(var) - 1], model_completion = True)) else -var
+
+	def get_statistics(self):
+		statistics = super().get_statistics()
+		z3Statistics = self.solver.statistics()
+		statistics.update(z3Statistics[i] for i in range(len(z3Statistics)))
+
+		return statistics
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+from enum import Enum
+from time import time
+
+# format of the trace of the probes
+class TraceFormats(Enum):
+	# one JSON object per line and per probe of a solver
+	jsonl = ".jsonl"
+	# Chrome trace event format, to be viewed in chrome://tracing or Perfetto
+	chrome = ".json"
+
+def CreateProbeEvent(solverType, startTime, encodeTime, solveTime, status, statistics = None, **fields):
+	"""Create the trace event of a probe of a solver
+
+	Parameters:
+
+	solverType -- type of the solver
+
+	startTime -- time when the probe started, in seconds since the epoch
+
+	encodeTime -- time to create the solver and encode the WSN constraints, in seconds
+
+	solveTime -- time to solve, in seconds
+
+	status -- "sat", "unsat", "interrupted", "cancelled" (before solving) or "failed"
+
+	statistics -- numbers of the vars and constraints created, and native statistics of the solver (see Solver.get_statistics)
+
+	fields -- further fields of the event (e.g., the probed lifetime)
+
+	Returns: the event as a dictionary
+	"""
+
+	event = {"solver": solverType.value, "pid": os.getpid(), "start": startTime, "encodeTime": encodeTime, "solveTime": solveTime, "status": status}
+	event.update(fields)
+	event["statistics"] = statistics or {}
+
+	return event
+
+def GetProbeStatus(isSAT):
+	"""Returns: the status of a probe in the trace, given the result of Solver.solve()"""
+
+	return "interrupted" if isSAT is None else "sat" if isSAT else "unsat"
+
+class Tracer(object):
+	def __init__(self, fileName, traceFormat = TraceFormats.jsonl):
+		"""Write the trace events of the probes to a file, as soon as they come
+
+		Parameters:
+
+		fileName -- name of the trace file
+
+		traceFormat -- format of the trace file (JSON lines by default)
+		"""
+
+		self.traceFormat = traceFormat
+		self.startTime = time()
+		self.threads = set()
+		self.cntEvents = 0
+		self.file = open(fileName, "w")
+		if traceFormat == TraceFormats.chrome:
+			# the closing bracket is optional in the Chrome trace event format, so an unfinished trace can still be viewed
+			self.file.write("[")
+
+	def addProbe(self, event):
+		"""Write the trace event of a probe
+
+		Parameters:
+
+		event -- trace event (see CreateProbeEvent), with the fields "lane" and "member" for the Chrome format
+		"""
+
+		if self.traceFormat == TraceFormats.jsonl:
+			self.file.write(json.dumps(event) + "\n")
+		else:
+			for chromeEvent in self.__GetChromeEvents(event):
+				self.file.write(("," if self.cntEvents else "") + "\n" + json.dumps(chromeEvent))
+				self.cntEvents += 1
+
+		self.file.flush()
+
+	def __GetChromeEvents(self, event):
+		# every member of each lane gets its own row in the timeline
+		pid = os.getpid()
+		tid = event.get("lane", 0) * 1000 + event.get("member", 0)
+		if tid not in self.threads:
+			self.threads.add(tid)
+			yield {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+				"args": {"name": "lane {:d}: {}".format(event.get("lane", 0), event["solver"])}}
+
+		name = "T = {}".format(event.get("lifetime"))
+		args = dict((key, value) for (key, value) in event.items() if key != "statistics")
+		args.update(event["statistics"])
+
+		# timestamps and durations are in microseconds
+		start = (event["start"] - self.startTime) * 1e6
+		yield {"name": name, "cat": "encode", "ph": "X", "pid": pid, "tid": tid, "ts": start, "dur": event["encodeTime"] * 1e6, "args": args}
+		if event["status"] != "cancelled":
+			yield {"name": name, "cat": event["status"], "ph": "X", "pid": pid, "tid": tid,
+				"ts": start + event["encodeTime"] * 1e6, "dur": event["solveTime"] * 1e6, "args": args}
+
+	def close(self):
+		"""Close the trace file"""
+
+		if self.traceFormat == TraceFormats.chrome:
+			self.file.write("\n]\n")
+		self.file.close()
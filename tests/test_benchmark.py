@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import json
+import sqlite3
+import sys
+
+import pytest
+
+import scripts.benchmark as benchmark
+from scripts.benchmark import CompareRuns, ParseOutput, ResultStore, RunInstance
+
+output = """FEATURES: {"sensors": 10, "version": 1}
+SAT
+BOUNDS: 39 <= T <= 40
+Starting to search for the optimum...
+OPTIMUM: 39
+BOUNDS TIME = 0.011286
+SEARCH TIME = 0.142004
+RESULTS PROVIDED BY: minicard = 6, cp-sat = 2
+ELAPSED TIME = 0.176569
+"""
+
+
+def fakeNeo(script):
+	"""Command that runs a Python script instead of neO, ignoring the command-line arguments"""
+
+	return [sys.executable, "-c", script]
+
+
+def test_parse_output():
+	result = ParseOutput(output)
+
+	assert result["status"] == "optimum" and result["optimum"] == 39
+	assert (result["lowerbound"], result["upperbound"]) == (39, 40)
+	assert (result["bounds_time"], result["search_time"], result["elapsed_time"]) == (0.011286, 0.142004, 0.176569)
+	assert result["winner"] == "minicard"
+	assert json.loads(result["features"]) == {"sensors": 10, "version": 1}
+
+
+@pytest.mark.parametrize("text, status", [
+	("SAT\nTIMEOUT\nBEST LIFETIME FOUND: 12\n", "best"),
+	("UNSAT\nELAPSED TIME = 0.1\n", "unsat"),
+	("TIMEOUT\nELAPSED TIME = 0.1\n", "timeout"),
+	("Traceback (most recent call last):\n", "error")
+])
+def test_parse_status(text, status):
+	assert ParseOutput(text)["status"] == status
+
+
+def test_run_instance():
+	result = RunInstance(fakeNeo("print({!r})".format(output)), "instance.wsn", ["--sat-solver", "minicard"])
+
+	assert result["status"] == "optimum" and result["optimum"] == 39 and result["return_code"] == 0
+	assert result["wall_time"] > 0 and result["cpu_time"] > 0 and result["max_memory"] > 0
+
+
+def test_run_instance_out_of_memory():
+	result = RunInstance(fakeNeo("x = bytearray(1 << 30)"), "instance.wsn", [], memoryLimit = 256)
+
+	assert result["status"] == "memout"
+
+
+def test_run_instance_is_killed_after_timeout(monkeypatch):
+	monkeypatch.setattr(benchmark, "GracePeriod", 0)
+	result = RunInstance(fakeNeo("import time; time.sleep(60)"), "instance.wsn", [], timeout = 1)
+
+	assert result["status"] == "timeout" and result["wall_time"] < 30
+
+
+def createResult(runId, instance, status, optimum, wallTime):
+	return {"run_id": runId, "instance": instance, "config": "minicard", "status": status, "optimum": optimum, "wall_time": wallTime}
+
+
+def test_store_and_compare(tmp_path):
+	store = ResultStore(str(tmp_path / "results.sqlite"))
+	for (instance, baseline, current) in [
+		("same.wsn", ("optimum", 10, 2.0), ("optimum", 10, 2.5)),
+		("wrong.wsn", ("optimum", 10, 2.0), ("optimum", 11, 2.0)),
+		("unsolved.wsn", ("unsat", None, 2.0), ("timeout", None, 60.0)),
+		("slower.wsn", ("optimum", 10, 2.0), ("optimum", 10, 4.0)),
+		# below the minimal slowdown
+		("noise.wsn", ("optimum", 10, 0.1), ("optimum", 10, 0.5)),
+		("new.wsn", None, ("optimum", 10, 2.0))
+	]:
+		if baseline:
+			store.add(createResult("baseline", instance, *baseline))
+		store.add(createResult("current", instance, *current))
+
+	regressions = CompareRuns(store.getRun("baseline"), store.getRun("current"))
+	assert [regression.split(":")[0] + " " + regression.split(":")[1].strip() for regression in regressions] == [
+		"SLOWDOWN slower.wsn [minicard]",
+		"NOT SOLVED unsolved.wsn [minicard]",
+		"WRONG ANSWER wrong.wsn [minicard]"
+	]
+
+	store.exportCsv("current", str(tmp_path / "results.csv"))
+	with open(str(tmp_path / "results.csv")) as file:
+		rows = list(csv.DictReader(file))
+	assert [row["instance"] for row in rows] == ["new.wsn", "noise.wsn", "same.wsn", "slower.wsn", "unsolved.wsn", "wrong.wsn"]
+	store.close()
+
+
+def test_store_of_an_older_version_gets_the_new_fields(tmp_path):
+	fileName = str(tmp_path / "results.sqlite")
+	connection = sqlite3.connect(fileName)
+	connection.execute("CREATE TABLE results (run_id, instance, config, status, optimum, wall_time, PRIMARY KEY (run_id, instance, config))")
+	connection.execute("INSERT INTO results VALUES ('old', 'a.wsn', 'minicard', 'optimum', 10, 2.0)")
+	connection.commit()
+	connection.close()
+
+	store = ResultStore(fileName)
+	store.add(dict(createResult("new", "a.wsn", "optimum", 10, 1.0), features = "{}"))
+	assert [(result["run_id"], result["features"]) for result in store.getResults()] == [("new", "{}"), ("old", None)]
+	assert [result["run_id"] for result in store.getResults(["old"])] == ["old"]
+	store.close()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from models.bounds import GetCoverageUpperBound
+from models.model1 import WsnModel1
+from models.model2 import WsnModel2
+from solvers.solver_sat import SatSolvers
+
+from test_solver_incremental import instance1, instance2, solveFresh
+
+
+def test_coverage_upper_bound():
+	# a point covered by sensors of 5 and 7 time intervals, 2 of which must cover it
+	assert GetCoverageUpperBound([[5, 7]], [[0, 0]], 2, upperbound = 100) == 5
+	assert GetCoverageUpperBound([[5, 7, 9]], [[0, 0, 0]], 2, upperbound = 100) == 10
+	assert GetCoverageUpperBound([[5, 7, 9]], [[0, 0, 0]], 2, upperbound = 8) == 8
+	# on for at most 2 consecutive time intervals, i.e., 2 out of 3
+	assert GetCoverageUpperBound([[100, 100, 100]], [[2, 2, 2]], 2, upperbound = 100) == 100
+	assert GetCoverageUpperBound([[100, 100]], [[2, 2]], 2, upperbound = 100) == 2
+	# too few potential coverers
+	assert GetCoverageUpperBound([[5, 7], [5]], [[0, 0], [0]], 2, upperbound = 100) == 0
+
+
+@pytest.mark.parametrize("limit_covering, limit_ON, limit_crit_ON, upperbound", [
+	(2, 0, 0, 28),
+	(2, 3, 0, 3),
+	(2, 3, 2, 2),
+	(3, 0, 0, 0)
+])
+def test_model1_upper_bound_is_tight(limit_covering, limit_ON, limit_crit_ON, upperbound):
+	# the first point is covered by two sensors only
+	wsnModel = WsnModel1(limit_covering, limit_ON, limit_crit_ON)
+	wsnModel.ReadInputFile(instance1)
+
+	assert wsnModel.GetUpperBound() == upperbound
+	if upperbound > 0:
+		assert solveFresh(wsnModel, SatSolvers.Glucose3, upperbound)
+	assert not solveFresh(wsnModel, SatSolvers.Glucose3, upperbound + 1)
+
+
+@pytest.mark.parametrize("limit_ON, limit_crit_ON", [(0, 0), (3, 2)])
+def test_model2_upper_bound_is_valid(limit_ON, limit_crit_ON):
+	wsnModel = WsnModel2(2, limit_ON, limit_crit_ON)
+	wsnModel.ReadInputFile(instance2)
+
+	upperbound = wsnModel.GetUpperBound()
+	assert upperbound < 8
+	assert not solveFresh(wsnModel, SatSolvers.Minicard, upperbound + 1)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from models.cache import CachedWsnModel
+from models.model1 import WsnModel1
+from models.model2 import WsnModel2
+from solvers.solver_cp import CpSat
+from solvers.solver_incremental import IncrementalSolver
+from solvers.solver_sat import SatSolvers
+
+from test_solver_incremental import instance1, instance2, createModel, createSolver
+
+
+# model 2 needs a SAT solver that supports weights
+@pytest.mark.parametrize("wsnModelClass, instance, lifetime, satSolverType", [
+	(WsnModel1, instance1, 28, SatSolvers.Glucose4),
+	(WsnModel1, instance1, 29, SatSolvers.Glucose4),
+	(WsnModel2, instance2, 4, SatSolvers.Minicard)
+])
+def test_replayed_encoding_is_equivalent(tmp_path, wsnModelClass, instance, lifetime, satSolverType):
+	wsnModel = CachedWsnModel(createModel(wsnModelClass, instance, 3, 2), instance, str(tmp_path))
+
+	recordingSolver = createSolver(satSolverType)
+	wsnModel.EncodeWsnConstraints(lifetime = lifetime, solver = recordingSolver)
+	isSAT = recordingSolver.solve()
+	assert len(os.listdir(str(tmp_path))) == 1
+
+	# replayed for a SAT solver as well as for a solver with other vars
+	for solver in [createSolver(satSolverType), CpSat()]:
+		replayedSchedulingVars = wsnModel.EncodeWsnConstraints(lifetime = lifetime, solver = solver)
+		assert solver.solve() == isSAT
+		if isSAT:
+			wsnModel.VerifyScheduling(schedulingModel = solver.get_values(replayedSchedulingVars), lifetime = lifetime)
+
+	assert len(os.listdir(str(tmp_path))) == 1
+
+
+def test_replayed_incremental_encoding(tmp_path):
+	wsnModel = CachedWsnModel(createModel(WsnModel1, instance1, 0, 0), instance1, str(tmp_path))
+
+	for _ in range(2):
+		solver = IncrementalSolver(wsnModel, createSolver(SatSolvers.Glucose4), upperbound = 32)
+		assert solver.solve(28)
+		wsnModel.VerifyScheduling(schedulingModel = solver.get_model(28), lifetime = 28)
+		assert not solver.solve(29)
+
+	# keyed by the WSN constraints as well
+	otherWsnModel = CachedWsnModel(createModel(WsnModel1, instance1, 3, 0), instance1, str(tmp_path))
+	IncrementalSolver(otherWsnModel, createSolver(SatSolvers.Glucose4), upperbound = 32)
+	assert len(os.listdir(str(tmp_path))) == 2
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+from models.cover_sets import CoverSetEngine
+from models.model1 import WsnModel1
+
+from test_solver_incremental import instance1
+
+benchmarkFile = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "10_s_4_t", "model_1", "1.wsn")
+
+
+def createModel(instance, limit_covering = 2):
+	wsnModel = WsnModel1(limit_covering, 0, 0)
+	wsnModel.ReadInputFile(instance)
+	return wsnModel
+
+
+def test_bounds_meet_at_optimum():
+	with open(benchmarkFile) as file:
+		jsonData = json.load(file)
+
+	for (wsnModel, optimum) in [(createModel(instance1), 28), (createModel(jsonData), 113)]:
+		(lowerbound, upperbound, schedulingModel) = CoverSetEngine(wsnModel).Solve(timeout = 60)
+		assert lowerbound == upperbound == optimum
+		wsnModel.VerifyScheduling(schedulingModel = schedulingModel, lifetime = optimum)
+
+
+def test_too_few_coverers():
+	# the first point is covered by two sensors only
+	assert CoverSetEngine(createModel(instance1, limit_covering = 3)).Solve() == (0, 0, None)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+from pysat.formula import CNF, CNFPlus
+from pysat.solvers import Solver as PysatSolver, Minicard
+
+from solvers.card_enc_type import CardEncType, Relations
+from solvers.dump import DumpCompressions, DumpFormats, OpenCompressed
+from solvers.solver import Constraint
+from solvers.solver_or import OrSolver, OrSolvers
+from solvers.solver_sat import SatSolver, SatSolvers
+from solvers.solver_smt import SmtSolver, SmtSolvers
+
+
+def encode(solver, bound):
+	lits = solver.generateVars(5)
+	solver.addClauses([[lits[0], lits[1]], [-lits[0], lits[2]]])
+	solver.addConstraint(Constraint(lits = lits, relation = Relations.LessOrEqual, bound = bound))
+	solver.addConstraint(Constraint(lits = lits, relation = Relations.GreaterOrEqual, bound = 2))
+	return solver.solve()
+
+
+@pytest.mark.parametrize("compression", list(DumpCompressions))
+@pytest.mark.parametrize("bound", [1, 3])
+def test_sat_dump(tmp_path, compression, bound):
+	dumpFileName = str(tmp_path / "formula")
+	isSAT = encode(SatSolver(satSolverType = SatSolvers.Glucose4, cardinalityEnc = CardEncType.seqcounter, dumpFileName = dumpFileName, dumpCompression = compression), bound)
+
+	cnf = CNF(from_file = dumpFileName + ".cnf" + compression.value)
+	with PysatSolver(name = "g4", bootstrap_with = cnf.clauses) as solver:
+		assert solver.solve() == isSAT
+
+	# the header counts the clauses of the cardinality encodings, as well
+	with OpenCompressed(dumpFileName + ".cnf" + compression.value, "rt", compression) as file:
+		header = file.readline().split()
+	assert header[:2] == ["p", "cnf"] and int(header[3]) == len(cnf.clauses)
+
+
+@pytest.mark.parametrize("compression", list(DumpCompressions))
+@pytest.mark.parametrize("bound", [1, 3])
+def test_minicard_dump(tmp_path, compression, bound):
+	dumpFileName = str(tmp_path / "formula")
+	isSAT = encode(SatSolver(satSolverType = SatSolvers.Minicard, dumpFileName = dumpFileName, dumpCompression = compression), bound)
+
+	cnf = CNFPlus(from_file = dumpFileName + ".cnf+" + compression.value)
+	assert len(cnf.clauses) == 2 and len(cnf.atmosts) == 2
+	with Minicard(bootstrap_with = cnf) as solver:
+		assert solver.solve() == isSAT
+
+
+def test_smt_dump(tmp_path):
+	dumpFileName = str(tmp_path / "formula")
+	encode(SmtSolver(smtSolverType = SmtSolvers.Z3, dumpFileName = dumpFileName, dumpCompression = DumpCompressions.gzip), 3)
+
+	with OpenCompressed(dumpFileName + ".smt2.gz", "rt", DumpCompressions.gzip) as file:
+		content = file.read()
+	assert content.startswith("(set-logic QF_LIA)(declare-fun v1 () Bool)")
+	assert content.count("(assert ") == 4 and content.endswith("(check-sat)(exit)")
+
+
+@pytest.mark.parametrize("dumpFormat", list(DumpFormats))
+def test_or_dump(tmp_path, dumpFormat):
+	dumpFileName = str(tmp_path / "formula")
+	encode(OrSolver(orSolverType = OrSolvers.SCIP, dumpFileName = dumpFileName, dumpFormat = dumpFormat, dumpCompression = DumpCompressions.xz), 3)
+
+	with OpenCompressed(dumpFileName + dumpFormat.value + ".xz", "rt", DumpCompressions.xz) as file:
+		content = file.read()
+	assert ("COLUMNS" if dumpFormat == DumpFormats.mps else "Subject to") in content
+	assert not os.path.exists(dumpFileName + dumpFormat.value)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+from math import ceil
+import random
+
+from models import geometry
+from models.model1 import WsnModel1
+from models.model2 import WsnModel2
+
+
+def createInstance(version, cntSensors, cntPoints):
+	random.seed(cntSensors)
+	return {
+		"version": version,
+		"sensors": [dict({"x": random.randint(0, 300), "y": random.randint(0, 300)}, **({"range": random.choice([120, 75, 25])} if version == 1 else {"power": 100})) for _ in range(cntSensors)],
+		"points": [{"x": random.randint(0, 300), "y": random.randint(0, 300), "critical": random.random() < 0.3} for _ in range(cntPoints)],
+		"levels": [{"power": 3, "range": 40}, {"power": 2, "range": 20}, {"power": 5, "range": 90}]
+	}
+
+
+def test_model1_coverage(monkeypatch):
+	# small chunks, so that the points are processed in several chunks
+	monkeypatch.setattr(geometry, "CHUNK_SIZE", 100)
+
+	wsnModel = WsnModel1(2, 0, 0)
+	wsnModel.ReadInputFile(createInstance(1, 30, 20))
+
+	for point in wsnModel.points:
+		assert point.converingSensorIndices == [sensorIndex for (sensorIndex, sensor) in enumerate(wsnModel.sensors) if point.DistanceFrom(sensor) <= sensor.scope]
+	for (sensorIndex, sensor) in enumerate(wsnModel.sensors):
+		assert wsnModel.criticalSensors[sensorIndex] == any(point.DistanceFrom(sensor) <= sensor.scope for point in wsnModel.critical_points)
+
+
+def test_model2_min_levels():
+	wsnModel = WsnModel2(2, 0, 0)
+	wsnModel.ReadInputFile(createInstance(2, 30, 20))
+
+	for (pointIndex, point) in enumerate(wsnModel.points):
+		for (sensorIndex, sensor) in enumerate(wsnModel.sensors):
+			assert wsnModel.distances[pointIndex, sensorIndex] == ceil(point.DistanceFrom(sensor))
+			levelIndices = [levelIndex for (levelIndex, level) in enumerate(wsnModel.levels) if level.range >= point.DistanceFrom(sensor)]
+			assert wsnModel.minLevels[pointIndex, sensorIndex] == min(levelIndices, default = len(wsnModel.levels))
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from models.model1 import WsnModel1
+from models.model2 import WsnModel2
+
+from test_solver_incremental import instance1, instance2
+
+
+@pytest.mark.parametrize("wsnModelClass, instance, optimum", [
+	(WsnModel1, instance1, 28),
+	(WsnModel2, instance2, None)
+])
+@pytest.mark.parametrize("limit_ON, limit_crit_ON", [(0, 0), (3, 2)])
+def test_greedy_scheduling_is_feasible(wsnModelClass, instance, optimum, limit_ON, limit_crit_ON):
+	wsnModel = wsnModelClass(2, limit_ON, limit_crit_ON)
+	wsnModel.ReadInputFile(instance)
+
+	# the scheduling is verified by ScheduleGreedily itself
+	(lifetime, schedulingModel) = wsnModel.ScheduleGreedily()
+	assert 0 < lifetime <= wsnModel.GetUpperBound()
+	assert schedulingModel.shape[:2] == (len(wsnModel.sensors), lifetime)
+	if optimum is not None and limit_ON == 0:
+		assert lifetime == optimum
+
+
+def test_greedy_scheduling_with_too_few_coverers():
+	wsnModel = WsnModel1(3, 0, 0)
+	wsnModel.ReadInputFile(instance1)
+
+	assert wsnModel.ScheduleGreedily()[0] == 0
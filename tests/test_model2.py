@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from models.cache import EncodingRecorder, CONSTRAINT, VARS
+from models.model2 import WsnModel2
+from solvers.card_enc_type import CardEncType, PBEncType
+from solvers.solver_cp import CpSat
+from solvers.solver_sat import SatSolver, SatSolvers
+
+from test_solver_incremental import instance2, createSolver
+
+
+def createModel(limit_ON = 0, limit_crit_ON = 0):
+	wsnModel = WsnModel2(2, limit_ON, limit_crit_ON)
+	wsnModel.ReadInputFile(instance2)
+	return wsnModel
+
+
+def test_unreachable_pairs_are_pruned():
+	wsnModel = createModel()
+	recorder = EncodingRecorder(createSolver(SatSolvers.Minicard))
+	wsnModel.EncodeWsnConstraints(lifetime = 3, solver = recorder)
+
+	# the first two sensors reach the first point only, the others the second point only
+	cntReachablePairs = int((wsnModel.minLevels < len(wsnModel.levels)).sum())
+	assert cntReachablePairs == 5
+	cntVarBlocks = sum(1 for op in recorder.ops if op[0] == VARS)
+	assert cntVarBlocks == len(wsnModel.sensors) * 3 + cntReachablePairs
+
+	# the only weighted constraints left are the lifetime constraints
+	assert sum(1 for op in recorder.ops if op[0] == CONSTRAINT and op[6]) == len(wsnModel.sensors)
+
+
+@pytest.mark.parametrize("limit_ON, limit_crit_ON", [(0, 0), (3, 2)])
+def test_backends_agree(limit_ON, limit_crit_ON):
+	wsnModel = createModel(limit_ON, limit_crit_ON)
+
+	for lifetime in range(1, wsnModel.GetUpperBound() + 2):
+		results = []
+		for solver in [createSolver(SatSolvers.Minicard), CpSat()]:
+			schedulingVars = wsnModel.EncodeWsnConstraints(lifetime = lifetime, solver = solver)
+			results.append(solver.solve())
+			if results[-1]:
+				wsnModel.VerifyScheduling(schedulingModel = solver.get_values(schedulingVars), lifetime = lifetime)
+		assert results[0] == results[1], "T = {:d}".format(lifetime)
+
+
+@pytest.mark.parametrize("limit_ON, limit_crit_ON", [(0, 0), (3, 2)])
+def test_pb_encoding_opens_model2_to_sat_solvers(limit_ON, limit_crit_ON):
+	pytest.importorskip("pypblib")
+	wsnModel = createModel(limit_ON, limit_crit_ON)
+
+	for lifetime in range(1, wsnModel.GetUpperBound() + 2):
+		results = []
+		for solver in [createSolver(SatSolvers.Minicard), SatSolver(SatSolvers.Glucose4, cardinalityEnc = CardEncType.seqcounter, pbEnc = PBEncType.bdd)]:
+			schedulingVars = wsnModel.EncodeWsnConstraints(lifetime = lifetime, solver = solver)
+			results.append(solver.solve())
+			if results[-1]:
+				wsnModel.VerifyScheduling(schedulingModel = solver.get_values(schedulingVars), lifetime = lifetime)
+		assert results[0] == results[1], "T = {:d}".format(lifetime)
+
+
+@pytest.mark.parametrize("limit_ON, limit_crit_ON", [(0, 0), (3, 2)])
+def test_order_encoding_agrees(limit_ON, limit_crit_ON):
+	wsnModel = createModel(limit_ON, limit_crit_ON)
+	orderWsnModel = WsnModel2(2, limit_ON, limit_crit_ON, order_encoding = True)
+	orderWsnModel.ReadInputFile(instance2)
+
+	for lifetime in range(1, wsnModel.GetUpperBound() + 2):
+		results = []
+		for model in [wsnModel, orderWsnModel]:
+			solver = createSolver(SatSolvers.Minicard)
+			schedulingVars = model.EncodeWsnConstraints(lifetime = lifetime, solver = solver)
+			results.append(solver.solve())
+			if results[-1]:
+				model.VerifyScheduling(schedulingModel = solver.get_values(schedulingVars), lifetime = lifetime)
+		assert results[0] == results[1], "T = {:d}".format(lifetime)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import pytest
+
+from models.model1 import WsnModel1
+from solvers.card_enc_type import CardEncType
+from solvers.portfolio import Portfolio, PortfolioMember
+from solvers.solver_cp import CpSolvers
+from solvers.solver_sat import SatSolvers
+
+from test_solver_incremental import instance1
+
+benchmarkFile = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "10_s_4_t", "model_1", "1.wsn")
+
+
+@pytest.fixture
+def portfolio():
+	wsnModel = WsnModel1(2, 0, 0)
+	wsnModel.ReadInputFile(instance1)
+	portfolio = Portfolio(wsnModel, [
+		PortfolioMember(SatSolvers.Glucose3, cardinalityEnc = CardEncType.seqcounter),
+		PortfolioMember(CpSolvers.CPSat)
+	])
+	yield portfolio
+	portfolio.close()
+
+
+def test_workers_serve_consecutive_probes(portfolio):
+	wsnModel = portfolio.wsnModel
+
+	for lifetime in [1, 28, 29, 14]:
+		result = portfolio.solve(lifetime, getModel = True)
+		assert result.isSAT == (lifetime <= 28)
+		if result.isSAT:
+			wsnModel.VerifyScheduling(schedulingModel = result.model, lifetime = lifetime)
+
+	assert all(process.is_alive() for (process, _, _) in portfolio.workers[0])
+
+
+def test_timeout_cancels_probe_without_killing_workers():
+	with open(benchmarkFile) as file:
+		jsonData = json.load(file)
+	wsnModel = WsnModel1(2, 0, 0)
+	wsnModel.ReadInputFile(jsonData)
+
+	portfolio = Portfolio(wsnModel, [PortfolioMember(SatSolvers.Glucose4, cardinalityEnc = CardEncType.seqcounter)])
+	try:
+		# hard UNSAT probe
+		assert portfolio.solve(132, timeout = 1) is None
+
+		# the interrupted worker serves the next probe
+		assert portfolio.solve(1).isSAT
+		assert portfolio.workers[0][0][0].is_alive()
+	finally:
+		portfolio.close()
+
+
+def test_lanes_probe_concurrently():
+	wsnModel = WsnModel1(2, 0, 0)
+	wsnModel.ReadInputFile(instance1)
+	portfolio = Portfolio(wsnModel, [PortfolioMember(CpSolvers.CPSat)], lanes = 3)
+	try:
+		running = {portfolio.submit(lifetime): lifetime for lifetime in [10, 28, 29]}
+		assert portfolio.getFreeLanes() == 0
+
+		decided = {}
+		while running:
+			(probeId, result) = portfolio.wait()
+			decided[running.pop(probeId)] = result.isSAT
+
+		assert decided == {10: True, 28: True, 29: False}
+		assert portfolio.getFreeLanes() == 3
+
+		# a cancelled probe frees its lane right away
+		probeId = portfolio.submit(5)
+		portfolio.cancel(probeId)
+		assert portfolio.getFreeLanes() == 3
+		assert portfolio.wait(timeout = 0.5) == (None, None)
+	finally:
+		portfolio.close()
+
+
+def test_maximize_in_one_shot():
+	wsnModel = WsnModel1(2, 0, 0)
+	wsnModel.ReadInputFile(instance1)
+	portfolio = Portfolio(wsnModel, [PortfolioMember(CpSolvers.CPSat)])
+	try:
+		result = portfolio.solve(wsnModel.GetUpperBound(), getModel = True, maximize = True)
+		assert result.lifetime == 28
+		wsnModel.VerifyScheduling(schedulingModel = result.model, lifetime = 28)
+	finally:
+		portfolio.close()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import pytest
+
+from models.model1 import WsnModel1
+from models.model2 import WsnModel2
+from models.preprocessing import InstanceReduction
+from solvers.solver_cp import CpSat
+
+benchmarkDir = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "10_s_4_t")
+
+# every sensor that covers the first point covers the second one, as well, and the third point is a copy of the first one
+instance = {
+	"version": 1,
+	"sensors": [
+		{"x": 0, "y": 0, "range": 25},
+		{"x": 10, "y": 0, "range": 25},
+		{"x": 10, "y": 0, "range": 7},
+		{"x": 200, "y": 200, "range": 7}
+	],
+	"points": [
+		{"x": 0, "y": 0, "critical": False},
+		{"x": 5, "y": 0, "critical": True},
+		{"x": 0, "y": 0, "critical": False}
+	]
+}
+
+
+def reduce(jsonData, limit_crit_ON = 0):
+	wsnModel = [WsnModel1, WsnModel2][jsonData["version"] - 1](2, 0, limit_crit_ON)
+	wsnModel.ReadInputFile(jsonData)
+	return (wsnModel, InstanceReduction(wsnModel, jsonData))
+
+
+def test_dominated_points_and_useless_sensors_are_removed():
+	(_, reduction) = reduce(instance)
+
+	# the second point and the copy of the first one are dominated, then the last two sensors cover no point
+	assert reduction.pointIndices == [0]
+	assert reduction.sensorIndices == [0, 1]
+	assert not reduction.isTriviallyUnsat
+
+
+def test_moving_target_points_are_kept():
+	(_, reduction) = reduce(instance, limit_crit_ON = 1)
+
+	assert reduction.pointIndices == [0, 1]
+	assert reduction.sensorIndices == [0, 1, 2]
+
+
+@pytest.mark.parametrize("fileName", [os.path.join("model_1", "1.wsn"), os.path.join("model_1_fix", "3.wsn"), os.path.join("model_2", "1.wsn")])
+def test_restored_scheduling_is_valid(fileName):
+	with open(os.path.join(benchmarkDir, fileName)) as file:
+		jsonData = json.load(file)
+	(wsnModel, reduction) = reduce(jsonData)
+	reducedWsnModel = type(wsnModel)(2, 0, 0)
+	reducedWsnModel.ReadInputFile(reduction.jsonData)
+	assert len(reducedWsnModel.points) < len(wsnModel.points)
+
+	(lifetime, schedulingModel) = reducedWsnModel.ScheduleGreedily()
+	assert lifetime > 0
+	wsnModel.VerifyScheduling(schedulingModel = reduction.RestoreScheduling(schedulingModel, lifetime), lifetime = lifetime)
+
+
+def test_optimum_is_kept():
+	with open(os.path.join(benchmarkDir, "model_1", "1.wsn")) as file:
+		jsonData = json.load(file)
+	(wsnModel, reduction) = reduce(jsonData)
+	reducedWsnModel = WsnModel1(2, 0, 0)
+	reducedWsnModel.ReadInputFile(reduction.jsonData)
+
+	# the optimum of the instance is 113
+	for lifetime in [113, 114]:
+		solver = CpSat()
+		schedulingVars = reducedWsnModel.EncodeWsnConstraints(lifetime = lifetime, solver = solver)
+		assert solver.solve() == (lifetime == 113)
+		if lifetime == 113:
+			wsnModel.VerifyScheduling(schedulingModel = reduction.RestoreScheduling(solver.get_values(schedulingVars), lifetime), lifetime = lifetime)
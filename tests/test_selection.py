@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+from models.model1 import WsnModel1
+from models.model2 import WsnModel2
+from solvers.selection import SolverSelector, TrainSelector
+
+from test_solver_incremental import createModel, instance1, instance2
+
+
+def createFeatures(version, sensors, limitCovering = 2):
+	return {"version": version, "sensors": sensors, "points": 10, "limitCovering": limitCovering}
+
+
+def createResult(instance, features, config, status, wallTime):
+	return {"instance": instance, "features": json.dumps(features) if features else None, "config": config, "arguments": "--" + config, "status": status, "wall_time": wallTime}
+
+
+@pytest.fixture
+def selector(tmp_path):
+	results = []
+	# minicard is the fastest on the small instances of model 1, cp-sat on the large ones, and on model 2
+	for sensors in [10, 12, 14]:
+		results.append(createResult("small{:d}.wsn".format(sensors), createFeatures(1, sensors), "minicard", "optimum", 1.0))
+		results.append(createResult("small{:d}.wsn".format(sensors), createFeatures(1, sensors), "cp-sat", "optimum", 2.0))
+	for sensors in [100, 120]:
+		results.append(createResult("large{:d}.wsn".format(sensors), createFeatures(1, sensors), "minicard", "timeout", 60.0))
+		results.append(createResult("large{:d}.wsn".format(sensors), createFeatures(1, sensors), "cp-sat", "unsat", 30.0))
+	results.append(createResult("model2.wsn", createFeatures(2, 12), "minicard", "optimum", 5.0))
+	results.append(createResult("model2.wsn", createFeatures(2, 12), "cp-sat", "optimum", 4.0))
+	# a run of an older version, without the features
+	results.append(createResult("old.wsn", None, "glucose4", "optimum", 0.1))
+
+	fileName = str(tmp_path / "selector.json")
+	assert TrainSelector(results, fileName, neighbours = 2) == 6
+	return SolverSelector(fileName)
+
+
+def test_nearest_instances_select_the_configuration(selector):
+	assert selector.select(createFeatures(1, 11)) == ("minicard", "--minicard")
+	# the timeout of minicard counts as ten times the largest wall time
+	assert selector.select(createFeatures(1, 110)) == ("cp-sat", "--cp-sat")
+
+
+def test_instances_of_another_model_are_not_comparable(selector):
+	assert selector.select(createFeatures(2, 11)) == ("cp-sat", "--cp-sat")
+	assert selector.select(createFeatures(3, 11)) is None
+
+
+def test_training_requires_features(tmp_path):
+	with pytest.raises(Exception):
+		TrainSelector([createResult("old.wsn", None, "minicard", "optimum", 1.0)], str(tmp_path / "selector.json"))
+
+
+@pytest.mark.parametrize("wsnModelClass, instance, levels", [(WsnModel1, instance1, 1), (WsnModel2, instance2, 2)])
+def test_features_of_the_models_agree(wsnModelClass, instance, levels):
+	wsnModel = createModel(wsnModelClass, instance, 3, 2)
+
+	assert wsnModel.features["sensors"] == len(wsnModel.sensors) and wsnModel.features["points"] == len(wsnModel.points)
+	assert wsnModel.features["levels"] == levels and wsnModel.features["limitOn"] == 3
+	assert 0 < wsnModel.features["coverageDensity"] <= 1 and wsnModel.features["minCoverers"] <= wsnModel.features["meanCoverers"]
+	# every model has the same features, so that the instances of both are comparable
+	assert sorted(wsnModel.features) == sorted(createModel(WsnModel1, instance1, 0, 0).features)
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+from threading import Timer
+
+import pytest
+from pysat.examples.genhard import PHP
+
+from models.model1 import WsnModel1
+from models.model2 import WsnModel2
+from solvers.card_enc_type import CardEncType
+from solvers.solver_incremental import IncrementalSolver
+from solvers.solver_sat import SatSolver, SatSolvers
+from solvers.solver_smt import SmtSolver, SmtSolvers, Z3PbSolver
+
+# the first point is covered by only two sensors, which keeps the UNSAT proofs easy
+instance1 = {
+	"version": 1,
+	"sensors": [
+		{"x": 0, "y": 100, "range": 120},
+		{"x": 100, "y": 0, "range": 109},
+		{"x": 300, "y": 280, "range": 25},
+		{"x": 280, "y": 300, "range": 25},
+		{"x": 310, "y": 310, "range": 25}
+	],
+	"points": [
+		{"x": 0, "y": 0, "critical": True},
+		{"x": 300, "y": 300, "critical": False}
+	]
+}
+
+instance2 = {
+	"version": 2,
+	"sensors": [
+		{"x": 0, "y": 15, "power": 12},
+		{"x": 15, "y": 0, "power": 10},
+		{"x": 300, "y": 285, "power": 9},
+		{"x": 285, "y": 300, "power": 14},
+		{"x": 330, "y": 300, "power": 20}
+	],
+	"points": [
+		{"x": 0, "y": 0, "critical": True},
+		{"x": 300, "y": 300, "critical": False}
+	],
+	"levels": [
+		{"power": 2, "range": 20},
+		{"power": 3, "range": 40}
+	]
+}
+
+def createModel(wsnModelClass, instance, limit_ON, limit_crit_ON):
+	wsnModel = wsnModelClass(2, limit_ON, limit_crit_ON)
+	wsnModel.ReadInputFile(instance)
+	return wsnModel
+
+
+def createSolver(satSolverType):
+	return SatSolver(satSolverType = satSolverType, cardinalityEnc = None if satSolverType == SatSolvers.Minicard else CardEncType.seqcounter)
+
+
+def solveFresh(wsnModel, satSolverType, lifetime):
+	solver = createSolver(satSolverType)
+	wsnModel.EncodeWsnConstraints(lifetime = lifetime, solver = solver)
+	return solver.solve()
+
+
+@pytest.mark.parametrize("wsnModelClass, instance, satSolverType, maxLifetime", [
+	(WsnModel1, instance1, SatSolvers.Glucose3, 32),
+	(WsnModel1, instance1, SatSolvers.Minicard, 32),
+	(WsnModel2, instance2, SatSolvers.Minicard, 8)
+])
+@pytest.mark.parametrize("limit_ON, limit_crit_ON", [(0, 0), (3, 2)])
+def test_incremental_agrees_with_fresh_encoding(wsnModelClass, instance, satSolverType, maxLifetime, limit_ON, limit_crit_ON):
+	wsnModel = createModel(wsnModelClass, instance, limit_ON, limit_crit_ON)
+	# beyond the upper bound of the model, so that some lifetimes are UNSAT
+	upperbound = maxLifetime
+	assert wsnModel.GetUpperBound() < upperbound
+	incrementalSolver = IncrementalSolver(wsnModel, createSolver(satSolverType), upperbound)
+
+	results = []
+	for lifetime in range(1, upperbound + 1):
+		isSAT = incrementalSolver.solve(lifetime)
+		assert isSAT == solveFresh(wsnModel, satSolverType, lifetime), "T = {:d}".format(lifetime)
+		if isSAT:
+			wsnModel.VerifyScheduling(schedulingModel = incrementalSolver.get_model(lifetime), lifetime = lifetime)
+		results.append(isSAT)
+
+	# some lifetime is satisfiable, some is not, and satisfiability is monotone
+	assert results[0] and not results[-1]
+	assert results == sorted(results, reverse = True)
+
+
+@pytest.mark.parametrize("createSmtSolver", [Z3PbSolver, lambda: SmtSolver(smtSolverType = SmtSolvers.Z3)])
+@pytest.mark.parametrize("wsnModelClass, instance, maxLifetime", [(WsnModel1, instance1, 32), (WsnModel2, instance2, 8)])
+def test_incremental_smt_agrees_with_sat(createSmtSolver, wsnModelClass, instance, maxLifetime):
+	pytest.importorskip("z3")
+
+	wsnModel = createModel(wsnModelClass, instance, 3, 2)
+	satSolver = IncrementalSolver(wsnModel, createSolver(SatSolvers.Minicard), maxLifetime)
+	smtSolver = IncrementalSolver(wsnModel, createSmtSolver(), maxLifetime)
+
+	# the lifetimes are checked in no monotone order, so that an UNSAT call must not affect the later ones
+	for lifetime in [maxLifetime // 2, 1, maxLifetime, 3, 2, maxLifetime // 4]:
+		isSAT = smtSolver.solve(lifetime)
+		assert isSAT == satSolver.solve(lifetime), "T = {:d}".format(lifetime)
+		if isSAT:
+			wsnModel.VerifyScheduling(schedulingModel = smtSolver.get_model(lifetime), lifetime = lifetime)
+
+
+def test_lifetime_beyond_upperbound_is_unsat():
+	wsnModel = createModel(WsnModel1, instance1, 0, 0)
+	incrementalSolver = IncrementalSolver(wsnModel, createSolver(SatSolvers.Glucose3), upperbound = 3)
+
+	assert incrementalSolver.solve(3) is not None
+	assert incrementalSolver.solve(4) is False
+
+
+def test_interrupt_returns_none():
+	solver = createSolver(SatSolvers.Glucose3)
+	formula = PHP(12)
+	solver.generateVars(formula.nv)
+	for clause in formula.clauses:
+		solver.addClause(clause)
+
+	timer = Timer(0.2, solver.interrupt)
+	timer.start()
+	assert solver.solve(assumptions = []) is None
+	timer.cancel()
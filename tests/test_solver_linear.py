@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from models.model1 import WsnModel1
+from models.model2 import WsnModel2
+from solvers.card_enc_type import CardEncType
+from solvers.solver_cp import CpSat
+from solvers.solver_or import OrSolver, OrSolvers
+from solvers.solver_sat import SatSolver, SatSolvers
+from solvers.solver_smt import Z3PbSolver
+
+from test_solver_incremental import createModel, instance1, instance2
+
+
+def solveFresh(wsnModel, solver, lifetime):
+	schedulingVars = wsnModel.EncodeWsnConstraints(lifetime = lifetime, solver = solver)
+	if not solver.solve():
+		return False
+	wsnModel.VerifyScheduling(schedulingModel = solver.get_values(schedulingVars), lifetime = lifetime)
+	return True
+
+
+def agreesWithMinicard(wsnModelClass, instance, lifetimes, createSolver):
+	wsnModel = createModel(wsnModelClass, instance, 3, 2)
+
+	for lifetime in lifetimes:
+		expected = SatSolver(satSolverType = SatSolvers.Minicard)
+		wsnModel.EncodeWsnConstraints(lifetime = lifetime, solver = expected)
+		assert solveFresh(wsnModel, createSolver(), lifetime) == expected.solve(), "T = {:d}".format(lifetime)
+
+
+instances = [(WsnModel1, instance1, [1, 2, 3, 5]), (WsnModel2, instance2, [1, 2, 3, 4])]
+
+
+@pytest.mark.parametrize("createSolver", [CpSat, lambda: OrSolver(orSolverType = OrSolvers.SCIP)], ids = ["cp-sat", "scip"])
+@pytest.mark.parametrize("wsnModelClass, instance, lifetimes", instances)
+def test_bulk_constraints_agree_with_minicard(createSolver, wsnModelClass, instance, lifetimes):
+	agreesWithMinicard(wsnModelClass, instance, lifetimes, createSolver)
+
+
+@pytest.mark.parametrize("matrixApi", [True, False])
+@pytest.mark.parametrize("wsnModelClass, instance, lifetimes", instances)
+def test_gurobi_matrix_constraints_agree_with_minicard(monkeypatch, matrixApi, wsnModelClass, instance, lifetimes):
+	gurobi = pytest.importorskip("solvers.solver_gurobi")
+	if matrixApi:
+		pytest.importorskip("scipy")
+	else:
+		# without SciPy, the constraints are added one by one
+		monkeypatch.setattr(gurobi, "scipy", None)
+
+	agreesWithMinicard(wsnModelClass, instance, lifetimes, gurobi.GurobiSolver)
+
+
+def createGurobi():
+	return pytest.importorskip("solvers.solver_gurobi").GurobiSolver()
+
+
+def createZ3():
+	pytest.importorskip("z3")
+	return Z3PbSolver()
+
+
+@pytest.mark.parametrize("createSolver", [
+	lambda: SatSolver(satSolverType = SatSolvers.Glucose4, cardinalityEnc = CardEncType.seqcounter),
+	lambda: SatSolver(satSolverType = SatSolvers.Minicard),
+	CpSat,
+	lambda: OrSolver(orSolverType = OrSolvers.SCIP),
+	createGurobi,
+	createZ3
+], ids = ["glucose4", "minicard", "cp-sat", "scip", "gurobi", "z3"])
+def test_values_agree_with_model(createSolver):
+	solver = createSolver()
+	lits = solver.generateVars(6)
+	solver.addClauses([[lits[0]], [-lits[1]], [-lits[2], lits[3]], [lits[2]], [-lits[4]]])
+	assert solver.solve()
+
+	# a nested list of vars, with negative literals
+	vars = [[lits[0], -lits[1], lits[2]], [-lits[3], lits[4], -lits[5]]]
+	values = solver.get_values(vars)
+	assert values.dtype == bool and values.shape == (2, 3)
+	assert values[0].tolist() == [True, True, True] and values[1, :2].tolist() == [False, False]
+	assert (values == ~solver.get_values([[-var for var in row] for row in vars])).all()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+from itertools import product
+
+import pytest
+
+from solvers.card_enc_type import CardEncType, PBEncType, Relations
+from solvers.solver import Constraint
+from solvers.solver_sat import SatSolver, SatSolvers
+
+
+def reifiedValues(satSolverType, cardinalityEnc, numLits, relation, bound, weights = None, pbEnc = None):
+	"""For each assignment of the literals, collect the values the reifying literal can take"""
+
+	solver = SatSolver(satSolverType = satSolverType, cardinalityEnc = cardinalityEnc, pbEnc = pbEnc)
+	lits = solver.generateVars(numLits)
+	boolLit = solver.generateVars(1)[0]
+	solver.addConstraint(Constraint(lits = lits, weights = weights, relation = relation, bound = bound, boolLit = boolLit))
+
+	values = {}
+	for assignment in product([False, True], repeat = numLits):
+		assumptions = [l if a else -l for l, a in zip(lits, assignment)]
+		values[assignment] = tuple(solver.solver.solve(assumptions = assumptions + [b]) for b in [boolLit, -boolLit])
+
+	return values
+
+
+@pytest.mark.parametrize("cardinalityEnc", [CardEncType.seqcounter, CardEncType.cardnetwrk, CardEncType.mtotalizer])
+@pytest.mark.parametrize("relation", list(Relations))
+@pytest.mark.parametrize("bound", [0, 1, 2, 4, 5])
+def test_reified_encoding_agrees_with_minicard(cardinalityEnc, relation, bound):
+	numLits = 4
+
+	expected = reifiedValues(SatSolvers.Minicard, None, numLits, relation, bound)
+	actual = reifiedValues(SatSolvers.Glucose4, cardinalityEnc, numLits, relation, bound)
+
+	assert actual == expected
+	# the reifying literal is always determined by the assignment
+	assert all(sum(v) == 1 for v in actual.values())
+
+
+
+@pytest.mark.parametrize("pbEnc", [PBEncType.bdd, PBEncType.sortnetwrk, PBEncType.adder])
+@pytest.mark.parametrize("relation", list(Relations))
+@pytest.mark.parametrize("bound", [0, 3, 5, 9])
+def test_weighted_encoding_agrees_with_minicard(pbEnc, relation, bound):
+	pytest.importorskip("pypblib")
+
+	numLits = 4
+	weights = [1, 2, 0, 4]
+
+	expected = reifiedValues(SatSolvers.Minicard, None, numLits, relation, bound, weights)
+	actual = reifiedValues(SatSolvers.Glucose4, CardEncType.seqcounter, numLits, relation, bound, weights, pbEnc)
+
+	assert actual == expected
+
+
+def batchedValues(cardinalityEnc, batched):
+	"""For each assignment of the literals, check whether it satisfies a few constraints added in one batch or one by one"""
+
+	solver = SatSolver(satSolverType = SatSolvers.Glucose4, cardinalityEnc = cardinalityEnc)
+	lits = solver.generateVars(6)
+	constraints = [
+		Constraint(lits = lits[:4], relation = Relations.LessOrEqual, bound = 1),
+		Constraint(lits = lits[2:], relation = Relations.GreaterOrEqual, bound = 2),
+		Constraint(lits = lits[1:5], relation = Relations.Less, bound = 3, boolLit = lits[5])
+	]
+	if batched:
+		solver.addConstraints(constraints)
+	else:
+		for constraint in constraints:
+			solver.addConstraint(constraint)
+
+	values = {}
+	for assignment in product([False, True], repeat = len(lits)):
+		values[assignment] = solver.solve(assumptions = [l if a else -l for l, a in zip(lits, assignment)])
+
+	return (values, solver.cntVars)
+
+
+@pytest.mark.parametrize("cardinalityEnc", [CardEncType.seqcounter, CardEncType.mtotalizer])
+def test_batched_constraints_agree_with_single_ones(cardinalityEnc):
+	# the aux vars of an encoding are reserved before its clauses reach the SAT solver
+	assert batchedValues(cardinalityEnc, batched = True) == batchedValues(cardinalityEnc, batched = False)
+
+
+@pytest.mark.parametrize("satSolverType", [SatSolvers.Glucose4, SatSolvers.Minicard])
+@pytest.mark.parametrize("slotSizes", [[1] * 8, [2, 1, 2, 1, 1, 2]])
+@pytest.mark.parametrize("window, bound", [(3, 1), (3, 2), (4, 2), (2, 0), (8, 3)])
+def test_window_constraints(satSolverType, slotSizes, window, bound):
+	solver = SatSolver(satSolverType = satSolverType, cardinalityEnc = None if satSolverType == SatSolvers.Minicard else CardEncType.seqcounter)
+	slots = [solver.generateVars(size) for size in slotSizes]
+	lits = [l for slot in slots for l in slot]
+	solver.addWindowConstraints(slots, window, bound)
+
+	for assignment in product([False, True], repeat = len(lits)):
+		values = dict(zip(lits, assignment))
+		expected = all(sum(values[l] for slot in slots[start:start + window] for l in slot) <= bound for start in range(len(slots) - window + 1))
+		assert solver.solve(assumptions = [l if a else -l for l, a in zip(lits, assignment)]) == expected
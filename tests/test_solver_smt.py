@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+from itertools import product
+
+import pytest
+
+from solvers.card_enc_type import Relations
+from solvers.solver import Constraint
+from solvers.solver_smt import SmtSolver, SmtSolvers, Z3PbSolver
+
+
+def satisfiedAssignments(createSolver, relation, bound, weights, reified):
+	"""Collect the assignments of the literals and of the reifying (or conditional) literal that satisfy the constraint"""
+
+	numLits = 4
+	satisfied = set()
+	for assignment in product([False, True], repeat = numLits + 1):
+		solver = createSolver()
+		lits = solver.generateVars(numLits + 1)
+		if reified:
+			solver.addConstraint(Constraint(lits = lits[:numLits], weights = weights, relation = relation, bound = bound, boolLit = lits[numLits]))
+		else:
+			solver.addConstraint(Constraint(lits = lits[:numLits], weights = weights, relation = relation, bound = bound, condLit = lits[numLits]))
+		for (l, a) in zip(lits, assignment):
+			solver.addClause([l if a else -l])
+		if solver.solve():
+			satisfied.add(assignment)
+
+	return satisfied
+
+
+@pytest.mark.parametrize("relation", list(Relations))
+@pytest.mark.parametrize("bound", [0, 3, 5])
+@pytest.mark.parametrize("reified", [False, True])
+def test_native_constraints_agree_with_ite_sums(relation, bound, reified):
+	pytest.importorskip("z3")
+
+	weights = [1, 2, 0, 4]
+
+	expected = satisfiedAssignments(lambda: SmtSolver(smtSolverType = SmtSolvers.Z3), relation, bound, weights, reified)
+	actual = satisfiedAssignments(lambda: Z3PbSolver(), relation, bound, weights, reified)
+
+	assert actual == expected
+
+
+def test_native_model():
+	pytest.importorskip("z3")
+
+	solver = Z3PbSolver()
+	lits = solver.generateVars(4)
+	solver.addClauses([[lits[0]], [-lits[1], lits[2]]])
+	solver.addConstraint(Constraint(lits = lits, weights = [3, 1, 1, 1], relation = Relations.GreaterOrEqual, bound = 5))
+
+	assert solver.solve()
+	model = solver.get_model(lits)
+	assert model[0] > 0 and model[1] > 0 and model[2] > 0
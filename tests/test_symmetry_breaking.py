@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from models.model1 import WsnModel1
+from models.model2 import WsnModel2
+from solvers.solver_incremental import IncrementalSolver
+from solvers.solver_sat import SatSolvers
+
+from test_solver_incremental import instance1, instance2, createSolver
+
+
+def solve(wsnModel, satSolverType, lifetime):
+	solver = createSolver(satSolverType)
+	schedulingVars = wsnModel.EncodeWsnConstraints(lifetime = lifetime, solver = solver)
+	if not solver.solve():
+		return False
+	wsnModel.VerifyScheduling(schedulingModel = solver.get_values(schedulingVars), lifetime = lifetime)
+	return True
+
+
+@pytest.mark.parametrize("wsnModelClass, instance, satSolverType, lifetimes", [
+	(WsnModel1, instance1, SatSolvers.Glucose3, [1, 14, 27, 28, 29, 30]),
+	(WsnModel2, instance2, SatSolvers.Minicard, range(1, 9))
+])
+@pytest.mark.parametrize("limit_ON, limit_crit_ON", [(0, 0), (3, 2)])
+def test_symmetry_breaking_keeps_satisfiability(wsnModelClass, instance, satSolverType, lifetimes, limit_ON, limit_crit_ON):
+	wsnModel = wsnModelClass(2, limit_ON, limit_crit_ON)
+	wsnModel.ReadInputFile(instance)
+	symmetricWsnModel = wsnModelClass(2, limit_ON, limit_crit_ON, symmetry_breaking = True)
+	symmetricWsnModel.ReadInputFile(instance)
+
+	for lifetime in lifetimes:
+		assert solve(symmetricWsnModel, satSolverType, lifetime) == solve(wsnModel, satSolverType, lifetime), "T = {:d}".format(lifetime)
+
+
+def test_symmetry_breaking_with_activation_vars():
+	wsnModel = WsnModel1(2, 0, 0, symmetry_breaking = True)
+	wsnModel.ReadInputFile(instance1)
+	incrementalSolver = IncrementalSolver(wsnModel, createSolver(SatSolvers.Glucose3), upperbound = 32)
+
+	assert incrementalSolver.solve(28)
+	wsnModel.VerifyScheduling(schedulingModel = incrementalSolver.get_model(28), lifetime = 28)
+	assert not incrementalSolver.solve(29)
+
+
+def test_identical_sensors_are_ordered():
+	# the last three sensors have the same scope and cover the same point
+	wsnModel = WsnModel1(2, 0, 0, symmetry_breaking = True)
+	wsnModel.ReadInputFile(instance1)
+	solver = createSolver(SatSolvers.Glucose3)
+	schedulingVars = wsnModel.EncodeWsnConstraints(lifetime = 28, solver = solver)
+	assert solver.solve()
+
+	schedulingModel = solver.get_values(schedulingVars).tolist()
+	assert schedulingModel[2] >= schedulingModel[3] >= schedulingModel[4]
+	columns = [[schedulingModel[sensorIndex][time] for sensorIndex in range(5)] for time in range(28)]
+	assert columns == sorted(columns, reverse = True)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+import json
+from collections import Counter
+
+import pytest
+
+from models.model1 import WsnModel1
+from solvers.card_enc_type import CardEncType
+from solvers.portfolio import Portfolio, PortfolioMember
+from solvers.solver_cp import CpSolvers
+from solvers.solver_sat import SatSolvers
+from solvers.tracing import CreateProbeEvent, TraceFormats, Tracer
+
+from test_solver_incremental import instance1
+
+
+def tracePortfolio(fileName, traceFormat, lifetimes):
+	"""Run a portfolio on some lifetimes of the first test instance, tracing its probes"""
+
+	wsnModel = WsnModel1(2, 0, 0)
+	wsnModel.ReadInputFile(instance1)
+
+	tracer = Tracer(fileName, traceFormat)
+	portfolio = Portfolio(wsnModel, [
+		PortfolioMember(SatSolvers.Glucose3, cardinalityEnc = CardEncType.seqcounter),
+		PortfolioMember(CpSolvers.CPSat)
+	], tracer = tracer)
+	try:
+		results = [portfolio.solve(lifetime) for lifetime in lifetimes]
+	finally:
+		portfolio.close()
+		tracer.close()
+
+	return results
+
+
+def test_jsonl_trace_of_portfolio(tmp_path):
+	fileName = str(tmp_path / "trace.jsonl")
+	results = tracePortfolio(fileName, TraceFormats.jsonl, [1, 29])
+
+	with open(fileName) as file:
+		events = [json.loads(line) for line in file]
+
+	# one event per probe and per member, after the portfolio is closed
+	assert sorted((event["probe"], event["member"]) for event in events) == [(1, 0), (1, 1), (2, 0), (2, 1)]
+	winners = [event for event in events if event["winner"]]
+	assert [(event["lifetime"], event["solver"], event["status"]) for event in winners] == [
+		(1, results[0].solverType.value, "sat"),
+		(29, results[1].solverType.value, "unsat")
+	]
+
+	for event in events:
+		assert event["status"] in ["sat", "unsat", "interrupted", "cancelled"]
+		assert event["encodeTime"] >= 0 and event["solveTime"] >= 0
+		if event["status"] != "cancelled":
+			assert event["statistics"]["vars"] > 0 and event["statistics"]["constraints"] > 0
+	assert all("clauses" in event["statistics"] for event in events if event["solver"] == "glucose3" and event["status"] != "cancelled")
+
+
+def test_chrome_trace_of_portfolio(tmp_path):
+	fileName = str(tmp_path / "trace.json")
+	tracePortfolio(fileName, TraceFormats.chrome, [1, 29])
+
+	with open(fileName) as file:
+		events = json.load(file)
+
+	# one row per member, named after its solver
+	assert sorted(event["args"]["name"] for event in events if event["ph"] == "M") == ["lane 0: cp-sat", "lane 0: glucose3"]
+	slices = [event for event in events if event["ph"] == "X"]
+	assert Counter(event["name"] for event in slices if event["cat"] == "encode") == {"T = 1": 2, "T = 29": 2}
+	assert all(event["ts"] >= 0 and event["dur"] >= 0 for event in slices)
+
+
+@pytest.mark.parametrize("traceFormat", list(TraceFormats))
+def test_cancelled_probe_has_no_solve_slice(tmp_path, traceFormat):
+	fileName = str(tmp_path / "trace")
+	tracer = Tracer(fileName, traceFormat)
+	tracer.addProbe(CreateProbeEvent(SatSolvers.Minicard, tracer.startTime, 0.5, 0, "cancelled", lifetime = 3))
+	tracer.close()
+
+	with open(fileName) as file:
+		if traceFormat == TraceFormats.jsonl:
+			events = [json.loads(line) for line in file]
+			assert events[0]["status"] == "cancelled" and events[0]["statistics"] == {}
+		else:
+			events = json.load(file)
+			assert [(event["ph"], event.get("cat")) for event in events] == [("M", None), ("X", "encode")]
+			assert events[1]["dur"] == 0.5e6
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from models.model1 import WsnModel1
+from models.model2 import WsnModel2
+
+from test_solver_incremental import createModel, instance1, instance2
+
+
+def verificationFailures(wsnModel, schedulingModel, lifetime):
+	"""Count the violated constraints reported by the verification, by the type of the constraint"""
+
+	with pytest.raises(AssertionError) as failure:
+		wsnModel.VerifyScheduling(schedulingModel = schedulingModel, lifetime = lifetime)
+
+	lines = str(failure.value).splitlines()
+	violations = Counter(line.split(" constraint violated")[0] for line in lines[1:])
+	assert lines[0] == "Verification failed: {:d} violated constraints".format(sum(violations.values()))
+	return violations
+
+
+@pytest.mark.parametrize("window", [1, 3, 6, 7, 8])
+def test_window_sums(window):
+	counts = np.random.default_rng(window).integers(0, 3, size = (4, 6))
+	expected = [[counts[row, time : time + window].sum() for time in range(6 - window + 1)] for row in range(4)]
+
+	assert WsnModel1(2, 0, 0).GetWindowSums(counts, window).tolist() == expected
+
+
+def test_all_violations_of_model1_are_reported():
+	wsnModel = createModel(WsnModel1, instance1, 3, 2)
+
+	# every sensor is on, except at the first time interval
+	schedulingModel = np.ones((5, 30), dtype = bool)
+	schedulingModel[:, 0] = False
+
+	assert verificationFailures(wsnModel, schedulingModel, 30) == {
+		# the first sensor lives 28 time intervals
+		"lifetime": 1,
+		"coverage": 2,
+		# every window but the first one
+		"evasive": 5 * 26,
+		# the first two sensors cover the critical point, every window but the first one
+		"moving target": 2 * 27
+	}
+
+
+def test_all_violations_of_model2_are_reported():
+	wsnModel = createModel(WsnModel2, instance2, 0, 2)
+
+	# the first four sensors are on at the lowest level, the last one is at both levels at the first time interval
+	schedulingModel = np.zeros((5, 6, 2), dtype = bool)
+	schedulingModel[:4, :, 0] = True
+	schedulingModel[4, 0, :] = True
+
+	assert verificationFailures(wsnModel, schedulingModel, 6) == {
+		"level": 1,
+		# the second and third sensors have less than 12 power
+		"lifetime": 2,
+		# the first two sensors cover the critical point in every window
+		"moving target": 2 * 4
+	}
+
+
+@pytest.mark.parametrize("wsnModelClass, instance", [(WsnModel1, instance1), (WsnModel2, instance2)])
+def test_greedy_scheduling_has_no_violations(wsnModelClass, instance):
+	wsnModel = createModel(wsnModelClass, instance, 3, 2)
+	(lifetime, schedulingModel) = wsnModel.ScheduleGreedily()
+
+	wsnModel.VerifyScheduling(schedulingModel = schedulingModel, lifetime = lifetime)
+	# a scheduling with every sensor off violates the coverage constraint
+	with pytest.raises(AssertionError):
+		wsnModel.VerifyScheduling(schedulingModel = np.zeros_like(schedulingModel), lifetime = lifetime)